@@ -0,0 +1,5 @@
+""" Benchmarks for the HBNB application.
+
+Run them from the `hbnb` directory, e.g.:
+    python -m benchmarks.memory_lookup
+"""
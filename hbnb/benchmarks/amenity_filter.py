@@ -0,0 +1,141 @@
+"""
+Measures the `amenities` filter of `GET /places`, the places that have
+every one of some amenities:
+
+- the masks the table of the links keeps per place in the in-memory
+  repositories, against intersecting the places of each amenity,
+- the grouped query of the DBRepository on the link index.
+
+Usage:
+    python -m benchmarks.amenity_filter [--places 100000]
+"""
+
+import argparse
+from datetime import datetime
+import random
+import time
+from typing import Callable
+
+import sqlalchemy as sa
+
+from src import create_app, db
+from src.config import TestingConfig
+from src.persistence.db import DBRepository
+from src.persistence.table import Table
+
+AMENITIES = 40
+
+# Amenities of every search, the first ones are the most common
+SEARCHES = ((0,), (0, 1), (0, 1, 2, 3), (5, 20, 30), (0, 39))
+
+
+def timed(function: Callable[[], object]) -> float:
+    """Returns the milliseconds a call takes on average"""
+    runs = 0
+    start = time.perf_counter()
+
+    while True:
+        function()
+        runs += 1
+        elapsed = time.perf_counter() - start
+
+        if elapsed > 0.5:
+            return elapsed / runs * 1000
+
+
+def main() -> None:
+    """Links random amenities to the places and prints a table"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--places", type=int, default=100_000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    now = datetime.now()
+    # Common amenities are much more likely than the rest
+    weights = [1 / (rank + 1) for rank in range(AMENITIES)]
+    links = [
+        {
+            "id": f"link-{place}-{amenity}",
+            "place_id": f"place-{place}",
+            "amenity_id": f"amenity-{amenity}",
+            "created_at": now,
+            "updated_at": now,
+        }
+        for place in range(args.places)
+        for amenity in set(
+            rng.choices(range(AMENITIES), weights, k=rng.randrange(1, 12))
+        )
+    ]
+
+    app = create_app(TestingConfig)
+
+    from src.models.amenity import PlaceAmenity
+    from src.models.place import Place
+
+    table = Table(
+        PlaceAmenity.__indexes__ + ["amenity_id"],
+        links,
+        bitmap=PlaceAmenity.__bitmap__,
+    )
+
+    def intersect(amenities: list[str]) -> set:
+        """Intersects the places of each amenity"""
+        return set.intersection(
+            *(
+                {link["place_id"] for link in table.find(amenity_id=amenity)}
+                for amenity in amenities
+            )
+        )
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        db.session.execute(
+            sa.insert(Place),
+            [
+                {
+                    "id": f"place-{place}",
+                    "name": f"Place {place}",
+                    "description": "",
+                    "address": "",
+                    "latitude": 0.0,
+                    "longitude": 0.0,
+                    "host_id": "host",
+                    "city_id": "city",
+                    "price_per_night": 0,
+                    "number_of_rooms": 0,
+                    "number_of_bathrooms": 0,
+                    "max_guests": 0,
+                    "created_at": now,
+                    "updated_at": now,
+                }
+                for place in range(args.places)
+            ],
+        )
+        db.session.execute(sa.insert(PlaceAmenity), links)
+        db.session.commit()
+        repo = DBRepository(
+            models={"Place": Place, "PlaceAmenity": PlaceAmenity}, data={}
+        )
+
+        print(f"{args.places} places, {len(links)} links")
+        print(f"{'amenities':>16} {'found':>6} {'intersect (ms)':>15} "
+              f"{'bitmap (ms)':>12} {'db page (ms)':>13}")
+
+        for search in SEARCHES:
+            amenities = [f"amenity-{amenity}" for amenity in search]
+            filters = {"amenities__all": amenities}
+            found = table.linked_to_all(amenities)
+
+            assert found == intersect(amenities)
+
+            intersect_ms = timed(lambda: intersect(amenities))
+            bitmap_ms = timed(lambda: table.linked_to_all(amenities))
+            db_ms = timed(lambda: repo.get_page("Place", filters, limit=20))
+
+            print(f"{','.join(map(str, search)):>16} {len(found):>6} "
+                  f"{intersect_ms:>15.2f} {bitmap_ms:>12.2f} {db_ms:>13.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Measures the name index behind `GET /autocomplete` on generated names:
+
+- the time to build it,
+- the latency of completing prefixes of every length against checking
+  every name,
+- the cost of indexing and removing a written name.
+
+Usage:
+    python -m benchmarks.autocomplete [--names 1000000]
+"""
+
+import argparse
+import random
+import time
+from typing import Callable
+
+from src.autocomplete import NameIndex
+from src.search import normalize
+
+SYLLABLES = (
+    "mon te vi de o sa pa lo ri ca na ma ta ba sol mar san jo se lu "
+    "pe dro que bec zú ri ch ã o é à"
+).split()
+
+PREFIXES = ("m", "mo", "mon", "mont", "monte", "san jo", "zuri", "que bec")
+
+
+def name(rng: random.Random) -> str:
+    """Returns a random name of one to three words"""
+    return " ".join(
+        "".join(rng.choices(SYLLABLES, k=rng.randrange(2, 5))).capitalize()
+        for _ in range(rng.randrange(1, 4))
+    )
+
+
+def timed(function: Callable[[], object]) -> float:
+    """Returns the microseconds a call takes on average"""
+    runs = 0
+    start = time.perf_counter()
+
+    while True:
+        function()
+        runs += 1
+        elapsed = time.perf_counter() - start
+
+        if elapsed > 0.5:
+            return elapsed / runs * 1_000_000
+
+
+def main() -> None:
+    """Builds the index and prints the timings"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--names", type=int, default=1_000_000)
+    parser.add_argument("--limit", type=int, default=10)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    names = [(str(i), name(rng)) for i in range(args.names)]
+
+    start = time.perf_counter()
+    index = NameIndex()
+    index.load(names)
+    build_s = time.perf_counter() - start
+    print(f"{args.names} names: build {build_s:.2f}s")
+
+    folded = [(key, normalize(value)) for key, value in names]
+    print(f"{'prefix':>10} {'matches':>8} {'scan (us)':>11} "
+          f"{'index (us)':>11}")
+
+    for prefix in PREFIXES:
+        matches = sum(value.startswith(prefix) for _, value in folded)
+
+        def scan() -> list:
+            """Checks every name"""
+            return [
+                key for key, value in folded if value.startswith(prefix)
+            ][: args.limit]
+
+        scan_us = timed(scan)
+        index_us = timed(lambda: index.complete(prefix, args.limit))
+
+        print(f"{prefix:>10} {matches:>8} {scan_us:>11.0f} {index_us:>11.1f}")
+
+    keys = iter(range(args.names, args.names * 2))
+    add_us = timed(lambda: index.add(str(next(keys)), name(rng)))
+    remove_us = timed(lambda: index.remove(rng.choice(names)[0]))
+    print(f"indexing a written name: {add_us:.1f}us, "
+          f"removing one: {remove_us:.1f}us")
+
+
+if __name__ == "__main__":
+    main()
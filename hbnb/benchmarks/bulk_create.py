@@ -0,0 +1,90 @@
+"""
+Compares creating places with one `POST /places` each against a single
+`POST /places/bulk` with all of them.
+
+Usage:
+    python -m benchmarks.bulk_create [--sizes 100 1000] [--repository db]
+"""
+
+import argparse
+import time
+import uuid
+
+from flask_jwt_extended import create_access_token
+
+from src import create_app, repo
+from src.config import TestingConfig
+
+
+def places(amount: int, host_id: str, city_id: str) -> list[dict]:
+    """Returns the bodies of new places"""
+    return [
+        {
+            "name": f"Place {i}",
+            "address": f"{i} Benchmark Street",
+            "latitude": 0.0,
+            "longitude": 0.0,
+            "host_id": host_id,
+            "city_id": city_id,
+            "price_per_night": 100,
+            "number_of_rooms": 1,
+            "number_of_bathrooms": 1,
+            "max_guests": 2,
+        }
+        for i in range(amount)
+    ]
+
+
+def main() -> None:
+    """Runs the benchmark for every size and prints a table"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", nargs="+", type=int, default=[100, 1000])
+    parser.add_argument("--repository", default="db")
+    args = parser.parse_args()
+
+    class BenchmarkConfig(TestingConfig):
+        """Uses the repository given in the arguments"""
+
+        REPOSITORY = args.repository
+
+    app = create_app(BenchmarkConfig)
+    client = app.test_client()
+
+    from src.models.city import City
+    from src.models.user import User
+
+    with app.app_context():
+        host = User(
+            email=f"host-{uuid.uuid4()}@example.com",
+            first_name="Bench",
+            last_name="Host",
+            password="password",
+            is_admin=True,
+        )
+        city = City(name="Benchmark City", country_code="UY")
+        repo.save(host)
+        repo.save(city)
+        headers = {"Authorization": f"Bearer {create_access_token(host)}"}
+
+    print(f"{'places':>8} {'single (s)':>11} {'bulk (s)':>9} {'speedup':>8}")
+
+    for size in args.sizes:
+        bodies = places(size, host.id, city.id)
+
+        start = time.perf_counter()
+        for body in bodies:
+            response = client.post("/places", json=body, headers=headers)
+            assert response.status_code == 201
+        single = time.perf_counter() - start
+
+        start = time.perf_counter()
+        response = client.post("/places/bulk", json=bodies, headers=headers)
+        bulk = time.perf_counter() - start
+        assert response.get_json()["created"] == size
+
+        print(f"{size:>8} {single:>11.2f} {bulk:>9.2f} "
+              f"{single / bulk:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
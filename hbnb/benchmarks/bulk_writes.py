@@ -0,0 +1,142 @@
+"""
+Compares saving objects one by one with the bulk operations
+(save_many, update_many and delete_many) of every repository.
+
+Saving one by one rewrites the file (or commits) once per object, so it
+is only measured up to --max-single objects.
+
+Usage:
+    python -m benchmarks.bulk_writes [--sizes 10000 100000]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from typing import Callable
+
+from src import create_app, db, get_models
+from src.config import TestingConfig
+from src.persistence.db import DBRepository
+from src.persistence.file import FileRepository
+from src.persistence.memory import MemoryRepository
+from src.persistence.pickled import PickleRepository
+from src.persistence.repository import Repository
+from src.persistence.snapshot import SnapshotRepository
+
+
+def amenities(amount: int, prefix: str) -> list:
+    """Returns new amenities with unique names"""
+    from src.models.amenity import Amenity
+
+    return [Amenity(name=f"{prefix}{i}") for i in range(amount)]
+
+
+def timed(function: Callable, *args) -> float:
+    """Returns the seconds a call took"""
+    start = time.perf_counter()
+    function(*args)
+    return time.perf_counter() - start
+
+
+def backends(tmp: str, models: dict) -> dict[str, Callable[[], Repository]]:
+    """Returns a factory of an empty repository per backend"""
+
+    files = os.path.join(tmp, "files")
+    os.makedirs(files, exist_ok=True)
+
+    def path(name: str) -> str:
+        """Returns the path of a file in an emptied directory"""
+        for filename in os.listdir(files):
+            os.remove(os.path.join(files, filename))
+        return os.path.join(files, name)
+
+    def db_repo() -> DBRepository:
+        """Returns a DBRepository on empty tables"""
+        db.drop_all()
+        db.create_all()
+        return DBRepository(models=models, data={})
+
+    return {
+        "memory": lambda: MemoryRepository(models=models, data={}),
+        "file": lambda: FileRepository(
+            path("data.json"), models=models, data={}
+        ),
+        "journal": lambda: FileRepository(
+            path("data.json"),
+            models=models,
+            data={},
+            config={"FILE_STORAGE_JOURNAL": True},
+        ),
+        "pickle": lambda: PickleRepository(
+            path("data.pkl"), models=models, data={}
+        ),
+        "snapshot": lambda: SnapshotRepository(
+            path("data.snapshot.bin"), models=models, data={}
+        ),
+        "db": db_repo,
+    }
+
+
+def measure(new_repo: Callable[[], Repository], size: int, single: bool):
+    """Returns the seconds each operation took for `size` objects"""
+    results = {}
+
+    if single:
+        repo, objs = new_repo(), amenities(size, "single")
+        results["save x1"] = timed(lambda: [repo.save(o) for o in objs])
+
+    repo, objs = new_repo(), amenities(size, "bulk")
+    results["save_many"] = timed(repo.save_many, objs)
+
+    for obj in objs:
+        obj.name = f"{obj.name}!"
+
+    results["update_many"] = timed(repo.update_many, objs)
+    results["delete_many"] = timed(repo.delete_many, objs)
+
+    return results
+
+
+def main() -> None:
+    """Runs the benchmark for every backend and size"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--sizes", nargs="+", type=int, default=[10_000, 100_000]
+    )
+    parser.add_argument("--max-single", type=int, default=2_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+
+        class BenchmarkConfig(TestingConfig):
+            """Stores the database in the temporary directory"""
+
+            REPOSITORY = "db"
+            SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp}/benchmark.db"
+
+        app = create_app(BenchmarkConfig)
+        models = {model.__name__: model for model in get_models()}
+        columns = ["save x1", "save_many", "update_many", "delete_many"]
+
+        print(f"{'backend':>9} {'objects':>8}", end="")
+        print("".join(f"{column + ' (s)':>16}" for column in columns))
+
+        with app.app_context():
+            for name, new_repo in backends(tmp, models).items():
+                for size in args.sizes:
+                    results = measure(
+                        new_repo, size, size <= args.max_single
+                    )
+                    print(f"{name:>9} {size:>8}", end="")
+                    print(
+                        "".join(
+                            f"{results[c]:>16.3f}" if c in results
+                            else f"{'-':>16}"
+                            for c in columns
+                        )
+                    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Measures how long the FileRepository takes to reload a large JSON file
+and how much memory it holds afterwards, with lazy hydration and after
+every object has been hydrated (which is what reload used to do), and
+compares it with the SnapshotRepository loading the same data.
+
+Usage:
+    python -m benchmarks.file_startup [--objects 500000]
+"""
+
+import argparse
+from datetime import datetime
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+from uuid import uuid4
+
+from src import get_models
+from src.persistence.file import FileRepository
+from src.persistence.snapshot import SnapshotRepository
+
+
+def write_data(filename: str, amount: int) -> None:
+    """Writes a data.json file with the given amount of reviews"""
+    now = datetime.now().isoformat()
+    reviews = [
+        {
+            "id": str(uuid4()),
+            "place_id": str(uuid4()),
+            "user_id": str(uuid4()),
+            "comment": f"Review number {i}",
+            "rating": i % 5,
+            "created_at": now,
+            "updated_at": now,
+        }
+        for i in range(amount)
+    ]
+
+    with open(filename, "w") as file:
+        json.dump({"Review": reviews}, file)
+
+
+def write_snapshot(json_filename: str, filename: str, models: dict):
+    """Writes the data of the JSON file to a snapshot"""
+    repo = FileRepository(json_filename, models=models, data={})
+    snapshot = SnapshotRepository(filename, models=models, data={})
+
+    snapshot._write_file(
+        {
+            "Review": [
+                snapshot._record("Review", obj)
+                for obj in repo.get_all("Review")
+            ]
+        }
+    )
+
+
+def reload(
+    repository: type, filename: str, models: dict, hydrate: bool
+) -> FileRepository:
+    """Reloads the file, hydrating every object if asked to"""
+    repo = repository(filename, models=models, data={})
+
+    if hydrate:
+        repo.get_all("Review")
+
+    return repo
+
+
+def measure(*args) -> tuple:
+    """
+    Returns the seconds and the bytes a reload took, the memory is
+    traced in a second run because tracing slows the reload down
+    """
+    start = time.perf_counter()
+    reload(*args)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    repo = reload(*args)  # noqa: F841
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return elapsed, memory
+
+
+def main() -> None:
+    """Runs the benchmark and prints the results"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--objects", type=int, default=500_000)
+    args = parser.parse_args()
+
+    models = {model.__name__: model for model in get_models()}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        filename = os.path.join(tmp, "data.json")
+        snapshot_filename = os.path.join(tmp, "data.snapshot.bin")
+        write_data(filename, args.objects)
+        write_snapshot(filename, snapshot_filename, models)
+
+        print(f"{args.objects} reviews, "
+              f"{os.path.getsize(filename) / 2**20:.1f} MiB of JSON, "
+              f"{os.path.getsize(snapshot_filename) / 2**20:.1f} MiB "
+              "of snapshot")
+        print(f"{'mode':>10} {'reload (s)':>12} {'memory (MiB)':>14}")
+
+        for mode, repository, path, hydrate in (
+            ("lazy", FileRepository, filename, False),
+            ("hydrated", FileRepository, filename, True),
+            ("snapshot", SnapshotRepository, snapshot_filename, False),
+        ):
+            elapsed, memory = measure(repository, path, models, hydrate)
+            print(f"{mode:>10} {elapsed:>12.2f} {memory / 2**20:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Measures the primary key operations of the MemoryRepository
+(get, update and delete) for growing amounts of objects.
+
+Usage:
+    python -m benchmarks.memory_lookup [--sizes 1000 10000 ...]
+"""
+
+import argparse
+import random
+import time
+from uuid import uuid4
+
+from src import get_models
+from src.persistence.memory import MemoryRepository
+
+
+class DummyModel:
+    """Minimal model with the attributes the repository relies on"""
+
+    def __init__(self) -> None:
+        """Dummy init"""
+        self.id = str(uuid4())
+        self.updated_at = None
+
+
+def measure(repo: MemoryRepository, objects: list, ops: int) -> dict:
+    """Returns the mean latency in microseconds of each operation"""
+    sample = random.sample(objects, min(ops, len(objects)))
+    results = {}
+
+    start = time.perf_counter()
+    for obj in sample:
+        repo.get("DummyModel", obj.id)
+    results["get"] = (time.perf_counter() - start) / len(sample)
+
+    start = time.perf_counter()
+    for obj in sample:
+        repo.update(obj)
+    results["update"] = (time.perf_counter() - start) / len(sample)
+
+    start = time.perf_counter()
+    for obj in sample:
+        repo.delete(obj)
+    results["delete"] = (time.perf_counter() - start) / len(sample)
+
+    return {op: seconds * 1e6 for op, seconds in results.items()}
+
+
+def main() -> None:
+    """Runs the benchmark for every size and prints a table"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--sizes",
+        nargs="+",
+        type=int,
+        default=[1_000, 10_000, 100_000, 1_000_000],
+    )
+    parser.add_argument("--ops", type=int, default=1_000)
+    args = parser.parse_args()
+
+    # The dummy country saved on reload needs every mapper configured
+    get_models()
+
+    print(f"{'objects':>10} {'get (us)':>10} {'update (us)':>12} "
+          f"{'delete (us)':>12}")
+
+    for size in args.sizes:
+        repo = MemoryRepository({"DummyModel": DummyModel}, {})
+        objects = [DummyModel() for _ in range(size)]
+
+        for obj in objects:
+            repo.save(obj)
+
+        result = measure(repo, objects, args.ops)
+
+        print(f"{size:>10} {result['get']:>10.3f} "
+              f"{result['update']:>12.3f} {result['delete']:>12.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+Measures the `near` lookups behind `GET /places/nearby` with places
+spread over a region the size of Uruguay:
+
+- the spatial index of the tables of the in-memory repositories,
+  against measuring the distance to every place,
+- the bounding box query of the DBRepository on the location index.
+
+Usage:
+    python -m benchmarks.nearby [--sizes 100000 1000000] [--radius 10]
+"""
+
+import argparse
+from datetime import datetime
+import random
+import time
+from typing import Callable
+
+import sqlalchemy as sa
+
+from src import create_app, db
+from src.config import TestingConfig
+from src.persistence.db import DBRepository
+from src.persistence.geo import haversine
+from src.persistence.table import Table
+
+# Region the places and the centers of the searches are in
+SOUTH, NORTH, WEST, EAST = -35.0, -30.0, -58.5, -53.0
+
+QUERIES = 100
+
+
+class Point:
+    """A place as the tables see it"""
+
+    __slots__ = ("id", "latitude", "longitude")
+
+    def __init__(self, id: str, latitude: float, longitude: float) -> None:
+        """Stores the location"""
+        self.id = id
+        self.latitude = latitude
+        self.longitude = longitude
+
+
+def points(amount: int, rng: random.Random) -> list[tuple[float, float]]:
+    """Returns random locations in the region"""
+    return [
+        (rng.uniform(SOUTH, NORTH), rng.uniform(WEST, EAST))
+        for _ in range(amount)
+    ]
+
+
+def per_query(function: Callable, centers: list) -> float:
+    """Returns the milliseconds a search takes on average"""
+    start = time.perf_counter()
+    for latitude, longitude in centers:
+        function(latitude, longitude)
+    return (time.perf_counter() - start) / len(centers) * 1000
+
+
+def main() -> None:
+    """Runs the benchmark for every size and prints a table"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--sizes", nargs="+", type=int, default=[100_000, 1_000_000]
+    )
+    parser.add_argument("--radius", type=float, default=10)
+    parser.add_argument("--limit", type=int, default=100)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    centers = points(QUERIES, rng)
+    app = create_app(TestingConfig)
+
+    from src.models.place import Place
+
+    print(f"{'places':>8} {'found':>6} {'scan (ms)':>10} "
+          f"{'grid (ms)':>10} {'db (ms)':>8}")
+
+    for size in args.sizes:
+        locations = points(size, rng)
+        table = Table(
+            order=("id",),
+            location=("latitude", "longitude"),
+            objects=(
+                Point(str(i), lat, lon)
+                for i, (lat, lon) in enumerate(locations)
+            ),
+        )
+
+        def scan(latitude: float, longitude: float) -> list:
+            """Measures the distance to every place"""
+            return sorted(
+                (distance, i)
+                for i, (lat, lon) in enumerate(locations)
+                if (distance := haversine(latitude, longitude, lat, lon))
+                <= args.radius
+            )[: args.limit]
+
+        def grid(latitude: float, longitude: float) -> list:
+            """Looks the places up in the spatial index"""
+            return table.near(latitude, longitude, args.radius, args.limit)
+
+        found = sum(len(grid(lat, lon)) for lat, lon in centers) / QUERIES
+        scan_ms = per_query(scan, centers[:5])
+        grid_ms = per_query(grid, centers)
+
+        with app.app_context():
+            db.drop_all()
+            db.create_all()
+            now = datetime.now()
+            db.session.execute(
+                sa.insert(Place),
+                [
+                    {
+                        "id": str(i),
+                        "name": f"Place {i}",
+                        "description": "",
+                        "address": "",
+                        "latitude": lat,
+                        "longitude": lon,
+                        "host_id": "host",
+                        "city_id": "city",
+                        "price_per_night": 0,
+                        "number_of_rooms": 0,
+                        "number_of_bathrooms": 0,
+                        "max_guests": 0,
+                        "created_at": now,
+                        "updated_at": now,
+                    }
+                    for i, (lat, lon) in enumerate(locations)
+                ],
+            )
+            db.session.commit()
+            repo = DBRepository(models={"Place": Place}, data={})
+
+            def database(latitude: float, longitude: float) -> list:
+                """Runs the bounding box query"""
+                return repo.near(
+                    "Place", latitude, longitude, args.radius, args.limit
+                )
+
+            db_ms = per_query(database, centers)
+
+        print(f"{size:>8} {found:>6.1f} {scan_ms:>10.2f} "
+              f"{grid_ms:>10.3f} {db_ms:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Measures how a burst of logins slows down the rest of the API, with the
+password pool bounded as configured and with a thread for every login
+(as if every request hashed on its own thread):
+
+- the latency of `GET /countries/UY` requests made during the burst,
+- the latency of the logins and how many were turned away with a 503.
+
+Usage:
+    python -m benchmarks.password_pool [--logins 32] [--workers 2]
+"""
+
+import argparse
+import statistics
+import threading
+import time
+
+from src import bcrypt, create_app, passwords
+from src.config import TestingConfig
+from src.models.user import User
+
+
+def burst(app, logins: int, email: str) -> dict:
+    """Runs the logins at once while requesting a country in a loop"""
+    client = app.test_client()
+    done = threading.Event()
+    latencies: list[float] = []
+    logged_in: list[float] = []
+    statuses: list[int] = []
+
+    def catalog() -> None:
+        """Requests a country until the logins are over"""
+        while not done.is_set():
+            start = time.perf_counter()
+            client.get("/countries/UY")
+            latencies.append(time.perf_counter() - start)
+
+    def login() -> None:
+        """Logs in once"""
+        start = time.perf_counter()
+        response = app.test_client().post(
+            "/auth", json={"email": email, "password": "password"}
+        )
+        statuses.append(response.status_code)
+
+        if response.status_code == 200:
+            logged_in.append(time.perf_counter() - start)
+
+    reader = threading.Thread(target=catalog)
+    reader.start()
+    threads = [threading.Thread(target=login) for _ in range(logins)]
+    for thread in threads:
+        thread.start()
+
+    for thread in threads:
+        thread.join()
+
+    done.set()
+    reader.join()
+
+    return {
+        "catalog_p50": statistics.median(latencies) * 1000,
+        "catalog_max": max(latencies) * 1000,
+        "ok": statuses.count(200),
+        "rejected": statuses.count(503),
+        "login_p50": statistics.median(logged_in),
+        "login_max": max(logged_in),
+    }
+
+
+def main() -> None:
+    """Runs the burst with both pools and prints a table"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--logins", type=int, default=32)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--queue", type=int, default=16)
+    args = parser.parse_args()
+
+    class Config(TestingConfig):
+        """Hashes with the production cost"""
+
+        BCRYPT_LOG_ROUNDS = 12
+        RESPONSE_CACHE = False
+
+    app = create_app(Config)
+
+    with app.app_context():
+        User.create(
+            {
+                "email": "bench@hbnb.io",
+                "password": "password",
+                "first_name": "Bench",
+                "last_name": "Mark",
+            }
+        )
+
+    print(f"{args.logins} logins at once")
+    print(f"{'pool':>22} {'ok':>4} {'503':>4} {'login p50/max (s)':>18} "
+          f"{'catalog p50/max (ms)':>21}")
+
+    for name, workers, queue in [
+        ("a thread per login", args.logins, 0),
+        (f"{args.workers} workers, {args.queue} queue", args.workers,
+         args.queue),
+    ]:
+        app.config["PASSWORD_POOL_WORKERS"] = workers
+        app.config["PASSWORD_POOL_MAX_QUEUE"] = queue
+        passwords.init_app(app, bcrypt)
+
+        result = burst(app, args.logins, "bench@hbnb.io")
+        logins = f"{result['login_p50']:.2f}/{result['login_max']:.2f}"
+        catalog = f"{result['catalog_p50']:.1f}/{result['catalog_max']:.0f}"
+
+        print(f"{name:>22} {result['ok']:>4} {result['rejected']:>4} "
+              f"{logins:>18} {catalog:>21}")
+
+
+if __name__ == "__main__":
+    main()
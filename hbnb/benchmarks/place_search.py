@@ -0,0 +1,125 @@
+"""
+Measures the filters of `GET /places/search` on the table of the
+in-memory repositories, which starts from its most selective index,
+against checking every place, and on SQLite with the place indexes.
+
+Usage:
+    python -m benchmarks.place_search [--places 200000]
+"""
+
+import argparse
+from datetime import datetime
+import random
+import time
+from typing import Callable
+
+import sqlalchemy as sa
+
+from src import create_app, db
+from src.config import TestingConfig
+from src.persistence import query
+from src.persistence.db import DBRepository
+from src.persistence.table import Table
+
+CITIES = 1000
+
+SEARCHES = {
+    "city": {"city_id": "city-7"},
+    "city + price": {
+        "city_id": "city-7",
+        "price_per_night__gte": 100,
+        "price_per_night__lte": 150,
+    },
+    "price": {"price_per_night__gte": 480, "price_per_night__lte": 490},
+    "guests + rooms": {"max_guests__gte": 8, "number_of_rooms__gte": 4},
+    "country (20 cities)": {
+        "city_id__in": [f"city-{i}" for i in range(0, CITIES, 50)],
+        "max_guests__gte": 6,
+    },
+}
+
+
+class Row:
+    """A place as the table sees it"""
+
+    def __init__(self, **fields) -> None:
+        """Stores the fields"""
+        self.__dict__.update(fields)
+
+
+def timed(function: Callable[[], list]) -> tuple[float, int]:
+    """Returns the milliseconds a call takes on average and its size"""
+    runs = 0
+    start = time.perf_counter()
+
+    while True:
+        result = function()
+        runs += 1
+        elapsed = time.perf_counter() - start
+
+        if elapsed > 0.5:
+            return elapsed / runs * 1000, len(result)
+
+
+def main() -> None:
+    """Runs every search and prints a table"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--places", type=int, default=200_000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    now = datetime.now()
+    rows = [
+        {
+            "id": f"place-{i}",
+            "name": f"Place {i}",
+            "description": "",
+            "address": "",
+            "latitude": 0.0,
+            "longitude": 0.0,
+            "host_id": "host",
+            "city_id": f"city-{rng.randrange(CITIES)}",
+            "price_per_night": rng.randrange(500),
+            "max_guests": rng.randrange(1, 9),
+            "number_of_rooms": rng.randrange(1, 5),
+            "number_of_bathrooms": rng.randrange(1, 4),
+            "created_at": now,
+            "updated_at": now,
+        }
+        for i in range(args.places)
+    ]
+
+    app = create_app(TestingConfig)
+
+    from src.models.place import Place
+
+    objs = [Row(**row) for row in rows]
+    table = Table(
+        Place.__indexes__, objs, order=("id",), ranges=Place.__ranges__
+    )
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        db.session.execute(sa.insert(Place), rows)
+        db.session.commit()
+        repo = DBRepository(models={"Place": Place}, data={})
+
+        print(f"{'search':>20} {'found':>6} {'scan (ms)':>10} "
+              f"{'planner (ms)':>13} {'db (ms)':>8}")
+
+        for name, filters in SEARCHES.items():
+            conditions = query.parse_filters(filters)
+
+            scan_ms, found = timed(
+                lambda: [o for o in objs if query.matches(o, conditions)]
+            )
+            planner_ms, _ = timed(lambda: list(table.select(conditions)))
+            db_ms, _ = timed(lambda: repo.get_all("Place", filters))
+
+            print(f"{name:>20} {found:>6} {scan_ms:>10.2f} "
+                  f"{planner_ms:>13.3f} {db_ms:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Measures the full-text index behind `GET /search` on generated place
+descriptions:
+
+- the time to build the index and to load a saved one,
+- the latency of ranked queries against checking the words of every
+  description,
+- the cost of reindexing a batch of written places.
+
+Usage:
+    python -m benchmarks.search [--places 100000]
+"""
+
+import argparse
+import pickle
+import random
+import time
+from typing import Callable
+
+from src.search import TextIndex, tokenize
+
+WORDS = (
+    "cozy quiet sunny spacious modern rustic charming bright private "
+    "central historic loft cabin house apartment studio villa cottage "
+    "beach lake river mountain forest garden terrace balcony pool view "
+    "downtown market station museum park harbor bridge castle vineyard "
+    "wifi kitchen parking fireplace heating breakfast pets family"
+).split()
+
+QUERIES = (
+    "beach",
+    "quiet cabin lake",
+    "modern apartment downtown wifi",
+    "castle vineyard",
+)
+
+
+def describe(rng: random.Random) -> str:
+    """Returns a random description with a long tail of rare words"""
+    words = rng.choices(WORDS, k=rng.randrange(8, 40))
+    words.append(f"street{rng.randrange(5000)}")
+
+    return " ".join(words).capitalize() + "."
+
+
+def timed(function: Callable[[], object]) -> float:
+    """Returns the milliseconds a call takes on average"""
+    runs = 0
+    start = time.perf_counter()
+
+    while True:
+        function()
+        runs += 1
+        elapsed = time.perf_counter() - start
+
+        if elapsed > 0.5:
+            return elapsed / runs * 1000
+
+
+def main() -> None:
+    """Builds the index and prints the timings"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--places", type=int, default=100_000)
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    texts = {f"place-{i}": describe(rng) for i in range(args.places)}
+
+    start = time.perf_counter()
+    index = TextIndex()
+    for key, text in texts.items():
+        index.add(key, tokenize(text))
+    build_s = time.perf_counter() - start
+
+    saved = pickle.dumps(index, protocol=pickle.HIGHEST_PROTOCOL)
+    start = time.perf_counter()
+    pickle.loads(saved)
+    load_s = time.perf_counter() - start
+
+    print(f"{args.places} places: build {build_s:.2f}s, "
+          f"load saved index {load_s:.2f}s ({len(saved) / 2**20:.1f}MB)")
+
+    print(f"{'query':>32} {'scan (ms)':>10} {'index (ms)':>11}")
+
+    for query in QUERIES:
+        terms = set(tokenize(query))
+
+        def scan() -> list:
+            """Checks the words of every description"""
+            return [
+                key
+                for key, text in texts.items()
+                if terms & set(tokenize(text))
+            ]
+
+        scan_ms = timed(scan)
+        index_ms = timed(lambda: index.search(list(terms), args.limit))
+
+        print(f"{query:>32} {scan_ms:>10.1f} {index_ms:>11.2f}")
+
+    batch = rng.sample(list(texts), 500)
+    reindex_ms = timed(
+        lambda: [index.add(key, tokenize(describe(rng))) for key in batch]
+    )
+    print(f"reindexing {len(batch)} written places: {reindex_ms:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Compares the throughput of Place.to_dict with the serializers generated
+for sparse fieldsets (`?fields=`), for every field and for a few.
+
+Usage:
+    python -m benchmarks.serializers [--places 10000] [--rounds 5]
+"""
+
+import argparse
+import time
+from typing import Callable
+
+from src import get_models
+from utils.serializers import model_fields, serializer
+
+
+def places(amount: int) -> list:
+    """Returns places sharing a host, like a page of a listing"""
+    from src.models.place import Place
+    from src.models.user import User
+
+    host = User(
+        email="host@example.com",
+        first_name="Host",
+        last_name="Example",
+        password="password",
+    )
+    objs = []
+
+    for i in range(amount):
+        place = Place(
+            {
+                "name": f"Place {i}",
+                "description": "A place",
+                "address": f"Street {i}",
+                "city_id": "city",
+                "host_id": host.id,
+                "latitude": i / amount,
+                "longitude": -i / amount,
+                "price_per_night": 100,
+                "number_of_rooms": 2,
+                "number_of_bathrooms": 1,
+                "max_guests": 4,
+            }
+        )
+        place.host = host
+        objs.append(place)
+
+    return objs
+
+
+def throughput(serialize: Callable, objs: list, rounds: int) -> float:
+    """Returns the objects serialized per second, best of the rounds"""
+    best = float("inf")
+
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for obj in objs:
+            serialize(obj)
+        best = min(best, time.perf_counter() - start)
+
+    return len(objs) / best
+
+
+def main() -> None:
+    """Runs the benchmark and prints a table"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--places", type=int, default=10_000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    get_models()
+    from src.models.place import Place
+
+    objs = places(args.places)
+    columns = tuple(
+        field
+        for field, kind in model_fields(Place).items()
+        if kind != "object"
+    )
+    cases = {
+        "to_dict": lambda obj: obj.to_dict(),
+        "fields=<columns>+host": serializer(Place, columns + ("host",)),
+        "fields=<columns>": serializer(Place, columns),
+        "fields=id,name": serializer(Place, ("id", "name")),
+    }
+    results = {
+        name: throughput(serialize, objs, args.rounds)
+        for name, serialize in cases.items()
+    }
+
+    print(f"{'serializer':>24} {'objects/s':>12} {'speedup':>8}")
+
+    for name, result in results.items():
+        speedup = result / results["to_dict"]
+        print(f"{name:>24} {result:>12,.0f} {speedup:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
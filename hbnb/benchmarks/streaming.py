@@ -0,0 +1,108 @@
+"""
+Compares the memory used to send every review as one JSON list with
+the streamed responses of `GET /reviews?stream=true` and NDJSON.
+
+The reviews are kept by the MemoryRepository, the peak is the memory
+allocated on top of them while the response is built and read, as
+measured by tracemalloc.
+
+Usage:
+    python -m benchmarks.streaming [--sizes 10000 50000 200000]
+"""
+
+import argparse
+import json
+import time
+import tracemalloc
+from typing import Callable
+
+from src import create_app, repo
+from src.config import TestingConfig
+
+
+class BenchmarkConfig(TestingConfig):
+    """Keeps the reviews in memory"""
+
+    REPOSITORY = "memory"
+
+
+def measure(function: Callable[[], int]) -> tuple[float, float, int]:
+    """Returns the peak MiB allocated, the seconds and the bytes sent"""
+    tracemalloc.reset_peak()
+    before = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    size = function()
+    seconds = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1] - before
+
+    return peak / 2**20, seconds, size
+
+
+def main() -> None:
+    """Runs the benchmark for every size and prints a table"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--sizes", nargs="+", type=int, default=[10_000, 50_000, 200_000]
+    )
+    args = parser.parse_args()
+
+    app = create_app(BenchmarkConfig)
+    client = app.test_client()
+
+    from src.models.review import Review
+
+    def whole_list() -> int:
+        """Builds the list of every review like a page would"""
+        with app.test_request_context():
+            body = json.dumps([r.to_dict() for r in Review.get_all()])
+        return len(body)
+
+    def streamed(url: str, headers: dict) -> Callable[[], int]:
+        """Reads a streamed response chunk by chunk"""
+
+        def read() -> int:
+            """Returns the amount of bytes of the response"""
+            response = client.get(url, headers=headers, buffered=False)
+            size = sum(len(chunk) for chunk in response.iter_encoded())
+            response.close()
+            return size
+
+        return read
+
+    cases = {
+        "list": whole_list,
+        "stream json": streamed("/reviews?stream=true", {}),
+        "stream ndjson": streamed(
+            "/reviews", {"Accept": "application/x-ndjson"}
+        ),
+    }
+
+    print(f"{'mode':>14} {'reviews':>8} {'body (MiB)':>11} "
+          f"{'peak (MiB)':>11} {'time (s)':>9}")
+
+    tracemalloc.start()
+    count = 0
+
+    for size in args.sizes:
+        with app.app_context():
+            repo.save_many(
+                Review(
+                    place_id=f"place-{i % 100}",
+                    user_id=f"user-{i % 1000}",
+                    comment=f"Review number {i}",
+                    rating=i % 5 + 1,
+                )
+                for i in range(size - count)
+            )
+        count = size
+
+        for name, function in cases.items():
+            peak, seconds, body = measure(function)
+            print(f"{name:>14} {size:>8} {body / 2**20:>11.1f} "
+                  f"{peak:>11.1f} {seconds:>9.2f}")
+
+    tracemalloc.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,7 @@
 """ Entry point for the application. """
 
 from flask.cli import FlaskGroup
-from src import create_app, db
+from src import create_app, db, repo
 
 
 cli = FlaskGroup(create_app=create_app)
@@ -15,5 +15,46 @@ def create_db():
     print("Database created")
 
 
+@cli.command("compact")
+def compact():
+    """Fold the journal of the file repository into its JSON file."""
+    if not hasattr(repo.repo, "compact"):
+        print(f"{repo.repo.__class__.__name__} has nothing to compact")
+        return
+
+    repo.repo.compact()
+    print("Repository compacted")
+
+
+@cli.command("upgrade_db")
+def upgrade_db():
+    """Add the columns and indexes missing from an existing database."""
+    if not hasattr(repo.repo, "upgrade"):
+        print(f"{repo.repo.__class__.__name__} has nothing to upgrade")
+        return
+
+    added = repo.repo.upgrade()
+
+    for column in added:
+        print(f"Added {column}")
+
+    # The new columns (like the ratings of the places) start empty
+    if added:
+        rebuild_aggregates.callback()
+
+    print("Database upgraded")
+
+
+@cli.command("rebuild_aggregates")
+def rebuild_aggregates():
+    """Compute the aggregates of the models (like ratings) again."""
+    changed = repo.repo.rebuild_aggregates()
+
+    if changed:
+        repo.update_many(changed)
+
+    print(f"{len(changed)} objects updated")
+
+
 if __name__ == "__main__":
     cli()
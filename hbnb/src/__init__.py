@@ -7,14 +7,22 @@ from flask_sqlalchemy import SQLAlchemy
 from flask_bcrypt import Bcrypt
 from flask_jwt_extended import JWTManager
 
+from src.autocomplete import Autocomplete
+from src.cache import ResponseCache
+from src.passwords import PasswordPool
 from src.persistence.repository import RepositoryManager
+from src.search import SearchIndex
 from utils.constants import Repos
 from utils.populate import populate_db
 
 cors = CORS()
 repo = RepositoryManager()
+cache = ResponseCache()
+search = SearchIndex()
+autocomplete = Autocomplete()
 db = SQLAlchemy()
 bcrypt = Bcrypt()
+passwords = PasswordPool()
 jwt = JWTManager()
 
 
@@ -50,11 +58,11 @@ def get_models() -> list:
     from src.models.user import User
     from src.models.country import Country
     from src.models.city import City
-    from src.models.amenity import Amenity
+    from src.models.amenity import Amenity, PlaceAmenity
     from src.models.place import Place
     from src.models.review import Review
 
-    return [User, Country, City, Amenity, Place, Review]
+    return [User, Country, City, Amenity, Place, Review, PlaceAmenity]
 
 
 def register_extensions(app: Flask, models: Optional[list] = None) -> None:
@@ -62,7 +70,11 @@ def register_extensions(app: Flask, models: Optional[list] = None) -> None:
     db.init_app(app)
     cors.init_app(app, resources={r"/*": {"origins": "*"}})
     repo.init_app(app, models)
+    cache.init_app(app, repo)
+    search.init_app(app, repo)
+    autocomplete.init_app(app, repo)
     bcrypt.init_app(app)
+    passwords.init_app(app, bcrypt)
     jwt.init_app(app)
     # Further extensions can be added here
 
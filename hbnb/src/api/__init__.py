@@ -12,6 +12,10 @@ from src.api.amenities import api as amenities_ns
 from src.api.places import api as places_ns
 from src.api.reviews import api as reviews_ns
 from src.api.auth import api as auth_ns
+from src.api.cache import api as cache_ns
+from src.api.batch import api as batch_ns
+from src.api.search import api as search_ns
+from src.api.autocomplete import api as autocomplete_ns
 
 api_bp = Blueprint("api", __name__)
 
@@ -45,3 +49,7 @@ api.add_namespace(amenities_ns, path="/amenities")
 api.add_namespace(places_ns, path="/places")
 api.add_namespace(reviews_ns, path="/")
 api.add_namespace(auth_ns, path="/auth")
+api.add_namespace(cache_ns, path="/cache")
+api.add_namespace(batch_ns, path="/batch")
+api.add_namespace(search_ns, path="/search")
+api.add_namespace(autocomplete_ns, path="/autocomplete")
@@ -3,9 +3,14 @@ This module contains the routes for the amenities blueprint
 """
 
 from flask_restx import Namespace, Resource, fields
+from src import cache
 from src.api.base import base_fields
+from utils.bulk import validate_items
+from utils.pagination import PAGINATION_PARAMS
+from utils.serializers import FIELDS_PARAMS
 from src.controllers.amenities import (
     create_amenity,
+    create_amenities,
     delete_amenity,
     get_amenity_by_id,
     get_amenities,
@@ -21,6 +26,15 @@ amenity_input_fields = api.model(
     },
 )
 
+amenity_bulk_input_fields = api.model(
+    name="AmenityBulkInput",
+    model={
+        "name": fields.String(
+            description="Name of the amenity", min_length=2, required=True
+        ),
+    },
+)
+
 amenity_fields = api.model(
     name="Amenity", model=base_fields.clone("Amenity", amenity_input_fields)
 )
@@ -29,7 +43,9 @@ amenity_fields = api.model(
 class AmenityList(Resource):
     """Handles HTTP requests to URL: /amenities"""
 
+    @api.doc(params=PAGINATION_PARAMS | FIELDS_PARAMS)
     @api.response(200, "Amenities found", [amenity_fields])
+    @cache.cached(tags=["Amenity"])
     def get(self):
         """Get all amenities"""
         return get_amenities()
@@ -42,12 +58,26 @@ class AmenityList(Resource):
         return create_amenity(api.payload)
 
 
+class AmenityBulk(Resource):
+    """Handles HTTP requests to URL: /amenities/bulk"""
+
+    @api.expect([amenity_bulk_input_fields], validate=False)
+    @validate_items(amenity_bulk_input_fields)
+    @api.response(200, "Result of every amenity")
+    @api.response(400, "Bad request")
+    def post(self):
+        """Create many amenities at once"""
+        return create_amenities(api.payload)
+
+
 @api.doc(params={"amenity_id": "The ID of the amenity"})
 @api.response(404, "Amenity not found")
 class Amenity(Resource):
     """Handles HTTP requests to URL: /amenities/<amenity_id>"""
 
+    @api.doc(params=FIELDS_PARAMS)
     @api.response(200, "Amenity found", amenity_fields)
+    @cache.cached(tags=lambda amenity_id: [("Amenity", amenity_id)])
     def get(self, amenity_id: str):
         """Get an amenity by ID"""
         return get_amenity_by_id(amenity_id)
@@ -65,4 +95,5 @@ class Amenity(Resource):
 
 
 api.add_resource(AmenityList, "/")
+api.add_resource(AmenityBulk, "/bulk")
 api.add_resource(Amenity, "/<amenity_id>")
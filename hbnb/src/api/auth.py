@@ -2,7 +2,7 @@
 
 from flask_restx import Namespace, Resource, fields
 
-from src.controllers.auth import login, verify
+from src.controllers.auth import get_password_pool_stats, login, verify
 
 
 api = Namespace("Auth", description="Authentication related operations")
@@ -22,6 +22,7 @@ class Login(Resource):
     @api.expect(login_fields)
     @api.response(200, "Login successful")
     @api.response(401, "Unauthorized")
+    @api.response(503, "Too many logins at once, retry later")
     def post(self):
         """Login a user"""
         return login(api.payload)
@@ -33,4 +34,15 @@ class Login(Resource):
         return verify()
 
 
+class PasswordPoolStats(Resource):
+    """Handles HTTP requests to URL: /auth/metrics"""
+
+    @api.response(200, "Load of the pool and timings in milliseconds")
+    @api.response(403, "Forbidden")
+    def get(self):
+        """Get the load and the latency of the password hashing pool"""
+        return get_password_pool_stats()
+
+
 api.add_resource(Login, "/")
+api.add_resource(PasswordPoolStats, "/metrics")
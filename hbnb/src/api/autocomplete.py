@@ -0,0 +1,39 @@
+"""
+This module contains the route of the autocompletion of names
+"""
+
+from flask_restx import Namespace, Resource, fields
+from src.controllers.autocomplete import AUTOCOMPLETE_TYPES, autocomplete
+
+api = Namespace("Autocomplete", description="Name autocompletion")
+
+name_fields = api.model(
+    "Name",
+    {
+        "id": fields.String(description="ID of the object"),
+        "name": fields.String(description="Name of the object"),
+    },
+)
+
+
+class Autocomplete(Resource):
+    """Handles HTTP requests to URL: /autocomplete"""
+
+    @api.doc(
+        params={
+            "q": "Start of the names",
+            "type": f"Names to complete: {', '.join(AUTOCOMPLETE_TYPES)}, "
+            "place by default",
+            "limit": "Most names to return, 10 by default",
+            "exact": "Match the case and the accents of q, false by "
+            "default",
+        }
+    )
+    @api.response(200, "Names found, in alphabetical order", [name_fields])
+    @api.response(400, "Invalid query")
+    def get(self):
+        """Get the place, city or amenity names starting with a text"""
+        return autocomplete()
+
+
+api.add_resource(Autocomplete, "/")
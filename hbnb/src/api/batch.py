@@ -0,0 +1,63 @@
+"""
+This module contains the route to run many operations in one request
+"""
+
+from flask_restx import Namespace, Resource, fields
+from src.controllers.batch import run_batch
+
+api = Namespace("Batch", description="Many operations in one request")
+
+operation_fields = api.model(
+    name="Operation",
+    model={
+        "method": fields.String(
+            description="HTTP method", required=True, example="POST"
+        ),
+        "path": fields.String(
+            description="Path of the route, '${0.id}' is replaced by the "
+            "id in the body of the first result",
+            required=True,
+            example="/places",
+        ),
+        "body": fields.Raw(description="JSON body of the operation"),
+    },
+)
+
+batch_fields = api.model(
+    name="Batch",
+    model={
+        "operations": fields.List(
+            fields.Nested(operation_fields), required=True, min_items=1
+        ),
+        "atomic": fields.Boolean(
+            description="Commit every operation or none of them",
+            default=False,
+        ),
+    },
+)
+
+result_fields = api.model(
+    name="BatchResult",
+    model={
+        "committed": fields.Boolean(
+            description="Whether the writes were committed"
+        ),
+        "results": fields.List(
+            fields.Raw(description="Status and body of an operation")
+        ),
+    },
+)
+
+
+class Batch(Resource):
+    """Handles HTTP requests to URL: /batch"""
+
+    @api.expect(batch_fields)
+    @api.response(200, "Operations run", result_fields)
+    @api.response(400, "Bad request")
+    def post(self):
+        """Run many operations in order, optionally in one transaction"""
+        return run_batch(api.payload)
+
+
+api.add_resource(Batch, "/")
@@ -0,0 +1,39 @@
+"""
+This module contains the routes for the response cache
+"""
+
+from flask_restx import Namespace, Resource, fields
+from src.controllers.cache import clear_cache, get_cache_stats
+
+api = Namespace("Cache", description="Response cache operations")
+
+cache_fields = api.model(
+    name="CacheStats",
+    model={
+        "enabled": fields.Boolean(description="Whether the cache is on"),
+        "hits": fields.Integer(description="Responses served from cache"),
+        "misses": fields.Integer(description="Responses built and cached"),
+        "evictions": fields.Integer(description="Entries dropped by size"),
+        "entries": fields.Integer(description="Responses in the cache"),
+        "bytes": fields.Integer(description="Size of the cached bodies"),
+    },
+)
+
+
+class Cache(Resource):
+    """Handles HTTP requests to URL: /cache"""
+
+    @api.response(200, "Cache statistics", cache_fields)
+    @api.response(403, "Forbidden")
+    def get(self):
+        """Get the hit and miss counters of the response cache"""
+        return get_cache_stats()
+
+    @api.response(204, "Cache cleared")
+    @api.response(403, "Forbidden")
+    def delete(self):
+        """Drop every cached response"""
+        return clear_cache()
+
+
+api.add_resource(Cache, "/")
@@ -3,9 +3,14 @@ This module contains the routes for the cities blueprint
 """
 
 from flask_restx import Namespace, Resource, fields
+from src import cache
 from src.api.base import base_fields
+from utils.bulk import validate_items
+from utils.pagination import PAGINATION_PARAMS
+from utils.serializers import FIELDS_PARAMS
 from src.controllers.cities import (
     create_city,
+    create_cities,
     delete_city,
     get_city_by_id,
     get_cities,
@@ -22,6 +27,18 @@ city_input_fields = api.model(
     },
 )
 
+city_bulk_input_fields = api.model(
+    name="CityBulkInput",
+    model={
+        "name": fields.String(
+            description="Name of the city", min_length=2, required=True
+        ),
+        "country_code": fields.String(
+            description="Country code of the city", required=True
+        ),
+    },
+)
+
 city_fields = api.model(
     name="City", model=base_fields.clone("City", city_input_fields)
 )
@@ -30,7 +47,9 @@ city_fields = api.model(
 class CityList(Resource):
     """Handles HTTP requests to URL: /cities"""
 
+    @api.doc(params=PAGINATION_PARAMS | FIELDS_PARAMS)
     @api.response(200, "Cities found", [city_fields])
+    @cache.cached(tags=["City"])
     def get(self):
         """Get all cities"""
         return get_cities()
@@ -43,12 +62,26 @@ class CityList(Resource):
         return create_city(api.payload)
 
 
+class CityBulk(Resource):
+    """Handles HTTP requests to URL: /cities/bulk"""
+
+    @api.expect([city_bulk_input_fields], validate=False)
+    @validate_items(city_bulk_input_fields)
+    @api.response(200, "Result of every city")
+    @api.response(400, "Bad request")
+    def post(self):
+        """Create many cities at once"""
+        return create_cities(api.payload)
+
+
 @api.doc(params={"city_id": "The ID of the city"})
 @api.response(404, "City not found")
 class City(Resource):
     """Handles HTTP requests to URL: /cities/<city_id>"""
 
+    @api.doc(params=FIELDS_PARAMS)
     @api.response(200, "City found", city_fields)
+    @cache.cached(tags=lambda city_id: [("City", city_id)])
     def get(self, city_id: str):
         """Get a city by ID"""
         return get_city_by_id(city_id)
@@ -66,4 +99,5 @@ class City(Resource):
 
 
 api.add_resource(CityList, "/")
+api.add_resource(CityBulk, "/bulk")
 api.add_resource(City, "/<city_id>")
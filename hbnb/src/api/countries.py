@@ -3,6 +3,8 @@ This module contains the routes for the countries endpoint
 """
 
 from flask_restx import Namespace, Resource, fields
+from src import cache
+from utils.serializers import FIELDS_PARAMS
 from src.controllers.countries import (
     get_countries,
     get_country_by_code,
@@ -23,7 +25,9 @@ country_fields = api.model(
 class CountryList(Resource):
     """Handles HTTP requests to URL: /countries"""
 
+    @api.doc(params=FIELDS_PARAMS)
     @api.response(200, "Countries found", [country_fields])
+    @cache.cached(tags=["Country"])
     def get(self):
         """Get all countries"""
         return get_countries()
@@ -32,8 +36,10 @@ class CountryList(Resource):
 class Country(Resource):
     """Handles HTTP requests to URL: /countries/<code>"""
 
+    @api.doc(params=FIELDS_PARAMS)
     @api.response(200, "Country found", country_fields)
     @api.response(404, "Country not found")
+    @cache.cached(tags=lambda code: [("Country", code)])
     def get(self, code: str):
         """Get a country by code"""
         return get_country_by_code(code)
@@ -42,8 +48,10 @@ class Country(Resource):
 class CountryCities(Resource):
     """Handles HTTP requests to URL: /countries/<code>/cities"""
 
+    @api.doc(params=FIELDS_PARAMS)
     @api.response(200, "Cities found", [country_fields])
     @api.response(404, "Country not found")
+    @cache.cached(tags=lambda code: ["City", ("Country", code)])
     def get(self, code: str):
         """Get all cities from a country"""
         return get_country_cities(code)
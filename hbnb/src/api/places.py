@@ -4,11 +4,17 @@ This module contains the routes for the places blueprint
 
 from flask_restx import Namespace, Resource, fields
 from src.api.base import base_fields
+from utils.bulk import validate_items
+from utils.pagination import PAGINATION_PARAMS
+from utils.serializers import FIELDS_PARAMS
 from src.controllers.places import (
     create_place,
+    create_places,
     delete_place,
+    get_nearby_places,
     get_place_by_id,
     get_places,
+    search_places,
     update_place,
 )
 
@@ -44,13 +50,36 @@ places_input_fields = api.model(
 )
 
 place_fields = api.model(
-    name="Place", model=base_fields.clone("Place", places_input_fields)
+    name="Place",
+    model=base_fields.clone(
+        "Place",
+        places_input_fields,
+        {
+            "review_count": fields.Integer(description="Amount of reviews"),
+            "rating_average": fields.Float(description="Average rating"),
+            "rating_min": fields.Float(description="Lowest rating"),
+            "rating_max": fields.Float(description="Highest rating"),
+            "rating_histogram": fields.List(
+                fields.Integer,
+                description="Amount of ratings from 0 to 0.9, 1 to 1.9, "
+                "..., and of 5",
+            ),
+        },
+    ),
 )
 
 
 class PlaceList(Resource):
     """Handles HTTP requests to URL: /places"""
 
+    @api.doc(
+        params={
+            "amenities": "IDs of amenities separated by commas, only the "
+            "places with all of them are returned",
+        }
+        | PAGINATION_PARAMS
+        | FIELDS_PARAMS
+    )
     @api.response(200, "Places found", [place_fields])
     def get(self):
         """Get all places"""
@@ -64,11 +93,70 @@ class PlaceList(Resource):
         return create_place(api.payload)
 
 
+class PlaceSearch(Resource):
+    """Handles HTTP requests to URL: /places/search"""
+
+    @api.doc(
+        params={
+            "city_id": "ID of the city",
+            "country_code": "Code of the country of the city",
+            "min_price": "Lowest price per night",
+            "max_price": "Highest price per night",
+            "min_guests": "Fewest guests the place has to host",
+            "min_rooms": "Fewest rooms",
+            "min_bathrooms": "Fewest bathrooms",
+            "sort": "Fields to sort by, separated by commas, a leading '-' "
+            "sorts in descending order "
+            "(e.g. '-rating_average,price_per_night')",
+            "limit": PAGINATION_PARAMS["limit"],
+            "offset": "Amount of places to skip",
+        }
+        | FIELDS_PARAMS
+    )
+    @api.response(200, "Places found", [place_fields])
+    @api.response(400, "Invalid criteria")
+    def get(self):
+        """Search places by city, price, guests, rooms and bathrooms"""
+        return search_places()
+
+
+class PlaceNearby(Resource):
+    """Handles HTTP requests to URL: /places/nearby"""
+
+    @api.doc(
+        params={
+            "lat": "Latitude of the center",
+            "lon": "Longitude of the center",
+            "radius_km": "Distance to the center in kilometers, 10 by default",
+            "limit": PAGINATION_PARAMS["limit"],
+        }
+        | FIELDS_PARAMS
+    )
+    @api.response(200, "Places found, the closest first", [place_fields])
+    @api.response(400, "Invalid center or radius")
+    def get(self):
+        """Get the places around a point, with their distance"""
+        return get_nearby_places()
+
+
+class PlaceBulk(Resource):
+    """Handles HTTP requests to URL: /places/bulk"""
+
+    @api.expect([places_input_fields], validate=False)
+    @validate_items(places_input_fields)
+    @api.response(200, "Result of every place")
+    @api.response(400, "Bad request")
+    def post(self):
+        """Create many places at once"""
+        return create_places(api.payload)
+
+
 @api.doc(params={"place_id": "The ID of the place"})
 @api.response(404, "Place not found")
 class Place(Resource):
     """Handles HTTP requests to URL: /places/<place_id>"""
 
+    @api.doc(params=FIELDS_PARAMS)
     @api.response(200, "Place found", place_fields)
     def get(self, place_id: str):
         """Get a place by ID"""
@@ -87,4 +175,7 @@ class Place(Resource):
 
 
 api.add_resource(PlaceList, "/")
+api.add_resource(PlaceSearch, "/search")
+api.add_resource(PlaceNearby, "/nearby")
+api.add_resource(PlaceBulk, "/bulk")
 api.add_resource(Place, "/<place_id>")
@@ -4,8 +4,12 @@ This module contains the routes for the reviews blueprint
 
 from flask_restx import Namespace, Resource, fields
 from src.api.base import base_fields
+from utils.bulk import validate_items
+from utils.pagination import PAGINATION_PARAMS
+from utils.serializers import FIELDS_PARAMS
 from src.controllers.reviews import (
     create_review,
+    create_reviews,
     delete_review,
     get_reviews_from_place,
     get_reviews_from_user,
@@ -27,6 +31,12 @@ review_input_fields = api.model(
     },
 )
 
+review_bulk_input_fields = api.clone(
+    "ReviewBulkInput",
+    review_input_fields,
+    {"place_id": fields.String(description="Place ID", required=True)},
+)
+
 review_fields = api.model(
     name="Review",
     model=base_fields.clone("Review", review_input_fields),
@@ -36,6 +46,7 @@ review_fields = api.model(
 class ReviewList(Resource):
     """Handles HTTP requests to URL: /reviews"""
 
+    @api.doc(params=PAGINATION_PARAMS | FIELDS_PARAMS)
     @api.response(200, "Reviews found", [review_fields])
     def get(self):
         """Get all reviews"""
@@ -49,11 +60,24 @@ class ReviewList(Resource):
         return create_review(api.payload)
 
 
+class ReviewBulk(Resource):
+    """Handles HTTP requests to URL: /reviews/bulk"""
+
+    @api.expect([review_bulk_input_fields], validate=False)
+    @validate_items(review_bulk_input_fields)
+    @api.response(200, "Result of every review")
+    @api.response(400, "Bad request")
+    def post(self):
+        """Create many reviews at once"""
+        return create_reviews(api.payload)
+
+
 @api.doc(params={"review_id": "The ID of the review"})
 @api.response(404, "Review not found")
 class Review(Resource):
     """Handles HTTP requests to URL: /reviews/<review_id>"""
 
+    @api.doc(params=FIELDS_PARAMS)
     @api.response(200, "Review found", review_fields)
     def get(self, review_id: str):
         """Get a review by ID"""
@@ -74,6 +98,7 @@ class Review(Resource):
 class UserReviewList(Resource):
     """Handles HTTP requests to URL: /users/<user_id>/reviews"""
 
+    @api.doc(params=PAGINATION_PARAMS | FIELDS_PARAMS)
     @api.response(200, "Reviews found", [review_fields])
     def get(self, user_id: str):
         """Get all reviews from a user"""
@@ -83,6 +108,7 @@ class UserReviewList(Resource):
 class PlaceReviewList(Resource):
     """Handles HTTP requests to URL: /places/<place_id>/reviews"""
 
+    @api.doc(params=PAGINATION_PARAMS | FIELDS_PARAMS)
     @api.response(200, "Reviews found", [review_fields])
     def get(self, place_id: str):
         """Get all reviews from a place"""
@@ -97,6 +123,7 @@ class PlaceReviewList(Resource):
 
 
 api.add_resource(ReviewList, "reviews")
+api.add_resource(ReviewBulk, "reviews/bulk")
 api.add_resource(Review, "reviews/<review_id>")
 api.add_resource(UserReviewList, "users/<user_id>/reviews")
 api.add_resource(PlaceReviewList, "places/<place_id>/reviews")
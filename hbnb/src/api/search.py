@@ -0,0 +1,33 @@
+"""
+This module contains the route of the full-text search
+"""
+
+from flask_restx import Namespace, Resource
+from src.controllers.search import SEARCH_TYPES, search_text
+from utils.pagination import PAGINATION_PARAMS
+from utils.serializers import FIELDS_PARAMS
+
+api = Namespace("Search", description="Full-text search")
+
+
+class Search(Resource):
+    """Handles HTTP requests to URL: /search"""
+
+    @api.doc(
+        params={
+            "q": "Words to search for",
+            "type": f"Collection to search: {', '.join(SEARCH_TYPES)}, "
+            "places by default",
+            "limit": PAGINATION_PARAMS["limit"],
+            "offset": "Amount of results to skip",
+        }
+        | FIELDS_PARAMS
+    )
+    @api.response(200, "Objects found with their score, the best first")
+    @api.response(400, "Invalid query")
+    def get(self):
+        """Search places by name and description, or reviews by comment"""
+        return search_text()
+
+
+api.add_resource(Search, "/")
@@ -4,6 +4,8 @@ This module contains the routes for the users endpoints.
 
 from flask_restx import Namespace, Resource, fields
 from src.api.base import base_fields
+from utils.pagination import PAGINATION_PARAMS
+from utils.serializers import FIELDS_PARAMS
 from src.controllers.users import (
     create_user,
     delete_user,
@@ -43,6 +45,7 @@ user_fields = api.model(
 class UserList(Resource):
     """Handles HTTP requests to URL: /users"""
 
+    @api.doc(params=PAGINATION_PARAMS | FIELDS_PARAMS)
     @api.response(200, "Users found", [user_fields])
     def get(self):
         """Get all users"""
@@ -61,6 +64,7 @@ class UserList(Resource):
 class User(Resource):
     """Handles HTTP requests to URL: /users/<user_id>"""
 
+    @api.doc(params=FIELDS_PARAMS)
     @api.response(200, "User found", user_fields)
     def get(self, user_id: str):
         """Get a user by ID"""
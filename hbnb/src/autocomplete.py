@@ -0,0 +1,228 @@
+"""
+Prefix search over the names of the models, for autocompletion
+
+Models opt in by naming their name field in `__autocomplete__`. The
+names of each of them are kept normalized (lowercased and without
+accents, see `src.search.normalize`) in a sorted list, so the names
+starting with a prefix are next to each other and the first of them is
+found with a binary search. A lookup costs as much as the names it
+returns, not as the amount of names.
+
+The index is built from the repository the first time it's used, from
+the names alone (the objects aren't read). As with the full-text index,
+every write through the repository marks the objects it changed, and
+they are read again on the next lookup. Objects that no longer exist
+are removed.
+
+The writes of other processes sharing the database (like the other
+workers of the server) don't go through this repository manager, so
+the index of a model is built again on the next lookup whenever its
+shared state (see `RepositoryManager.shared_state`) changed. That reads
+the names alone, like reading the objects that changed would.
+"""
+
+from bisect import bisect_left, insort
+import threading
+from typing import Any, Iterable
+
+from flask import Flask
+
+from src.search import normalize
+
+
+class NameIndex:
+    """Sorted normalized names of the objects of one model"""
+
+    def __init__(self) -> None:
+        """Creates an empty index"""
+        self._entries: list[tuple[str, str]] = []
+        # Normalized and original name of every object
+        self._names: dict[str, tuple[str, str]] = {}
+
+    def __len__(self) -> int:
+        """Amount of names indexed"""
+        return len(self._names)
+
+    def load(self, names: Iterable[tuple[str, str]]) -> None:
+        """Indexes many (key, name) pairs at once, sorting them once"""
+        for key, name in names:
+            if name:
+                self._names[key] = (normalize(name), name)
+
+        self._entries = sorted(
+            (folded, key) for key, (folded, _) in self._names.items()
+        )
+
+    def add(self, key: str, name: str) -> None:
+        """Indexes the name of an object, replacing the previous one"""
+        self.remove(key)
+
+        if not name:
+            return
+
+        folded = normalize(name)
+        self._names[key] = (folded, name)
+        insort(self._entries, (folded, key))
+
+    def remove(self, key: str) -> None:
+        """Removes an object from the index, if it's in it"""
+        names = self._names.pop(key, None)
+
+        if names is not None:
+            del self._entries[bisect_left(self._entries, (names[0], key))]
+
+    def complete(
+        self, prefix: str, limit: int, exact: bool = False
+    ) -> list[tuple[str, str]]:
+        """
+        Returns the key and the name of the first `limit` objects, in
+        alphabetical order, whose name starts with `prefix` ignoring
+        case and accents
+
+        With `exact` the case and the accents have to match too, the
+        names are still found through their normalized form and the
+        ones that don't match are skipped
+        """
+        folded = normalize(prefix)
+        entries = self._entries
+        position = bisect_left(entries, (folded,))
+        found: list[tuple[str, str]] = []
+
+        while position < len(entries) and len(found) < limit:
+            name, key = entries[position]
+
+            if not name.startswith(folded):
+                break
+
+            original = self._names[key][1]
+
+            if not exact or original.startswith(prefix):
+                found.append((key, original))
+
+            position += 1
+
+        return found
+
+
+class Autocomplete:
+    """Manages the name indexes of the Flask App"""
+
+    def __init__(self) -> None:
+        """Creates an empty index, `init_app` configures it"""
+        self._lock = threading.RLock()
+        self._pending_lock = threading.Lock()
+        self._indexes: dict[str, NameIndex] = {}
+        self._pending: dict[str, set[str]] = {}
+        self._fields: dict[str, str] = {}
+        # Shared state of every model when its index was built
+        self._states: dict[str, Any] = {}
+        self._tracking = False
+        self.repo: Any = None
+
+    def init_app(self, app: Flask, repo: Any) -> None:
+        """
+        Configures the index for the app and subscribes it to the
+        changes made through the repository manager `repo`
+        """
+        with self._lock:
+            self.repo = repo
+            self._fields = {
+                model_name: model.__autocomplete__
+                for model_name, model in repo.models.items()
+                if getattr(model, "__autocomplete__", None)
+            }
+            self._indexes = {}
+            self._pending = {model_name: set() for model_name in self._fields}
+            self._states = {}
+            self._tracking = False
+
+        repo.subscribe(self.track)
+
+    def track(self, objs: list) -> None:
+        """Marks written objects to be reindexed on the next lookup"""
+        if not self._tracking:
+            return
+
+        with self._pending_lock:
+            for obj in objs:
+                pending = self._pending.get(obj.__class__.__name__)
+
+                if pending is not None:
+                    pending.add(obj.id)
+
+    def complete(
+        self, model_name: str, prefix: str, limit: int, exact: bool = False
+    ) -> list[tuple[str, str]]:
+        """
+        Returns the id and the name of the objects of a model whose name
+        starts with `prefix` (see `NameIndex.complete`)
+        """
+        if model_name not in self._fields:
+            raise ValueError(f"{model_name} can't be autocompleted")
+
+        with self._lock:
+            self.refresh()
+
+            return self._indexes[model_name].complete(prefix, limit, exact)
+
+    def refresh(self) -> None:
+        """
+        Builds the index if needed and reindexes the written objects,
+        or builds the index of a model again if other processes wrote
+        to it
+        """
+        with self._lock:
+            if not self._tracking:
+                self._build()
+
+            with self._pending_lock:
+                pending = {
+                    model_name: ids
+                    for model_name, ids in self._pending.items()
+                    if ids
+                }
+                self._pending = {
+                    model_name: set() for model_name in self._fields
+                }
+
+            for model_name, ids in pending.items():
+                self._reindex(model_name, ids)
+
+            for model_name in self._fields:
+                state = self.repo.shared_state(model_name)
+
+                if state is not None and state != self._states[model_name]:
+                    self._load(model_name, state)
+
+    def _reindex(self, model_name: str, ids: set[str]) -> None:
+        """Reads the objects again and updates their names"""
+        field = self._fields[model_name]
+        index = self._indexes[model_name]
+        found = {obj.id: obj for obj in self.repo.get_many(model_name, ids)}
+
+        for key in ids:
+            obj = found.get(key)
+
+            if obj is None:
+                index.remove(key)
+            else:
+                index.add(key, getattr(obj, field, None))
+
+    def _build(self) -> None:
+        """Reads the names of every object"""
+        # Writes from now on are tracked, the ones before are read below
+        self._tracking = True
+        self._indexes = {}
+
+        for model_name in self._fields:
+            self._load(model_name, self.repo.shared_state(model_name))
+
+    def _load(self, model_name: str, state: Any) -> None:
+        """
+        Builds the index of a model from the names of its objects, as
+        of its shared `state` (read before the names)
+        """
+        field = self._fields[model_name]
+        self._states[model_name] = state
+        index = self._indexes[model_name] = NameIndex()
+        index.load(self.repo.iter_values(model_name, ("id", field)))
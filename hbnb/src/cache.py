@@ -0,0 +1,324 @@
+"""
+In-memory cache of the responses of the read endpoints
+
+Routes opt in with the `ResponseCache.cached` decorator in their
+namespace, tagging their responses with the models (and objects) they
+are built from:
+
+    @cache.cached(tags=["Country"])
+    def get(self): ...
+
+    @cache.cached(tags=lambda amenity_id: [("Amenity", amenity_id)])
+    def get(self, amenity_id: str): ...
+
+Every write through the repository invalidates the tag of the model of
+the objects written and the `(model, id)` tag of each object, so a
+cached response is never served after its data changed in this process.
+Entries also keep the state of the models of their tags (see
+`RepositoryManager.state`) from when they were built, and are dropped
+once it changed, so the writes of the other workers sharing the
+database are noticed too.
+
+Entries expire after `RESPONSE_CACHE_TTL` seconds, and the least
+recently used ones are dropped once there are more than
+`RESPONSE_CACHE_MAX_ENTRIES` or their bodies take more than
+`RESPONSE_CACHE_MAX_BYTES`.
+"""
+
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import wraps
+import threading
+import time
+from typing import Any, Callable, Hashable, Iterable, Optional, Union
+
+from flask import Flask, Response, current_app, request
+from utils.streaming import wants_stream
+
+Tags = Union[Iterable[Hashable], Callable[..., Iterable[Hashable]]]
+
+
+@dataclass
+class CachedResponse:
+    """A response kept in the cache"""
+
+    body: bytes
+    status: int
+    headers: list[tuple[str, str]]
+    tags: frozenset
+    expires: float
+    state: tuple = ()
+
+
+class ResponseCache:
+    """Manages the response cache of the Flask App"""
+
+    def __init__(self) -> None:
+        """Creates an empty cache, `init_app` configures it"""
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, CachedResponse] = OrderedDict()
+        self._tags: dict[Hashable, set[str]] = {}
+        self._size = 0
+        # Counts the invalidations, so a response built while its data
+        # changed isn't stored
+        self._generation = 0
+        self.repo: Any = None
+        self.enabled = False
+        self.ttl = 0.0
+        self.max_entries = 0
+        self.max_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def init_app(self, app: Flask, repo: Any) -> None:
+        """
+        Configures the cache for the app and subscribes it to the
+        changes made through the repository manager `repo`
+        """
+        self.enabled = app.config.get("RESPONSE_CACHE", True)
+        self.ttl = app.config.get("RESPONSE_CACHE_TTL", 300)
+        self.max_entries = app.config.get("RESPONSE_CACHE_MAX_ENTRIES", 1024)
+        self.max_bytes = app.config.get(
+            "RESPONSE_CACHE_MAX_BYTES", 32 * 1024 * 1024
+        )
+        self.clear()
+
+        self.repo = repo
+        repo.subscribe(self.invalidate_objects)
+
+    def stats(self) -> dict:
+        """Returns the counters and the size of the cache"""
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._size,
+            }
+
+    @property
+    def generation(self) -> int:
+        """Amount of invalidations so far"""
+        return self._generation
+
+    def clear(self) -> None:
+        """Drops every entry and resets the counters"""
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+            self._size = 0
+            self.hits = self.misses = self.evictions = 0
+
+    def state(self, tags: Iterable[Hashable]) -> tuple:
+        """Returns the state of the models of some tags"""
+        models = {tag if isinstance(tag, str) else tag[0] for tag in tags}
+
+        return tuple(
+            (model, self.repo.state(model)) for model in sorted(models)
+        )
+
+    def get(
+        self, key: str, state: Optional[tuple] = None
+    ) -> Optional[CachedResponse]:
+        """
+        Returns the entry of a key if it's still fresh, and with `state`
+        (the current `state` of its tags) if it was built from it
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is None or entry.expires <= time.monotonic() or (
+                state is not None and entry.state != state
+            ):
+                if entry is not None:
+                    self._remove(key)
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+
+            return entry
+
+    def set(
+        self,
+        key: str,
+        entry: CachedResponse,
+        generation: Optional[int] = None,
+    ) -> None:
+        """
+        Stores an entry, evicting the least recently used ones
+
+        With `generation` (the value of `generation` when the response
+        started being built), the entry is only stored if nothing was
+        invalidated since
+        """
+        if len(entry.body) > self.max_bytes:
+            return
+
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+
+            if key in self._entries:
+                self._remove(key)
+
+            self._entries[key] = entry
+            self._size += len(entry.body)
+
+            for tag in entry.tags:
+                self._tags.setdefault(tag, set()).add(key)
+
+            while (
+                len(self._entries) > self.max_entries
+                or self._size > self.max_bytes
+            ):
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _remove(self, key: str) -> None:
+        """Removes an entry and its tags, the lock must be held"""
+        entry = self._entries.pop(key)
+        self._size -= len(entry.body)
+
+        for tag in entry.tags:
+            keys = self._tags.get(tag)
+
+            if keys is not None:
+                keys.discard(key)
+
+                if not keys:
+                    del self._tags[tag]
+
+    def invalidate(self, *tags: Hashable) -> None:
+        """Drops the entries with any of the given tags"""
+        with self._lock:
+            self._generation += 1
+
+            for tag in tags:
+                for key in list(self._tags.get(tag, ())):
+                    self._remove(key)
+
+    def invalidate_objects(self, objs: Iterable[Any]) -> None:
+        """Drops the entries built from the models of the given objects"""
+        tags: set = set()
+
+        for obj in objs:
+            model_name = obj.__class__.__name__
+            tags.add(model_name)
+            tags.add((model_name, getattr(obj, "id", None)))
+
+        self.invalidate(*tags)
+
+    def cached(self, tags: Tags, ttl: Optional[float] = None) -> Callable:
+        """
+        Decorates the `get` method of a Resource to cache its successful
+        responses by URL. Requests for a stream (see `wants_stream`)
+        skip the cache, and every response is sent with `Vary: Accept`
+        since that header picks between a page and a stream
+
+        `tags` are the models (by name) or `(model, id)` pairs the
+        response is built from, or a function returning them from the
+        arguments of the route. `ttl` overrides `RESPONSE_CACHE_TTL`
+        """
+
+        def decorator(method: Callable) -> Callable:
+            """Wraps the method of the Resource"""
+
+            @wraps(method)
+            def wrapper(resource, *args, **kwargs):
+                """Serves the response from the cache or stores it"""
+                if (
+                    not self.enabled
+                    or request.method not in ("GET", "HEAD")
+                    or wants_stream()
+                ):
+                    return self._vary(
+                        self._response(
+                            resource, method(resource, *args, **kwargs)
+                        )
+                    )
+
+                key = request.full_path
+                entry_tags = frozenset(
+                    tags(**kwargs) if callable(tags) else tags
+                )
+                state = self.state(entry_tags)
+                entry = self.get(key, state)
+
+                if entry is None:
+                    generation = self.generation
+                    response = self._vary(
+                        self._response(
+                            resource, method(resource, *args, **kwargs)
+                        )
+                    )
+
+                    if response.status_code != 200 or response.is_streamed:
+                        return response
+
+                    entry = CachedResponse(
+                        body=response.get_data(),
+                        status=response.status_code,
+                        headers=[
+                            (name, value)
+                            for name, value in response.headers.items()
+                            if name != "Content-Length"
+                        ],
+                        tags=entry_tags,
+                        expires=time.monotonic()
+                        + (self.ttl if ttl is None else ttl),
+                        state=state,
+                    )
+                    self.set(key, entry, generation)
+                    status = "MISS"
+                else:
+                    status = "HIT"
+
+                return self._replay(entry, status)
+
+            return wrapper
+
+        return decorator
+
+    @staticmethod
+    def _response(resource: Any, result: Any) -> Response:
+        """Turns what a Resource method returned into a Response"""
+        if isinstance(result, Response):
+            return result
+
+        if not isinstance(result, tuple):
+            result = (result, 200)
+
+        data, status, *rest = result
+
+        return resource.api.make_response(
+            data, status, headers=rest[0] if rest else {}
+        )
+
+    @staticmethod
+    def _vary(response: Response) -> Response:
+        """Marks a response as depending on the Accept header"""
+        response.vary.add("Accept")
+
+        return response
+
+    @staticmethod
+    def _replay(entry: CachedResponse, status: str) -> Response:
+        """
+        Builds the response of an entry, an empty 304 if the client
+        already has its ETag
+        """
+        response_class = current_app.response_class
+        response = response_class(entry.body, entry.status, entry.headers)
+        response.headers["X-Cache"] = status
+        etag, _ = response.get_etag()
+
+        if etag and request.if_none_match.contains_weak(etag):
+            response = response_class(status=304, headers=entry.headers)
+            response.headers["X-Cache"] = status
+
+        return response
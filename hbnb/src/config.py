@@ -15,6 +15,8 @@ from utils.constants import (
     REPOSITORY_ENV_VAR,
     DEFAULT_REPOSITORY,
     DATABASE_URL_ENV_VAR,
+    FILE_STORAGE_JOURNAL_ENV_VAR,
+    STORAGE_WRITE_BEHIND_ENV_VAR,
     Repos,
 )
 
@@ -38,6 +40,74 @@ class Config(ABC):
 
     BCRYPT_LOG_ROUNDS = 12
 
+    # Threads that hash and check passwords (see `src.passwords`), and
+    # how many more calls can wait for one before the requests get a 503
+    # with a Retry-After of PASSWORD_POOL_RETRY_AFTER seconds
+    PASSWORD_POOL_WORKERS = 2
+    PASSWORD_POOL_MAX_QUEUE = 16
+    PASSWORD_POOL_RETRY_AFTER = 1
+
+    # Append every change of the FileRepository to a JSON Lines journal
+    # instead of rewriting the whole JSON file. The journal is compacted
+    # into the JSON file once it grows over FILE_STORAGE_JOURNAL_MAX_SIZE
+    # bytes (0 disables it) or with `python manage.py compact`
+    FILE_STORAGE_JOURNAL = os.getenv(FILE_STORAGE_JOURNAL_ENV_VAR) == "1"
+    FILE_STORAGE_JOURNAL_MAX_SIZE = 16 * 1024 * 1024
+
+    # Let a background thread persist the changes of the file and pickle
+    # repositories. A write happens once the oldest pending change is
+    # MAX_DELAY seconds old or MAX_BATCH changes are pending, and
+    # `repo.flush()` waits for the pending changes to be written
+    STORAGE_WRITE_BEHIND = os.getenv(STORAGE_WRITE_BEHIND_ENV_VAR) == "1"
+    STORAGE_WRITE_BEHIND_MAX_DELAY = 0.05
+    STORAGE_WRITE_BEHIND_MAX_BATCH = 500
+    # fsync the files after writing them
+    STORAGE_FSYNC = False
+
+    # Split every model of the PickleRepository in this many shards by a
+    # hash of the id, and load every shard on reload instead of waiting
+    # for their model to be accessed
+    PICKLE_STORAGE_PARTITIONS = 1
+    PICKLE_STORAGE_PRELOAD = False
+
+    # Check the checksum of the whole snapshot when the SnapshotRepository
+    # opens it. Disabling it avoids reading every page of the file on
+    # start, a damaged file is then only noticed when its data is read
+    SNAPSHOT_STORAGE_VERIFY = True
+
+    # Amount of objects in a page of the list endpoints when `?limit=`
+    # isn't given, and the most a client can ask for
+    PAGINATION_DEFAULT_LIMIT = 100
+    PAGINATION_MAX_LIMIT = 1000
+
+    # Keep the responses of the routes decorated with `cache.cached` in
+    # memory. Entries expire after RESPONSE_CACHE_TTL seconds and the least
+    # recently used ones are dropped past MAX_ENTRIES entries or MAX_BYTES
+    # of bodies. Writes invalidate the entries of the models they change,
+    # the ones of other workers too when they share the database
+    RESPONSE_CACHE = True
+    RESPONSE_CACHE_TTL = 300
+    RESPONSE_CACHE_MAX_ENTRIES = 1024
+    RESPONSE_CACHE_MAX_BYTES = 32 * 1024 * 1024
+
+    # Most operations a request to POST /batch can run
+    BATCH_MAX_OPERATIONS = 50
+
+    # Largest radius GET /places/nearby searches, in kilometers
+    NEARBY_MAX_RADIUS_KM = 500
+
+    # Most objects a request to the POST /<collection>/bulk routes can
+    # create
+    BULK_MAX_ITEMS = 1000
+
+    # Save the full-text index of GET /search next to the files of the
+    # file, pickle and snapshot repositories, so the next start loads it
+    # instead of reading every place and review again
+    SEARCH_INDEX_PERSIST = True
+
+    # Names GET /autocomplete returns when no limit is given
+    AUTOCOMPLETE_DEFAULT_LIMIT = 10
+
     SWAGGER_UI_DOC_EXPANSION = "list"
     RESTX_VALIDATE = True
 
@@ -87,6 +157,8 @@ class TestingConfig(Config):
     TESTING = True
     SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
 
+    SEARCH_INDEX_PERSIST = False
+
 
 class ProductionConfig(Config):
     """
@@ -6,13 +6,15 @@ from flask import abort
 from flask_jwt_extended import jwt_required
 from src.models.amenity import Amenity
 from utils.decorators import admin_required
+from utils.bulk import bulk_create
+from utils.etags import collection_etag, conditional, entity_etag
+from utils.pagination import paginate
+from utils.serializers import serialize
 
 
 def get_amenities():
-    """Returns all amenities"""
-    amenities: list[Amenity] = Amenity.get_all()
-
-    return [amenity.to_dict() for amenity in amenities]
+    """Returns a page of amenities"""
+    return conditional(collection_etag(Amenity), lambda: paginate(Amenity))
 
 
 def get_amenity_by_id(amenity_id: str):
@@ -22,7 +24,7 @@ def get_amenity_by_id(amenity_id: str):
     if not amenity:
         abort(404, f"Amenity with ID {amenity_id} not found")
 
-    return amenity.to_dict()
+    return conditional(entity_etag(amenity), lambda: serialize(amenity))
 
 
 @admin_required()
@@ -36,6 +38,12 @@ def create_amenity(data: dict):
     return amenity.to_dict(), 201
 
 
+@admin_required()
+def create_amenities(items: list[dict]):
+    """Creates many amenities"""
+    return bulk_create(Amenity.create_many, items)
+
+
 @admin_required()
 def update_amenity(amenity_id: str, data: dict):
     """Updates a amenity by ID"""
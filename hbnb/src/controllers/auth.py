@@ -8,8 +8,10 @@ from flask_jwt_extended import (
     current_user,
     jwt_required,
 )
-from src import bcrypt
+from src import passwords
+from src.passwords import PasswordPoolFull
 from src.models.user import User
+from utils.decorators import admin_required
 from utils.functions import validate_email
 
 
@@ -25,7 +27,12 @@ def login(data: dict):
 
     user = User.get_by_email(valid_email)
 
-    if not user or not bcrypt.check_password_hash(user.password, password):
+    try:
+        valid = user is not None and passwords.check(user.password, password)
+    except PasswordPoolFull as e:
+        return e.as_response()
+
+    if not valid:
         abort(401, "Invalid email or password")
 
     aditional_claims = {"is_admin": user.is_admin}
@@ -41,3 +48,9 @@ def login(data: dict):
 def verify():
     """Verify a user"""
     return {"logged_in_as": current_user.to_dict()}, 200
+
+
+@admin_required()
+def get_password_pool_stats():
+    """Returns the load and the timings of the password pool"""
+    return passwords.stats(), 200
@@ -0,0 +1,42 @@
+"""
+Autocomplete controller module
+"""
+
+from flask import abort, current_app, request
+from src.models.amenity import Amenity
+from src.models.city import City
+from src.models.place import Place
+from utils.etags import collection_etag, conditional
+from utils.pagination import page_limit
+
+# Collections whose names can be completed
+AUTOCOMPLETE_TYPES = {
+    "place": Place,
+    "city": City,
+    "amenity": Amenity,
+}
+
+
+def autocomplete():
+    """Returns the names starting with `q`, in alphabetical order"""
+    prefix = request.args.get("q", "").lstrip()
+    kind = request.args.get("type", "place")
+
+    if not prefix:
+        abort(400, "q is required")
+
+    if kind not in AUTOCOMPLETE_TYPES:
+        abort(400, f"type must be one of {', '.join(AUTOCOMPLETE_TYPES)}")
+
+    model = AUTOCOMPLETE_TYPES[kind]
+    limit = page_limit(current_app.config.get("AUTOCOMPLETE_DEFAULT_LIMIT"))
+    exact = request.args.get("exact", "false").lower() in ("1", "true")
+
+    def build() -> list[dict]:
+        """Lists the id and the name of the objects found"""
+        return [
+            {"id": key, "name": name}
+            for key, name in model.complete(prefix, limit, exact)
+        ]
+
+    return conditional(collection_etag(model), build)
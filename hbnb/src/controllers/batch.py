@@ -0,0 +1,174 @@
+"""
+Batch controller module
+
+A batch is an ordered list of operations (method, path and body) run
+one after the other through the routes of the API, as if they were
+separate requests sharing the headers of the batch request (so they
+are made by the same user).
+
+A string of an operation like `"${0.id}"` is replaced by the field of
+the body of a previous operation, so an operation can use the id of an
+object created before it in the same batch.
+
+With `atomic` the writes of every operation are committed together, and
+none of them is if an operation fails. The operations after the one
+that failed aren't run.
+"""
+
+import re
+from typing import Any
+
+from flask import Response, abort, current_app, request
+from werkzeug.test import EnvironBuilder
+
+from src import repo
+
+METHODS = ("GET", "POST", "PUT", "PATCH", "DELETE")
+
+REFERENCE = re.compile(r"\$\{(\d+)\.(\w+)\}")
+
+# Headers of the batch request passed on to every operation
+FORWARDED_HEADERS = ("Authorization", "Accept-Language")
+
+
+class Rollback(Exception):
+    """Raised to roll back an atomic batch after a failed operation"""
+
+
+def _resolve(value: Any, results: list[dict]) -> Any:
+    """Replaces the references to previous results in a value"""
+    if isinstance(value, dict):
+        return {k: _resolve(v, results) for k, v in value.items()}
+
+    if isinstance(value, list):
+        return [_resolve(v, results) for v in value]
+
+    if not isinstance(value, str) or "${" not in value:
+        return value
+
+    def lookup(match: re.Match) -> Any:
+        """Returns the field of a previous result"""
+        index, field = int(match.group(1)), match.group(2)
+
+        if index >= len(results) or not isinstance(
+            results[index]["body"], dict
+        ):
+            raise ValueError(f"Invalid reference {match.group(0)}")
+
+        if field not in results[index]["body"]:
+            raise ValueError(f"Invalid reference {match.group(0)}")
+
+        return results[index]["body"][field]
+
+    whole = REFERENCE.fullmatch(value)
+
+    if whole:
+        return lookup(whole)
+
+    return REFERENCE.sub(lambda match: str(lookup(match)), value)
+
+
+def _dispatch(method: str, path: str, body: Any) -> Response:
+    """Runs an operation through the app like a request of its own"""
+    headers = {
+        name: request.headers[name]
+        for name in FORWARDED_HEADERS
+        if name in request.headers
+    }
+    builder = EnvironBuilder(
+        path=path,
+        method=method,
+        base_url=request.host_url,
+        headers=headers,
+        json=body,
+    )
+
+    # The app context, and so the database session, is shared with the
+    # batch request
+    with current_app.request_context(builder.get_environ()):
+        try:
+            return current_app.full_dispatch_request()
+        except Exception:
+            current_app.logger.exception("Batch operation failed")
+            response = current_app.json.response(
+                {"error": "Internal server error"}
+            )
+            response.status_code = 500
+
+            return response
+
+
+def _is_batch(path: str) -> bool:
+    """Whether a path is the batch route itself"""
+    return path.split("?")[0].rstrip("/") == request.path.rstrip("/")
+
+
+def _result(response: Response) -> dict:
+    """Returns the status and the body of the response of an operation"""
+    body = response.get_json(silent=True)
+
+    if body is None and response.status_code != 204:
+        body = response.get_data(as_text=True) or None
+
+    return {"status": response.status_code, "body": body}
+
+
+def _run(operations: list[dict], atomic: bool) -> list[dict]:
+    """Runs the operations, raises Rollback if an atomic one fails"""
+    results: list[dict] = []
+
+    for operation in operations:
+        method = operation["method"].upper()
+
+        try:
+            path = _resolve(operation["path"], results)
+            body = _resolve(operation.get("body"), results)
+        except ValueError as e:
+            result = {"status": 400, "body": str(e)}
+        else:
+            # The path is checked once resolved, a reference could turn
+            # it into the batch route itself
+            if method not in METHODS:
+                result = {"status": 405, "body": f"Invalid method {method}"}
+            elif (
+                not isinstance(path, str)
+                or not path.startswith("/")
+                or _is_batch(path)
+            ):
+                result = {"status": 400, "body": f"Invalid path {path}"}
+            else:
+                result = _result(_dispatch(method, path, body))
+
+        results.append(result)
+
+        if atomic and result["status"] >= 400:
+            raise Rollback(results)
+
+    return results
+
+
+def run_batch(data: dict):
+    """Runs the operations of a batch and returns their results"""
+    operations = data["operations"]
+    atomic = data.get("atomic", False)
+    maximum = current_app.config.get("BATCH_MAX_OPERATIONS", 50)
+
+    if len(operations) > maximum:
+        abort(400, f"A batch can't have more than {maximum} operations")
+
+    if not atomic:
+        return {"committed": True, "results": _run(operations, False)}, 200
+
+    try:
+        with repo.transaction():
+            results = _run(operations, True)
+    except Rollback as e:
+        results = e.args[0]
+        skipped = [
+            {"status": 424, "body": "Not run, the batch was rolled back"}
+            for _ in operations[len(results):]
+        ]
+
+        return {"committed": False, "results": results + skipped}, 200
+
+    return {"committed": True, "results": results}, 200
@@ -0,0 +1,20 @@
+"""
+Response cache controller module
+"""
+
+from src import cache
+from utils.decorators import admin_required
+
+
+@admin_required()
+def get_cache_stats():
+    """Returns the counters of the response cache"""
+    return cache.stats(), 200
+
+
+@admin_required()
+def clear_cache():
+    """Drops every response in the cache"""
+    cache.clear()
+
+    return "", 204
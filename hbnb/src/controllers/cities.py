@@ -5,13 +5,15 @@ Cities controller module
 from flask import abort
 from src.models.city import City
 from utils.decorators import admin_required
+from utils.bulk import bulk_create
+from utils.etags import collection_etag, conditional, entity_etag
+from utils.pagination import paginate
+from utils.serializers import serialize
 
 
 def get_cities():
-    """Returns all cities"""
-    cities: list[City] = City.get_all()
-
-    return [city.to_dict() for city in cities]
+    """Returns a page of cities"""
+    return conditional(collection_etag(City), lambda: paginate(City))
 
 
 def get_city_by_id(city_id: str):
@@ -21,7 +23,7 @@ def get_city_by_id(city_id: str):
     if not city:
         abort(404, f"City with ID {city_id} not found")
 
-    return city.to_dict()
+    return conditional(entity_etag(city), lambda: serialize(city))
 
 
 @admin_required()
@@ -35,6 +37,12 @@ def create_city(data: dict):
     return city.to_dict(), 201
 
 
+@admin_required()
+def create_cities(items: list[dict]):
+    """Creates many cities"""
+    return bulk_create(City.create_many, items)
+
+
 @admin_required()
 def update_city(city_id: str, data: dict):
     """Updates a city by ID"""
@@ -5,13 +5,16 @@ Countries controller module
 from flask import abort
 from src.models.city import City
 from src.models.country import Country
+from utils.etags import collection_etag, conditional, entity_etag
+from utils.serializers import serialize, serialize_all
 
 
 def get_countries():
     """Returns all countries"""
-    countries: list[Country] = Country.get_all()
-
-    return [country.to_dict() for country in countries]
+    return conditional(
+        collection_etag(Country),
+        lambda: serialize_all(Country, Country.get_all()),
+    )
 
 
 def get_country_by_code(code: str):
@@ -21,7 +24,7 @@ def get_country_by_code(code: str):
     if not country:
         abort(404, f"Country with ID {code} not found")
 
-    return country.to_dict()
+    return conditional(entity_etag(country), lambda: serialize(country))
 
 
 def get_country_cities(code: str):
@@ -31,10 +34,9 @@ def get_country_cities(code: str):
     if not country:
         abort(404, f"Country with ID {code} not found")
 
-    cities: list[City] = City.get_all()
-
-    country_cities = [
-        city.to_dict() for city in cities if city.country_code == country.code
-    ]
-
-    return country_cities
+    return conditional(
+        collection_etag(City),
+        lambda: serialize_all(
+            City, City.get_all({"country_code": country.code})
+        ),
+    )
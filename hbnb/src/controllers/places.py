@@ -2,26 +2,184 @@
 Places controller module
 """
 
-from flask import abort
+from typing import Optional
+
+from flask import abort, current_app, request
 from flask_jwt_extended import jwt_required, current_user
-from src.models.place import Place
+from src.models.amenity import PlaceAmenity
+from src.models.place import SEARCH_FILTERS, Place
+from src.models.city import City
+from src.models.user import User
+from utils.bulk import bulk_create
+from utils.etags import collection_etag, conditional, entity_etag
+from utils.pagination import page_limit, paginate
+from utils.serializers import request_load, request_serializer, serialize
+
+# Relationships `Place.to_dict` uses, fetched with the places
+PLACE_LOAD = ("host",)
+
+# Fields the results of GET /places/search can be sorted by
+SORT_FIELDS = (
+    "price_per_night",
+    "max_guests",
+    "number_of_rooms",
+    "number_of_bathrooms",
+    "name",
+    "rating_average",
+    "review_count",
+    "created_at",
+)
 
 
 def get_places():
-    """Returns all places"""
-    places: list[Place] = Place.get_all()
+    """
+    Returns a page of places, only the ones with every amenity of the
+    `amenities` argument (ids separated by commas) if given
+    """
+    amenities = [
+        amenity_id.strip()
+        for amenity_id in request.args.get("amenities", "").split(",")
+        if amenity_id.strip()
+    ]
+
+    if not amenities:
+        return conditional(
+            collection_etag(Place, User),
+            lambda: paginate(Place, load=PLACE_LOAD),
+        )
+
+    return conditional(
+        collection_etag(Place, User, PlaceAmenity),
+        lambda: paginate(
+            Place, {"amenities__all": amenities}, load=PLACE_LOAD
+        ),
+    )
+
+
+def _float_arg(
+    name: str, low: float, high: float, default: Optional[float] = None
+) -> float:
+    """Reads a number argument of the request, 400 if it's invalid"""
+    value = request.args.get(name, default)
+
+    if value is None:
+        abort(400, f"{name} is required")
+
+    try:
+        value = float(value)
+    except ValueError:
+        abort(400, f"{name} must be a number")
+
+    if not low <= value <= high:
+        abort(400, f"{name} must be between {low} and {high}")
 
-    return [place.to_dict() for place in places], 200
+    return value
+
+
+def _int_arg(name: str, default: Optional[int] = None) -> Optional[int]:
+    """Reads a non negative integer argument, 400 if it's invalid"""
+    value = request.args.get(name)
+
+    if value is None:
+        return default
+
+    try:
+        value = int(value)
+    except ValueError:
+        abort(400, f"{name} must be an integer")
+
+    if value < 0:
+        abort(400, f"{name} can't be negative")
+
+    return value
+
+
+def _sort_arg() -> list[str]:
+    """
+    Reads the `sort` argument, fields separated by commas with a leading
+    `-` for descending order. The id breaks the ties, so the order is
+    the same in every repository
+    """
+    order = [
+        field.strip()
+        for field in request.args.get("sort", "created_at").split(",")
+        if field.strip()
+    ]
+
+    for field in order:
+        if field.lstrip("-") not in SORT_FIELDS:
+            abort(400, f"Can't sort by '{field}'")
+
+    return order + ["id"]
+
+
+def search_places():
+    """Returns the places meeting the criteria of the arguments"""
+    criteria = {
+        name: _int_arg(name)
+        for name in SEARCH_FILTERS
+        if name != "city_id"
+    }
+    criteria["city_id"] = request.args.get("city_id")
+    criteria["country_code"] = request.args.get("country_code")
+    order_by = _sort_arg()
+    limit = page_limit()
+    offset = _int_arg("offset", 0)
+
+    def build() -> list[dict]:
+        """Serializes the places found"""
+        to_dict = request_serializer(Place)
+        places = Place.search(
+            criteria,
+            order_by,
+            limit,
+            offset,
+            load=request_load(Place, PLACE_LOAD),
+        )
+
+        return [to_dict(place) for place in places]
+
+    return conditional(collection_etag(Place, User, City), build)
+
+
+def get_nearby_places():
+    """Returns the places around a point, the closest first"""
+    latitude = _float_arg("lat", -90, 90)
+    longitude = _float_arg("lon", -180, 180)
+    radius_km = _float_arg(
+        "radius_km", 0, current_app.config.get("NEARBY_MAX_RADIUS_KM", 500), 10
+    )
+    limit = page_limit()
+
+    def build() -> list[dict]:
+        """Serializes the places with their distance"""
+        to_dict = request_serializer(Place)
+        found = Place.near(
+            latitude,
+            longitude,
+            radius_km,
+            limit,
+            load=request_load(Place, PLACE_LOAD),
+        )
+
+        return [
+            to_dict(place) | {"distance_km": round(distance, 3)}
+            for place, distance in found
+        ]
+
+    return conditional(collection_etag(Place, User), build)
 
 
 def get_place_by_id(place_id: str):
     """Returns a place by ID"""
-    place: Place | None = Place.get(place_id)
+    place: Place | None = Place.get(
+        place_id, load=request_load(Place, PLACE_LOAD)
+    )
 
     if not place:
         abort(404, f"Place with ID {place_id} not found")
 
-    return place.to_dict(), 200
+    return conditional(entity_etag(place, User), lambda: serialize(place))
 
 
 @jwt_required()
@@ -39,6 +197,25 @@ def create_place(data: dict):
     return place.to_dict(), 201
 
 
+@jwt_required()
+def create_places(items: list[dict]):
+    """
+    Creates many places hosted by the current user, like `create_place`
+    does for one
+    """
+
+    def authorize(item: dict) -> dict:
+        """Returns the place to create for the current user"""
+        if current_user.is_admin is False and (
+            current_user.id != item["host_id"]
+        ):
+            raise PermissionError("Forbidden")
+
+        return item | {"host_id": current_user.id}
+
+    return bulk_create(Place.create_many, items, authorize)
+
+
 @jwt_required()
 def update_place(place_id: str, data: dict):
     """Updates a place by ID"""
@@ -6,13 +6,15 @@ from flask import abort
 from flask_jwt_extended import current_user, jwt_required
 from src.models.review import Review
 from utils.decorators import admin_required
+from utils.bulk import bulk_create
+from utils.etags import collection_etag, conditional, entity_etag
+from utils.pagination import paginate
+from utils.serializers import serialize
 
 
 def get_reviews():
-    """Returns all reviews"""
-    reviews = Review.get_all()
-
-    return [review.to_dict() for review in reviews], 200
+    """Returns a page of reviews"""
+    return conditional(collection_etag(Review), lambda: paginate(Review))
 
 
 @jwt_required()
@@ -36,28 +38,39 @@ def create_review(place_id: str, data: dict):
     return review.to_dict(), 201
 
 
+@jwt_required()
+def create_reviews(items: list[dict]):
+    """
+    Creates many reviews written by the current user, like
+    `create_review` does for one
+    """
+
+    def authorize(item: dict) -> dict:
+        """Returns the review to create for the current user"""
+        if current_user.is_admin is False and (
+            current_user.id != item["user_id"]
+        ):
+            raise PermissionError("Forbidden")
+
+        return item | {"user_id": current_user.id}
+
+    return bulk_create(Review.create_many, items, authorize)
+
+
 def get_reviews_from_place(place_id: str):
-    """Returns all reviews from a specific place"""
-    reviews: list[Review] = Review.get_all()
-
-    return (
-        [
-            review.to_dict()
-            for review in reviews
-            if review.place_id == place_id
-        ],
-        200,
+    """Returns a page of the reviews from a specific place"""
+    return conditional(
+        collection_etag(Review),
+        lambda: paginate(Review, {"place_id": place_id}),
     )
 
 
 @admin_required()
 def get_reviews_from_user(user_id: str):
-    """Returns all reviews from a specific user"""
-    reviews: list[Review] = Review.get_all()
-
-    return (
-        [review.to_dict() for review in reviews if review.user_id == user_id],
-        200,
+    """Returns a page of the reviews from a specific user"""
+    return conditional(
+        collection_etag(Review),
+        lambda: paginate(Review, {"user_id": user_id}),
     )
 
 
@@ -68,7 +81,7 @@ def get_review_by_id(review_id: str):
     if not review:
         abort(404, f"Review with ID {review_id} not found")
 
-    return review.to_dict(), 200
+    return conditional(entity_etag(review), lambda: serialize(review))
 
 
 @jwt_required()
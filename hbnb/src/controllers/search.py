@@ -0,0 +1,53 @@
+"""
+Search controller module
+"""
+
+from flask import abort, request
+from src.models.place import Place
+from src.models.review import Review
+from src.models.user import User
+from utils.etags import collection_etag, conditional
+from utils.pagination import page_limit
+from utils.serializers import request_load, request_serializer
+
+# Collections that can be searched, with the models their objects embed
+SEARCH_TYPES = {
+    "places": (Place, (User,), ("host",)),
+    "reviews": (Review, (), ()),
+}
+
+
+def search_text():
+    """Returns the objects matching the words of `q`, the best first"""
+    text = request.args.get("q", "").strip()
+    kind = request.args.get("type", "places")
+
+    if not text:
+        abort(400, "q is required")
+
+    if kind not in SEARCH_TYPES:
+        abort(400, f"type must be one of {', '.join(SEARCH_TYPES)}")
+
+    model, related, load = SEARCH_TYPES[kind]
+    limit = page_limit()
+
+    try:
+        offset = int(request.args.get("offset", 0))
+    except ValueError:
+        abort(400, "offset must be an integer")
+
+    if offset < 0:
+        abort(400, "offset can't be negative")
+
+    def build() -> list[dict]:
+        """Serializes the objects found with their score"""
+        to_dict = request_serializer(model)
+        found = model.text_search(
+            text, limit, offset, load=request_load(model, load)
+        )
+
+        return [
+            to_dict(obj) | {"score": round(score, 4)} for obj, score in found
+        ]
+
+    return conditional(collection_etag(model, *related), build)
@@ -4,15 +4,17 @@ Users controller module
 
 from flask import abort
 from src.models.user import User
+from src.passwords import PasswordPoolFull
 from utils.decorators import admin_required
+from utils.etags import collection_etag, conditional, entity_etag
 from utils.functions import validate_email
+from utils.pagination import paginate
+from utils.serializers import serialize
 
 
 def get_users():
-    """Returns all users"""
-    users: list[User] = User.get_all()
-
-    return [user.to_dict() for user in users]
+    """Returns a page of users"""
+    return conditional(collection_etag(User), lambda: paginate(User))
 
 
 def get_user_by_id(user_id: str):
@@ -22,7 +24,7 @@ def get_user_by_id(user_id: str):
     if not user:
         abort(404, f"User with ID {user_id} not found")
 
-    return user.to_dict(), 200
+    return conditional(entity_etag(user), lambda: serialize(user))
 
 
 @admin_required()
@@ -42,6 +44,8 @@ def create_user(data: dict):
         user = User.create(data | {"email": valid_email})
     except ValueError as e:
         abort(400, str(e))
+    except PasswordPoolFull as e:
+        return e.as_response()
 
     if user is None:
         abort(400, "User already exists")
@@ -2,7 +2,7 @@
 Amenity related functionality
 """
 
-from src.models.base import Base
+from src.models.base import Base, save_in_chunks
 from src import repo, db
 
 import sqlalchemy as sa
@@ -12,6 +12,9 @@ import sqlalchemy.orm as so
 class Amenity(Base, db.Model):
     """Amenity representation"""
 
+    __indexes__ = ["name"]
+    __autocomplete__ = "name"
+
     id: so.Mapped[str] = sa.Column(sa.String(255), primary_key=True)
     name: so.Mapped[str] = sa.Column(sa.String(255), nullable=False, unique=True)
 
@@ -37,12 +40,8 @@ class Amenity(Base, db.Model):
     @staticmethod
     def create(data: dict) -> "Amenity":
         """Create a new amenity"""
-
-        amenities: list["Amenity"] = Amenity.get_all()
-
-        for u in amenities:
-            if u.name == data["name"]:
-                raise ValueError("Amenity already exists")
+        if Amenity.find_one_by(name=data["name"]):
+            raise ValueError("Amenity already exists")
 
         amenity = Amenity(**data)
 
@@ -50,6 +49,33 @@ class Amenity(Base, db.Model):
 
         return amenity
 
+    @staticmethod
+    def create_many(items: list[dict]) -> list["Amenity | ValueError"]:
+        """
+        Create many amenities, checking the names with one query
+
+        Returns the new amenity of each item, or the ValueError of the
+        ones that couldn't be created
+        """
+        names = {item["name"] for item in items}
+        taken = {
+            amenity.name
+            for amenity in Amenity.get_all({"name__in": list(names)})
+        }
+        results: list = []
+
+        for item in items:
+            if item["name"] in taken:
+                results.append(ValueError("Amenity already exists"))
+                continue
+
+            taken.add(item["name"])
+            results.append(Amenity(**item))
+
+        save_in_chunks([r for r in results if isinstance(r, Amenity)])
+
+        return results
+
     @staticmethod
     def update(amenity_id: str, data: dict) -> "Amenity | None":
         """Update an existing amenity"""
@@ -69,6 +95,13 @@ class Amenity(Base, db.Model):
 class PlaceAmenity(Base, db.Model):
     """PlaceAmenity representation"""
 
+    __indexes__ = [("place_id", "amenity_id")]
+    __bitmap__ = ("place_id", "amenity_id")
+    __table_args__ = (
+        sa.Index("ix_place_amenity", "place_id", "amenity_id"),
+        sa.Index("ix_amenity_place", "amenity_id", "place_id"),
+    )
+
     id: so.Mapped[str] = sa.Column(sa.String(255), primary_key=True)
     place_id: so.Mapped[str] = sa.Column(sa.String(255), sa.ForeignKey("place.id"))
     amenity_id: so.Mapped[str] = sa.Column(
@@ -103,16 +136,9 @@ class PlaceAmenity(Base, db.Model):
     @staticmethod
     def get(place_id: str, amenity_id: str) -> "PlaceAmenity | None":
         """Get a PlaceAmenity object by place_id and amenity_id"""
-        place_amenities: list[PlaceAmenity] = repo.get_all("placeamenity")
-
-        for place_amenity in place_amenities:
-            if (
-                place_amenity.place_id == place_id
-                and place_amenity.amenity_id == amenity_id
-            ):
-                return place_amenity
-
-        return None
+        return PlaceAmenity.find_one_by(
+            place_id=place_id, amenity_id=amenity_id
+        )
 
     @staticmethod
     def create(data: dict) -> "PlaceAmenity":
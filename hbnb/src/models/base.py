@@ -1,7 +1,7 @@
 """ Abstract base class for all models """
 
 from datetime import datetime
-from typing import Any, Optional
+from typing import Any, Iterable, Iterator, Optional
 import uuid
 from abc import abstractmethod
 
@@ -9,18 +9,65 @@ import sqlalchemy as sa
 from sqlalchemy.sql import func
 import sqlalchemy.orm as so
 
-from src import repo
+from src import autocomplete, repo, search
+
+# Amount of objects inserted at a time by `save_in_chunks`
+BULK_CHUNK_SIZE = 500
+
+
+def save_in_chunks(objs: list) -> None:
+    """
+    Save new objects `BULK_CHUNK_SIZE` at a time, in one transaction,
+    so a large batch doesn't build a single huge insert
+    """
+    with repo.transaction():
+        for start in range(0, len(objs), BULK_CHUNK_SIZE):
+            repo.save_many(objs[start:start + BULK_CHUNK_SIZE])
 
 
 class Base:
     """
     Base Interface for all models
+
+    Models can declare the fields the in-memory repositories should index
+    with `__indexes__`, either single fields or tuples of fields for
+    composite indexes, e.g. `__indexes__ = ["email", ("name", "code")]`
+
+    `__ordering__` is the stable order the objects are paginated in,
+    the last field has to be unique
+
+    `__ranges__` are the fields the in-memory repositories keep sorted,
+    for range filters like `{"price_per_night__lte": 100}`
+
+    `__location__` names the latitude and longitude fields of the models
+    that can be searched by distance with `near`
+
+    `__search__` names the text fields of the models that can be
+    searched by their words with `text_search`
+
+    `__autocomplete__` names the field of the models whose objects can
+    be found by the start of its value with `complete`
+
+    `__links__` maps a name to the link model, owner field and member
+    field relating the objects to others, for filters like
+    `{"amenities__all": [...]}`. A link model can declare its owner and
+    member fields as `__bitmap__` so the in-memory repositories keep a
+    bitmask of the members of every owner
     """
 
+    __indexes__: list = []
+    __ranges__: list = []
+    __ordering__: tuple = ("created_at", "id")
+    __location__: Optional[tuple[str, str]] = None
+    __search__: tuple = ()
+    __autocomplete__: Optional[str] = None
+    __links__: dict = {}
+
     id: so.Mapped[str] = sa.Column(sa.String, primary_key=True)
     created_at: so.Mapped[datetime] = sa.Column(
         sa.DateTime,
         default=func.now(),
+        index=True,
     )
     updated_at: so.Mapped[datetime] = sa.Column(
         sa.DateTime,
@@ -50,25 +97,135 @@ class Base:
         self.updated_at = updated_at or datetime.now()
 
     @classmethod
-    def get(cls, id) -> "Any | None":
+    def get(cls, id, load: Iterable[str] = ()) -> "Any | None":
         """
         This is a common method to get an specific object
         of a class by its id
 
+        `load` names the relationships to fetch with the object
+
         If a class needs a different implementation,
         it should override this method
         """
-        return repo.get(cls.__name__, id)
+        return repo.get(cls.__name__, id, load)
+
+    @classmethod
+    def get_many(
+        cls, ids: Iterable[str], load: Iterable[str] = ()
+    ) -> dict[str, Any]:
+        """
+        Get the objects of a class with the given ids at once, by id.
+        The ids that don't exist aren't in the result
+        """
+        return {
+            obj.id: obj for obj in repo.get_many(cls.__name__, ids, load)
+        }
 
     @classmethod
-    def get_all(cls) -> list:
+    def get_all(
+        cls,
+        filters: Optional[dict] = None,
+        order_by: "Optional[str | list[str]]" = None,
+        limit: Optional[int] = None,
+        offset: int = 0,
+        load: Iterable[str] = (),
+    ) -> list:
         """
-        This is a common method to get all objects of a class
+        This is a common method to get all objects of a class, or only
+        the ones matching `filters`, sorted and paginated, e.g.
+        `Review.get_all({"rating__gte": 4}, order_by="-created_at")`.
+        The relationships in `load` are fetched for every object at once
 
         If a class needs a different implementation,
         it should override this method
         """
-        return repo.get_all(cls.__name__)
+        return repo.get_all(
+            cls.__name__, filters, order_by, limit, offset, load
+        )
+
+    @classmethod
+    def get_page(
+        cls,
+        filters: Optional[dict] = None,
+        after: Optional[tuple] = None,
+        limit: Optional[int] = None,
+        load: Iterable[str] = (),
+    ) -> list:
+        """
+        Get the objects of a class in the order of `__ordering__`,
+        starting after the object whose ordering values are `after`
+        """
+        return repo.get_page(cls.__name__, filters, after, limit, load)
+
+    @classmethod
+    def iter_all(
+        cls, filters: Optional[dict] = None, load: Iterable[str] = ()
+    ) -> Iterator:
+        """
+        Iterate the objects of a class in the order of `__ordering__`,
+        reading them while they are consumed
+        """
+        return repo.iter_all(cls.__name__, filters, load)
+
+    @classmethod
+    def near(
+        cls,
+        latitude: float,
+        longitude: float,
+        radius_km: float,
+        limit: Optional[int] = None,
+        load: Iterable[str] = (),
+    ) -> list[tuple[Any, float]]:
+        """
+        Get the objects of a class within `radius_km` of a point with
+        their distance in kilometers, the closest first
+        """
+        return repo.near(
+            cls.__name__, latitude, longitude, radius_km, limit, load
+        )
+
+    @classmethod
+    def text_search(
+        cls,
+        text: str,
+        limit: int,
+        offset: int = 0,
+        load: Iterable[str] = (),
+    ) -> list[tuple[Any, float]]:
+        """
+        Get the objects of a class whose `__search__` fields match the
+        words of a text with their score, the most relevant first
+        """
+        found = search.search(cls.__name__, text, limit, offset)
+        objs = cls.get_many([key for key, _ in found], load)
+
+        return [(objs[key], score) for key, score in found if key in objs]
+
+    @classmethod
+    def complete(
+        cls, prefix: str, limit: int, exact: bool = False
+    ) -> list[tuple[str, str]]:
+        """
+        Get the id and the `__autocomplete__` field of the objects of a
+        class whose field starts with `prefix`, in alphabetical order,
+        ignoring case and accents unless `exact`
+        """
+        return autocomplete.complete(cls.__name__, prefix, limit, exact)
+
+    @classmethod
+    def find_by(cls, **fields) -> list:
+        """
+        Get all objects of a class whose fields match the given values
+
+        Fields declared in the `__indexes__` of the class are looked up
+        through an index instead of scanning every object
+        """
+        return repo.find_by(cls.__name__, **fields)
+
+    @classmethod
+    def find_one_by(cls, **fields) -> "Any | None":
+        """Get the first object of a class matching the given values"""
+        return repo.find_one_by(cls.__name__, **fields)
 
     @classmethod
     def delete(cls, id_or_obj) -> bool:
@@ -89,6 +246,16 @@ class Base:
 
         return repo.delete(obj)
 
+    @classmethod
+    def rebuild_aggregates(cls, repository: Any) -> list:
+        """
+        Computes the values the class derives from other models from
+        the objects of `repository`, and returns the objects that
+        changed. Called when a repository is reloaded, the classes that
+        keep such values override it
+        """
+        return []
+
     @abstractmethod
     def to_dict(self) -> dict:
         """Returns the dictionary representation of the object"""
@@ -2,7 +2,7 @@
 City related functionality
 """
 
-from src.models.base import Base
+from src.models.base import Base, save_in_chunks
 from src.models.country import Country
 
 from src import repo, db
@@ -14,10 +14,16 @@ import sqlalchemy.orm as so
 class City(Base, db.Model):
     """City representation"""
 
+    __indexes__ = [("name", "country_code"), "country_code"]
+    __autocomplete__ = "name"
+    __table_args__ = (
+        sa.Index("ix_city_name_country", "name", "country_code"),
+    )
+
     id: so.Mapped[str] = sa.Column(sa.String(255), primary_key=True)
     name: so.Mapped[str] = sa.Column(sa.String(255), nullable=False)
     country_code: so.Mapped[str] = sa.Column(
-        sa.String(2), sa.ForeignKey("country.code"), nullable=False
+        sa.String(2), sa.ForeignKey("country.code"), nullable=False, index=True
     )
 
     country = so.relationship("Country", back_populates="cities")
@@ -51,12 +57,10 @@ class City(Base, db.Model):
         if not country:
             raise ValueError("Country not found")
 
-        cities: list[City] = City.get_all()
-
-        for city in cities:
-            if city.name == data["name"]:
-                if city.country_code == data["country_code"]:
-                    raise ValueError("City already exists")
+        if City.find_one_by(
+            name=data["name"], country_code=data["country_code"]
+        ):
+            raise ValueError("City already exists")
 
         city = City(**data)
 
@@ -64,6 +68,38 @@ class City(Base, db.Model):
 
         return city
 
+    @staticmethod
+    def create_many(items: list[dict]) -> list["City | ValueError"]:
+        """
+        Create many cities, checking the countries and the names with a
+        query each
+
+        Returns the new city of each item, or the ValueError of the ones
+        that couldn't be created
+        """
+        countries = Country.get_many({item["country_code"] for item in items})
+        names = list({item["name"] for item in items})
+        taken = {
+            (city.name, city.country_code)
+            for city in City.get_all({"name__in": names})
+        }
+        results: list = []
+
+        for item in items:
+            key = (item["name"], item["country_code"])
+
+            if item["country_code"] not in countries:
+                results.append(ValueError("Country not found"))
+            elif key in taken:
+                results.append(ValueError("City already exists"))
+            else:
+                taken.add(key)
+                results.append(City(**item))
+
+        save_in_chunks([r for r in results if isinstance(r, City)])
+
+        return results
+
     @staticmethod
     def update(city: "City", data: dict) -> "City":
         """Update an existing city"""
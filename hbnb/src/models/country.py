@@ -2,6 +2,9 @@
 Country related functionality
 """
 
+from types import MappingProxyType
+from typing import ClassVar, Iterable, Mapping, Optional
+
 from src import repo, db
 
 import sqlalchemy as sa
@@ -15,8 +18,16 @@ class Country(db.Model):
     This class does NOT inherit from Base, you can't delete or update a country
 
     This class is used to get and list countries
+
+    Countries barely change, so they're read from the repository once
+    into a read-only map by code that answers every lookup. The map is
+    read again only when the version of the model changes, that is when
+    a country is created or the repository is reloaded
     """
 
+    # Version of the model the map was read at, and the map
+    _catalog: ClassVar[Optional[tuple[str, Mapping[str, "Country"]]]] = None
+
     name: so.Mapped[str] = sa.Column(sa.String(255), nullable=False, unique=True)
     code: so.Mapped[str] = sa.Column(sa.String(2), primary_key=True)
 
@@ -36,6 +47,11 @@ class Country(db.Model):
         """Dummy repr"""
         return f"<Country {self.code} ({self.name})>"
 
+    @property
+    def id(self) -> str:
+        """Countries are identified by their code in the repositories"""
+        return self.code
+
     def to_dict(self) -> dict:
         """Returns the dictionary representation of the country"""
         return {
@@ -43,20 +59,45 @@ class Country(db.Model):
             "code": self.code,
         }
 
+    @staticmethod
+    def catalog() -> Mapping[str, "Country"]:
+        """
+        Every country by code, read from the repository only if the
+        countries changed since the last call
+
+        The map holds copies that aren't attached to a database session,
+        so they can be used by any request
+        """
+        version = repo.version("Country")
+        catalog = Country._catalog
+
+        if catalog is None or catalog[0] != version:
+            countries = MappingProxyType(
+                {
+                    country.code: Country(country.name, country.code)
+                    for country in repo.get_all("Country")
+                }
+            )
+            catalog = Country._catalog = (version, countries)
+
+        return catalog[1]
+
     @staticmethod
     def get_all() -> list["Country"]:
         """Get all countries"""
-        countries: list["Country"] = repo.get_all("Country")
-
-        return countries
+        return list(Country.catalog().values())
 
     @staticmethod
     def get(code: str) -> "Country | None":
         """Get a country by its code"""
-        for country in Country.get_all():
-            if country.code == code:
-                return country
-        return None
+        return Country.catalog().get(code)
+
+    @staticmethod
+    def get_many(codes: Iterable[str]) -> dict[str, "Country"]:
+        """Get the countries with the given codes at once, by code"""
+        catalog = Country.catalog()
+
+        return {code: catalog[code] for code in set(codes) if code in catalog}
 
     @staticmethod
     def create(name: str, code: str) -> "Country":
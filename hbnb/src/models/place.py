@@ -2,20 +2,79 @@
 Place related functionality
 """
 
-from src.models.base import Base
+from src.models.base import Base, save_in_chunks
 from src.models.city import City
 from src.models.user import User
 
-from typing import Optional
+import math
+from typing import Any, Optional
 from src import repo, db
 
 import sqlalchemy as sa
 import sqlalchemy.orm as so
 
+# Criteria of `Place.search` and the filter each one becomes
+SEARCH_FILTERS = {
+    "city_id": "city_id",
+    "min_price": "price_per_night__gte",
+    "max_price": "price_per_night__lte",
+    "min_guests": "max_guests__gte",
+    "min_rooms": "number_of_rooms__gte",
+    "min_bathrooms": "number_of_bathrooms__gte",
+}
+
+# Buckets of the rating histogram of a place, by the whole part of the
+# rating: ratings from 0 to 0.9 are in the first one, 5 in the last
+RATING_BUCKETS = 6
+
+
+# Columns of the rating aggregates of a place
+RATING_FIELDS = (
+    "review_count",
+    "rating_sum",
+    "rating_min",
+    "rating_max",
+    "rating_average",
+    "rating_histogram",
+)
+
+
+def rating_bucket(rating: float) -> int:
+    """Returns the histogram bucket of a rating"""
+    return max(0, min(RATING_BUCKETS - 1, int(rating)))
+
+
+def same_ratings(aggregates: tuple, other: tuple) -> bool:
+    """
+    Whether two sets of rating aggregates match, sums and averages
+    added up in a different order may differ in the last digits
+    """
+    return len(aggregates) == len(other) and all(
+        math.isclose(a, b) if isinstance(a, float) and isinstance(b, float)
+        else a == b
+        for a, b in zip(aggregates, other)
+    )
+
 
 class Place(Base, db.Model):
     """Place representation"""
 
+    __indexes__ = ["city_id"]
+    __ranges__ = [
+        "price_per_night",
+        "max_guests",
+        "number_of_rooms",
+        "number_of_bathrooms",
+    ]
+    __location__ = ("latitude", "longitude")
+    __search__ = ("name", "description")
+    __autocomplete__ = "name"
+    __links__ = {"amenities": ("PlaceAmenity", "place_id", "amenity_id")}
+    __table_args__ = (
+        sa.Index("ix_place_location", "latitude", "longitude"),
+        sa.Index("ix_place_city_price", "city_id", "price_per_night"),
+    )
+
     id: so.Mapped[str] = sa.Column(sa.String(255), primary_key=True)
     name: so.Mapped[str] = sa.Column(sa.String(255), nullable=False)
     description: so.Mapped[Optional[str]] = sa.Column(
@@ -31,10 +90,31 @@ class Place(Base, db.Model):
     city_id: so.Mapped[str] = sa.Column(
         sa.String(255), sa.ForeignKey("city.id"), nullable=False
     )
-    price_per_night: so.Mapped[int] = sa.Column(sa.Integer, nullable=False)
+    price_per_night: so.Mapped[int] = sa.Column(
+        sa.Integer, nullable=False, index=True
+    )
     number_of_rooms: so.Mapped[int] = sa.Column(sa.Integer, nullable=False)
     number_of_bathrooms: so.Mapped[int] = sa.Column(sa.Integer, nullable=False)
-    max_guests: so.Mapped[int] = sa.Column(sa.Integer, nullable=False)
+    max_guests: so.Mapped[int] = sa.Column(
+        sa.Integer, nullable=False, index=True
+    )
+
+    # Aggregates of the ratings of the reviews of the place, kept up to
+    # date by the writes of the reviews
+    review_count: so.Mapped[int] = sa.Column(
+        sa.Integer, nullable=False, default=0, server_default="0"
+    )
+    rating_sum: so.Mapped[float] = sa.Column(
+        sa.Float, nullable=False, default=0.0, server_default="0"
+    )
+    rating_min: so.Mapped[Optional[float]] = sa.Column(sa.Float)
+    rating_max: so.Mapped[Optional[float]] = sa.Column(sa.Float)
+    rating_average: so.Mapped[Optional[float]] = sa.Column(
+        sa.Float, index=True
+    )
+    rating_histogram: so.Mapped[list] = sa.Column(
+        sa.JSON, nullable=False, default=lambda: [0] * RATING_BUCKETS
+    )
 
     host = so.relationship("User", backref="places")
     city = so.relationship("City", backref="places")
@@ -43,6 +123,8 @@ class Place(Base, db.Model):
         """Dummy init"""
         super().__init__(**kw)
 
+        self.reset_ratings()
+
         if not data:
             return
 
@@ -80,6 +162,12 @@ class Place(Base, db.Model):
             "number_of_rooms": self.number_of_rooms,
             "number_of_bathrooms": self.number_of_bathrooms,
             "max_guests": self.max_guests,
+            "review_count": self.review_count,
+            "rating_sum": self.rating_sum,
+            "rating_average": self.rating_average,
+            "rating_min": self.rating_min,
+            "rating_max": self.rating_max,
+            "rating_histogram": self.rating_histogram,
             "created_at": self.created_at.isoformat(),
             "updated_at": self.updated_at.isoformat(),
             "host": self.host.to_dict(),
@@ -90,6 +178,120 @@ class Place(Base, db.Model):
 
         return d
 
+    def ratings(self) -> tuple:
+        """The rating aggregates of the place, in `RATING_FIELDS` order"""
+        return tuple(getattr(self, field) for field in RATING_FIELDS)
+
+    def reset_ratings(self) -> None:
+        """Sets the rating aggregates of a place without reviews"""
+        self.review_count = 0
+        self.rating_sum = 0.0
+        self.rating_min = None
+        self.rating_max = None
+        self.rating_average = None
+        self.rating_histogram = [0] * RATING_BUCKETS
+
+    def recount_ratings(self) -> None:
+        """Counts the ratings of the stored reviews of the place again"""
+        self.reset_ratings()
+
+        for review in repo.find_by("Review", place_id=self.id):
+            self.add_rating(review.rating)
+
+    def add_rating(self, rating: float) -> None:
+        """Counts the rating of a new review of the place"""
+        histogram = list(self.rating_histogram or [0] * RATING_BUCKETS)
+        histogram[rating_bucket(rating)] += 1
+
+        # A new list, so the database notices the change
+        self.rating_histogram = histogram
+        self.review_count = (self.review_count or 0) + 1
+        self.rating_sum = (self.rating_sum or 0.0) + rating
+        self.rating_average = self.rating_sum / self.review_count
+        self.rating_min = (
+            rating if self.rating_min is None else min(self.rating_min, rating)
+        )
+        self.rating_max = (
+            rating if self.rating_max is None else max(self.rating_max, rating)
+        )
+
+    def remove_rating(self, rating: float) -> None:
+        """
+        Discounts the rating of a review that was deleted. The reviews
+        left are only read when it was the lowest or the highest one
+        """
+        if (self.review_count or 0) <= 1:
+            self.reset_ratings()
+            return
+
+        histogram = list(self.rating_histogram)
+        histogram[rating_bucket(rating)] -= 1
+
+        self.rating_histogram = histogram
+        self.review_count -= 1
+        self.rating_sum -= rating
+        self.rating_average = self.rating_sum / self.review_count
+
+        if rating in (self.rating_min, self.rating_max):
+            ratings = [
+                review.rating
+                for review in repo.find_by("Review", place_id=self.id)
+            ]
+            self.rating_min = min(ratings, default=None)
+            self.rating_max = max(ratings, default=None)
+
+    @classmethod
+    def rebuild_aggregates(cls, repository: Any) -> list["Place"]:
+        """
+        Computes the rating aggregates of every place from its reviews
+        in `repository`, and returns the places whose aggregates were
+        off (so the caller can persist them)
+
+        Only the fields are read, the places that are right aren't
+        loaded, which keeps the lazy loading of the file repositories
+        """
+        if "Review" not in repository.models:
+            return []
+
+        stored = {
+            place_id: tuple(aggregates)
+            for place_id, *aggregates in repository.iter_values(
+                cls.__name__, ("id",) + RATING_FIELDS
+            )
+        }
+
+        if not stored:
+            return []
+
+        ratings: dict[str, list[float]] = {}
+
+        for place_id, rating in repository.iter_values(
+            "Review", ("place_id", "rating")
+        ):
+            ratings.setdefault(place_id, []).append(rating)
+
+        expected = Place()
+        off = []
+
+        for place_id, aggregates in stored.items():
+            expected.reset_ratings()
+
+            for rating in ratings.get(place_id, ()):
+                expected.add_rating(rating)
+
+            if not same_ratings(aggregates, expected.ratings()):
+                off.append(place_id)
+
+        changed = repository.get_many(cls.__name__, off)
+
+        for place in changed:
+            place.reset_ratings()
+
+            for rating in ratings.get(place.id, ()):
+                place.add_rating(rating)
+
+        return changed
+
     @staticmethod
     def create(data: dict) -> "Place":
         """Create a new place"""
@@ -109,12 +311,76 @@ class Place(Base, db.Model):
 
         return new_place
 
+    @staticmethod
+    def create_many(items: list[dict]) -> list["Place | ValueError"]:
+        """
+        Create many places, checking every host and city with a query
+        per chunk of ids instead of a lookup per place
+
+        Returns the new place of each item, or the ValueError of the
+        ones that couldn't be created
+        """
+        users = User.get_many({item["host_id"] for item in items})
+        cities = City.get_many({item["city_id"] for item in items})
+        results: list = []
+
+        for item in items:
+            if item["host_id"] not in users:
+                results.append(
+                    ValueError(f"User with ID {item['host_id']} not found")
+                )
+            elif item["city_id"] not in cities:
+                results.append(
+                    ValueError(f"City with ID {item['city_id']} not found")
+                )
+            else:
+                place = Place(data=item)
+                # Already loaded, `to_dict` doesn't have to look it up
+                host = users[item["host_id"]]
+                so.attributes.set_committed_value(place, "host", host)
+                results.append(place)
+
+        save_in_chunks([r for r in results if isinstance(r, Place)])
+
+        return results
+
+    @staticmethod
+    def search(
+        criteria: dict,
+        order_by: "str | list[str] | None" = None,
+        limit: int | None = None,
+        offset: int = 0,
+        load: tuple = (),
+    ) -> list["Place"]:
+        """
+        Get the places meeting the criteria of `SEARCH_FILTERS`, and
+        `country_code`, which is looked up as the ids of the cities of
+        that country
+        """
+        filters = {
+            SEARCH_FILTERS[name]: value
+            for name, value in criteria.items()
+            if name in SEARCH_FILTERS and value is not None
+        }
+
+        if criteria.get("country_code") is not None:
+            filters["city_id__in"] = [
+                city.id
+                for city in City.find_by(country_code=criteria["country_code"])
+            ]
+
+        return Place.get_all(filters, order_by, limit, offset, load)
+
     @staticmethod
     def update(place: "Place", data: dict) -> "Place":
-        """Update an existing place"""
+        """
+        Update an existing place, the rating aggregates are left alone
+        since they're only derived from the reviews
+        """
 
         for key, value in data.items():
-            setattr(place, key, value)
+            if key not in RATING_FIELDS:
+                setattr(place, key, value)
 
         repo.update(place)
 
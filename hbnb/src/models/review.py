@@ -2,7 +2,10 @@
 Review related functionality
 """
 
-from src.models.base import Base
+from contextlib import contextmanager
+from typing import Iterable, Iterator
+
+from src.models.base import Base, save_in_chunks
 from src.models.place import Place
 from src.models.user import User
 from src import repo, db
@@ -11,15 +14,36 @@ import sqlalchemy as sa
 import sqlalchemy.orm as so
 
 
+@contextmanager
+def rating_transaction(places: Iterable[Place]) -> Iterator[None]:
+    """
+    Runs a transaction that changes the ratings of some places
+
+    If it fails their ratings are counted again from the reviews that
+    are stored, the repositories that keep the objects in memory can't
+    undo the changes made to them
+    """
+    try:
+        with repo.transaction():
+            yield
+    except BaseException:
+        for place in places:
+            place.recount_ratings()
+        raise
+
+
 class Review(Base, db.Model):
     """Review representation"""
 
+    __indexes__ = ["place_id", "user_id"]
+    __search__ = ("comment",)
+
     id: so.Mapped[str] = sa.Column(sa.String(255), primary_key=True)
     place_id: so.Mapped[str] = sa.Column(
-        sa.String(255), sa.ForeignKey("place.id"), nullable=False
+        sa.String(255), sa.ForeignKey("place.id"), nullable=False, index=True
     )
     user_id: so.Mapped[str] = sa.Column(
-        sa.String(255), sa.ForeignKey("user.id"), nullable=False
+        sa.String(255), sa.ForeignKey("user.id"), nullable=False, index=True
     )
     comment: so.Mapped[str] = sa.Column(sa.String(255), nullable=False)
     rating: so.Mapped[float] = sa.Column(sa.Float, nullable=False)
@@ -68,16 +92,107 @@ class Review(Base, db.Model):
 
         new_review = Review(**data)
 
-        repo.save(new_review)
+        with rating_transaction([place]):
+            repo.save(new_review)
+            place.add_rating(new_review.rating)
+            repo.update(place)
 
         return new_review
 
+    @staticmethod
+    def create_many(items: list[dict]) -> list["Review | ValueError"]:
+        """
+        Create many reviews, checking every user and place with a query
+        per chunk of ids instead of a lookup per review
+
+        Returns the new review of each item, or the ValueError of the
+        ones that couldn't be created
+        """
+        users = User.get_many({item["user_id"] for item in items})
+        places = Place.get_many({item["place_id"] for item in items})
+        results: list = []
+
+        for item in items:
+            if item["user_id"] not in users:
+                results.append(
+                    ValueError(f"User with ID {item['user_id']} not found")
+                )
+            elif item["place_id"] not in places:
+                results.append(
+                    ValueError(f"Place with ID {item['place_id']} not found")
+                )
+            else:
+                results.append(Review(**item))
+
+        reviews = [r for r in results if isinstance(r, Review)]
+        rated = {}
+
+        with rating_transaction(rated.values()):
+            for review in reviews:
+                place = places[review.place_id]
+                place.add_rating(review.rating)
+                rated[place.id] = place
+
+            save_in_chunks(reviews)
+
+            if rated:
+                repo.update_many(list(rated.values()))
+
+        return results
+
     @staticmethod
     def update(review: "Review", data: dict) -> "Review":
-        """Update an existing review"""
+        """
+        Update an existing review, and the ratings of its place (of
+        both places if the review is moved to another one)
+        """
+        place_id = data.get("place_id", review.place_id)
+        moved = place_id != review.place_id
+        new_place: Place | None = Place.get(place_id) if moved else None
+
+        if moved and not new_place:
+            raise ValueError(f"Place with ID {place_id} not found")
+
+        previous, previous_place_id = review.rating, review.place_id
+
         for key, value in data.items():
             setattr(review, key, value)
 
-        repo.update(review)
+        changed = moved or review.rating != previous
+        place = Place.get(previous_place_id) if changed else None
+        new_place = new_place or place
+        rated = {p.id: p for p in (place, new_place) if p}
+
+        with rating_transaction(rated.values()):
+            repo.update(review)
+
+            if place:
+                place.remove_rating(previous)
+            if new_place:
+                new_place.add_rating(review.rating)
+
+            if rated:
+                repo.update_many(list(rated.values()))
 
         return review
+
+    @classmethod
+    def delete(cls, id_or_obj) -> bool:
+        """Delete a review, and discount it from the ratings of its place"""
+        review = (
+            cls.get(id_or_obj) if isinstance(id_or_obj, str) else id_or_obj
+        )
+
+        if not review:
+            return False
+
+        place = Place.get(review.place_id)
+
+        with rating_transaction([place] if place else []):
+            deleted = repo.delete(review)
+
+            if deleted and place:
+                place.remove_rating(review.rating)
+                repo.update(place)
+
+        return deleted
@@ -3,7 +3,7 @@ User related functionality
 """
 
 from src.models.base import Base
-from src import repo, db, bcrypt
+from src import repo, db, passwords
 
 import sqlalchemy as sa
 import sqlalchemy.orm as so
@@ -11,6 +11,9 @@ import sqlalchemy.orm as so
 
 class User(Base, db.Model):
     """User representation"""
+
+    __indexes__ = ["email"]
+
     id: so.Mapped[str] = sa.Column(sa.String(255), primary_key=True)
     email: so.Mapped[str] = sa.Column(sa.String(255), nullable=False, unique=True)
     password: so.Mapped[str] = sa.Column(sa.String(255), nullable=False)
@@ -58,11 +61,8 @@ class User(Base, db.Model):
     @staticmethod
     def create(user: dict) -> "User":
         """Create a new user"""
-        users: list["User"] = User.get_all()
-
-        for u in users:
-            if u.email == user["email"]:
-                raise ValueError("User already exists")
+        if User.find_one_by(email=user["email"]):
+            raise ValueError("User already exists")
 
         new_user = User(**user)
 
@@ -92,14 +92,8 @@ class User(Base, db.Model):
     @staticmethod
     def get_by_email(email: str) -> "User | None":
         """Get a user by email"""
-        users: list["User"] = User.get_all()
-
-        for user in users:
-            if user.email == email:
-                return user
-
-        return None
+        return User.find_one_by(email=email)
 
     def set_password(self, password: str) -> None:
         """Set the password"""
-        self.password = bcrypt.generate_password_hash(password).decode("utf-8")
+        self.password = passwords.hash(password)
@@ -0,0 +1,195 @@
+"""
+Bounded thread pool for the bcrypt hashing and checks of passwords
+
+Hashing or checking a password at `BCRYPT_LOG_ROUNDS = 12` takes a few
+hundred milliseconds of CPU. Running them in `PASSWORD_POOL_WORKERS`
+threads caps how many run at once, so a burst of logins can't take
+every CPU the other endpoints need. bcrypt releases the GIL while it
+works, so the request threads keep serving the rest of the API in the
+meantime.
+
+At most `PASSWORD_POOL_MAX_QUEUE` more calls wait for a free thread.
+Past that `PasswordPoolFull` is raised, which answers the request with
+a 503 and a `Retry-After` header right away instead of queueing it. The
+controllers that expect it return `as_response`, so the rejections
+aren't logged as server errors.
+
+`PasswordPool.stats` returns how busy the pool is and how long hashes,
+checks and the waits for a thread take.
+"""
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
+from typing import Any, Callable, Optional
+
+from flask import Flask
+from werkzeug.exceptions import ServiceUnavailable
+
+# Operations the pool times, and the waits for a free thread
+TIMINGS = ("hash", "check", "wait")
+
+# Latest operations of each kind the timings are computed from
+SAMPLES = 1000
+
+
+class PasswordPoolFull(ServiceUnavailable):
+    """Every thread of the pool is busy and its queue is full"""
+
+    description = "Too many password checks at once, try again later"
+
+    def as_response(self) -> tuple[dict, int, dict]:
+        """The 503 response of the rejected request"""
+        return (
+            {"message": self.description},
+            self.code,
+            {"Retry-After": str(self.retry_after)},
+        )
+
+
+class PasswordPool:
+    """Runs the password hashing and checks of the Flask App"""
+
+    def __init__(self) -> None:
+        """Creates a pool without threads, `init_app` configures it"""
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self.bcrypt: Any = None
+        self.workers = 0
+        self.max_queue = 0
+        self.retry_after = 1
+        self._reset()
+
+    def init_app(self, app: Flask, bcrypt: Any) -> None:
+        """Starts the threads of the pool with the settings of the app"""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+
+            self.bcrypt = bcrypt
+            self.workers = app.config.get("PASSWORD_POOL_WORKERS", 2)
+            self.max_queue = app.config.get("PASSWORD_POOL_MAX_QUEUE", 16)
+            self.retry_after = app.config.get("PASSWORD_POOL_RETRY_AFTER", 1)
+            self._executor = ThreadPoolExecutor(
+                self.workers, thread_name_prefix="password"
+            )
+            self._reset()
+
+    def _reset(self) -> None:
+        """Resets the counters and the timings"""
+        self._in_flight = 0
+        self._running = 0
+        self._busy = 0.0
+        self._started = time.monotonic()
+        self._completed = dict.fromkeys(TIMINGS[:2], 0)
+        self._rejected = 0
+        self._timings = {
+            name: deque(maxlen=SAMPLES) for name in TIMINGS
+        }
+
+    def hash(self, password: str) -> str:
+        """Returns the bcrypt hash of a password"""
+        hashed = self._run(
+            "hash", self.bcrypt.generate_password_hash, password
+        )
+
+        return hashed.decode("utf-8")
+
+    def check(self, hashed: str, password: str) -> bool:
+        """Whether a password matches its bcrypt hash"""
+        return self._run(
+            "check", self.bcrypt.check_password_hash, hashed, password
+        )
+
+    def _run(self, name: str, function: Callable, *args) -> Any:
+        """
+        Runs a function in the pool and waits for its result, raises
+        `PasswordPoolFull` if there's no room for it
+        """
+        if self._executor is None:
+            return function(*args)
+
+        with self._lock:
+            if self._in_flight >= self.workers + self.max_queue:
+                self._rejected += 1
+                raise PasswordPoolFull(retry_after=self.retry_after)
+
+            self._in_flight += 1
+
+        submitted = time.perf_counter()
+
+        def task() -> Any:
+            """Runs the function and records how long it took"""
+            started = time.perf_counter()
+
+            with self._lock:
+                self._running += 1
+
+            try:
+                return function(*args)
+            finally:
+                finished = time.perf_counter()
+
+                with self._lock:
+                    self._running -= 1
+                    self._busy += finished - started
+                    self._completed[name] += 1
+                    self._timings[name].append(finished - started)
+                    self._timings["wait"].append(started - submitted)
+
+        try:
+            return self._executor.submit(task).result()
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+    def stats(self) -> dict:
+        """
+        Returns the load of the pool and the timings, in milliseconds,
+        of its latest operations
+
+        `utilization` is the share of the time of the threads spent
+        working since the pool started
+        """
+        with self._lock:
+            capacity = (time.monotonic() - self._started) * self.workers
+            timings = {
+                name: summarize(samples)
+                for name, samples in self._timings.items()
+            }
+
+            return {
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+                "running": self._running,
+                "queued": self._in_flight - self._running,
+                "completed": dict(self._completed),
+                "rejected": self._rejected,
+                "utilization": (
+                    round(self._busy / capacity, 4) if capacity else 0.0
+                ),
+                "latency_ms": timings,
+            }
+
+
+def summarize(samples: deque) -> dict:
+    """Count, mean, median, 95th percentile and maximum, in ms"""
+    if not samples:
+        return {"count": 0}
+
+    ordered = sorted(samples)
+
+    def percentile(share: float) -> float:
+        """Sample below which a share of the samples are, in ms"""
+        position = min(len(ordered) - 1, int(share * len(ordered)))
+
+        return round(ordered[position] * 1000, 3)
+
+    return {
+        "count": len(ordered),
+        "mean": round(sum(ordered) / len(ordered) * 1000, 3),
+        "p50": percentile(0.5),
+        "p95": percentile(0.95),
+        "max": round(ordered[-1] * 1000, 3),
+    }
@@ -18,6 +18,10 @@ def get_repo(name: str):
         from src.persistence.pickled import PickleRepository
 
         return PickleRepository
+    elif name == Repos.SNAPSHOT.value:
+        from src.persistence.snapshot import SnapshotRepository
+
+        return SnapshotRepository
     else:
         from src.persistence.file import FileRepository
 
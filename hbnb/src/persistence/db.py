@@ -2,45 +2,564 @@
 DB Repository
 """
 
+from contextlib import contextmanager
+from datetime import datetime
+import heapq
+import operator
+from typing import Any, Iterable, Iterator, Optional, Sequence
+
 from src import db
 from src.models.base import Base
+from src.persistence import geo, query
 from src.persistence.repository import Repository
 
+import sqlalchemy as sa
+import sqlalchemy.orm as so
 from sqlalchemy.orm import Query
 
+# Amount of ids in each `IN (...)` clause, below the variable limit of
+# older SQLite versions
+IN_CHUNK_SIZE = 500
+
+# Amount of rows fetched at a time when iterating a whole model
+STREAM_BATCH_SIZE = 1000
+
+# Key of the session info set while a `transaction` block is running
+IN_TRANSACTION = "hbnb_in_transaction"
+
+# SQL expression of every filter operator of `src.persistence.query`,
+# `all` is answered by `_linked_to_all`
+OPERATORS = {
+    "eq": operator.eq,
+    "ne": operator.ne,
+    "lt": operator.lt,
+    "lte": operator.le,
+    "gt": operator.gt,
+    "gte": operator.ge,
+    "in": lambda column, values: column.in_(values),
+}
+
+
+def _sorted(column: sa.ColumnElement, descending: bool = False) -> Any:
+    """
+    ORDER BY term of a column that sorts null values like the in-memory
+    repositories do (see `query.sort`): first when ascending and last
+    when descending
+
+    MySQL can't spell it out, but already sorts null values that way
+    """
+    term = column.desc() if descending else column.asc()
+
+    if db.session.get_bind().dialect.name == "mysql":
+        return term
+
+    return term.nulls_last() if descending else term.nulls_first()
+
+
+def _after(column: sa.ColumnElement, value: Any) -> sa.ColumnElement:
+    """Condition of the values sorted after `value` by `_sorted`"""
+    return column.is_not(None) if value is None else column > value
+
 
 class DBRepository(Repository):
     """Dummy DB repository"""
 
-    def get_all(self, model_name: str) -> list:
-        """Returns all objects of a given model"""
+    def _column(self, model_name: str, field: str) -> sa.ColumnElement:
+        """Returns the column of a field, ValueError if there's none"""
+        column = sa.inspect(self.models[model_name]).columns.get(field)
+
+        if column is None:
+            raise ValueError(f"{model_name} has no field '{field}'")
+
+        return column
+
+    def _load_options(self, model_name: str, load: Iterable[str]) -> list:
+        """
+        Returns the loader options that fetch the relationships in
+        `load` with the objects, ValueError for unknown relationships
+
+        References to a single object are joined into the same query,
+        collections are fetched with one more `IN` query for every
+        object of the result
+        """
+        model = self.models[model_name]
+        relationships = sa.inspect(model).relationships
+        options = []
+
+        for name in load:
+            if name not in relationships:
+                raise ValueError(f"{model_name} has no relationship '{name}'")
+
+            loader = (
+                so.selectinload
+                if relationships[name].uselist
+                else so.joinedload
+            )
+            options.append(loader(getattr(model, name)))
+
+        return options
+
+    def _filtered(
+        self,
+        model_name: str,
+        filters: Optional[dict],
+        load: Iterable[str] = (),
+    ) -> Query:
+        """
+        Returns a query of the objects of a model matching `filters`,
+        loading the relationships in `load`
+        """
         result: Query = db.session.query(self.models[model_name])
 
+        if load:
+            result = result.options(*self._load_options(model_name, load))
+
+        for field, op, value in query.parse_filters(filters):
+            if op == "all":
+                condition = self._linked_to_all(model_name, field, value)
+            else:
+                column = self._column(model_name, field)
+                condition = OPERATORS[op](column, value)
+
+            result = result.filter(condition)
+
+        return result
+
+    def _linked_to_all(
+        self, model_name: str, field: str, values: Iterable
+    ) -> sa.ColumnElement:
+        """
+        Condition of the objects linked to every one of the values
+        through a link of the model (see `Repository.link`)
+
+        The owners are found grouping the link table by owner and
+        counting the members among the values, which the index on
+        `(member, owner)` of the link table answers without reading it
+        """
+        link_model, owner, member = self.link(model_name, field)
+        values = set(values)
+
+        if not values:
+            return sa.true()
+
+        owner_column = self._column(link_model, owner)
+        member_column = self._column(link_model, member)
+        owners = (
+            sa.select(owner_column)
+            .where(member_column.in_(values))
+            .group_by(owner_column)
+            .having(sa.func.count(sa.distinct(member_column)) == len(values))
+        )
+
+        return sa.inspect(self.models[model_name]).primary_key[0].in_(owners)
+
+    def get_all(
+        self,
+        model_name: str,
+        filters: Optional[dict] = None,
+        order_by: "Optional[str | list[str]]" = None,
+        limit: Optional[int] = None,
+        offset: int = 0,
+        load: Iterable[str] = (),
+    ) -> list:
+        """
+        Returns the objects of a given model
+
+        The filters, ordering and pagination are compiled to the WHERE,
+        ORDER BY, LIMIT and OFFSET of the query
+        """
+        result = self._filtered(model_name, filters, load)
+
+        for field, descending in query.parse_order(order_by):
+            column = self._column(model_name, field)
+            result = result.order_by(_sorted(column, descending))
+
+        if offset:
+            result = result.offset(offset)
+        if limit is not None:
+            result = result.limit(limit)
+
+        return result.all()
+
+    def get_page(
+        self,
+        model_name: str,
+        filters: Optional[dict] = None,
+        after: Optional[tuple] = None,
+        limit: Optional[int] = None,
+        load: Iterable[str] = (),
+    ) -> list:
+        """
+        Returns a page of the objects of a given model
+
+        The page starts with a range condition on the ordering columns
+        (`created_at > ? OR (created_at = ? AND id > ?)`), which the
+        index on `created_at` answers without reading the previous pages
+        """
+        result = self._page_query(model_name, filters, after, load)
+
+        if limit is not None:
+            result = result.limit(limit)
+
         return result.all()
 
-    def get(self, model_name: str, obj_id: str) -> Base | None:
+    def iter_all(
+        self,
+        model_name: str,
+        filters: Optional[dict] = None,
+        load: Iterable[str] = (),
+    ) -> Iterator:
+        """
+        Iterates the objects of a given model in the order of pages
+
+        Rows are fetched `STREAM_BATCH_SIZE` at a time while they are
+        consumed, the session must stay open until the end
+        """
+        result = self._page_query(model_name, filters, None, load)
+
+        return iter(result.yield_per(STREAM_BATCH_SIZE))
+
+    def iter_values(
+        self, model_name: str, fields: Sequence[str]
+    ) -> Iterator[tuple]:
+        """
+        Iterates the values of some columns of every row of a model,
+        without building the objects
+        """
+        columns = [self._column(model_name, field) for field in fields]
+        result = db.session.query(*columns).yield_per(STREAM_BATCH_SIZE)
+
+        return (tuple(row) for row in result)
+
+    def _page_query(
+        self,
+        model_name: str,
+        filters: Optional[dict],
+        after: Optional[tuple],
+        load: Iterable[str],
+    ) -> Query:
+        """
+        Returns the query of the objects of a model after `after`,
+        sorted by the ordering of the model
+        """
+        columns = [
+            self._column(model_name, field)
+            for field in self.ordering(model_name)
+        ]
+        result = self._filtered(model_name, filters, load)
+
+        if after is not None:
+            result = result.filter(
+                sa.or_(
+                    *(
+                        sa.and_(
+                            *(
+                                column == value
+                                for column, value in zip(columns[:i], after)
+                            ),
+                            _after(columns[i], after[i]),
+                        )
+                        for i in range(len(columns))
+                    )
+                )
+            )
+
+        return result.order_by(*(_sorted(column) for column in columns))
+
+    def get(
+        self, model_name: str, obj_id: str, load: Iterable[str] = ()
+    ) -> Base | None:
         """Returns an object by its ID"""
-        result = db.session.get(self.models[model_name], obj_id)
+        result = db.session.get(
+            self.models[model_name],
+            obj_id,
+            options=self._load_options(model_name, load),
+        )
+
+        return result
+
+    def get_many(
+        self, model_name: str, ids: Iterable[str], load: Iterable[str] = ()
+    ) -> list:
+        """Returns the objects with the given IDs, a query per chunk"""
+        model = self.models[model_name]
+        key = sa.inspect(model).primary_key[0]
+        options = self._load_options(model_name, load)
+        ids = list(dict.fromkeys(ids))
+        result = []
+
+        for start in range(0, len(ids), IN_CHUNK_SIZE):
+            result.extend(
+                db.session.query(model)
+                .filter(key.in_(ids[start:start + IN_CHUNK_SIZE]))
+                .options(*options)
+                .all()
+            )
 
         return result
 
+    def near(
+        self,
+        model_name: str,
+        latitude: float,
+        longitude: float,
+        radius_km: float,
+        limit: Optional[int] = None,
+        load: Iterable[str] = (),
+    ) -> list:
+        """
+        Returns the objects around a point, the closest first
+
+        Only the ids and locations of the rows inside the bounding box of
+        the circle are read, through the index on the location columns.
+        Their exact distance is measured here, and only the objects that
+        make the result are loaded
+        """
+        lat_field, lon_field = self.location(model_name)
+        model = self.models[model_name]
+        key = sa.inspect(model).primary_key[0]
+        lat = self._column(model_name, lat_field)
+        lon = self._column(model_name, lon_field)
+        latitudes, longitudes = geo.bounding_box(
+            latitude, longitude, radius_km
+        )
+
+        rows = db.session.query(key, lat, lon).filter(
+            lat.between(*latitudes),
+            sa.or_(*(lon.between(*bounds) for bounds in longitudes)),
+        )
+        found = []
+
+        for obj_id, obj_lat, obj_lon in rows:
+            distance = geo.haversine(latitude, longitude, obj_lat, obj_lon)
+
+            if distance <= radius_km:
+                found.append((distance, obj_id))
+
+        found = (
+            sorted(found) if limit is None else heapq.nsmallest(limit, found)
+        )
+        objs = {
+            getattr(obj, key.key): obj
+            for obj in self.get_many(
+                model_name, [obj_id for _, obj_id in found], load
+            )
+        }
+
+        return [
+            (objs[obj_id], distance)
+            for distance, obj_id in found
+            if obj_id in objs
+        ]
+
+    def state(self, model_name: str) -> Optional[str]:
+        """
+        Returns the amount of objects of a model and the latest
+        `updated_at` of them, which change with every write of any
+        process (a delete changes the amount, a save or an update the
+        latest `updated_at`)
+
+        Models without `updated_at` are read-only catalogs every process
+        loads the same way (like the countries), so the manager falls
+        back to the version of this process for them
+        """
+        model = self.models[model_name]
+        updated_at = sa.inspect(model).columns.get("updated_at")
+
+        if updated_at is None:
+            return None
+
+        row = db.session.execute(
+            sa.select(sa.func.count(), sa.func.max(updated_at))
+        ).one()
+
+        return ".".join(str(value) for value in row)
+
     def reload(self) -> None:
         """Not needed"""
 
+    def upgrade(self) -> list[str]:
+        """
+        Adds the columns and indexes of the models missing from tables
+        created by an older version (`create_all` only creates the
+        missing tables), and returns the columns added as "table.column"
+
+        Columns are added with their server default. Required columns
+        without one are added as nullable, so the rows already stored
+        can take them, and are filled in by the callers (for example
+        with `rebuild_aggregates`)
+        """
+        engine = db.engine
+        preparer = engine.dialect.identifier_preparer
+        inspector = sa.inspect(engine)
+        added = []
+
+        with engine.begin() as connection:
+            for model in self.models.values():
+                table = getattr(model, "__table__", None)
+
+                if table is None or not inspector.has_table(table.name):
+                    continue
+
+                name = table.name
+                columns = {c["name"] for c in inspector.get_columns(name)}
+                indexes = {i["name"] for i in inspector.get_indexes(name)}
+
+                for column in table.columns:
+                    if column.name in columns:
+                        continue
+
+                    ddl = (
+                        f"ALTER TABLE {preparer.format_table(table)} "
+                        f"ADD COLUMN {preparer.format_column(column)} "
+                        f"{column.type.compile(dialect=engine.dialect)}"
+                    )
+
+                    if column.server_default is not None:
+                        ddl += f" DEFAULT '{column.server_default.arg}'"
+
+                        if not column.nullable:
+                            ddl += " NOT NULL"
+
+                    connection.execute(sa.text(ddl))
+                    added.append(f"{name}.{column.name}")
+
+                for index in table.indexes:
+                    if index.name not in indexes:
+                        index.create(connection)
+
+        return added
+
     def save(self, obj: Base) -> None:
         """Save an object to the repository"""
         db.session.add(obj)
-        db.session.commit()
+        self._commit()
 
     def update(self, obj: Base) -> Base | None:
         """Update an object in the repository"""
-        db.session.commit()
+        if hasattr(obj, "updated_at"):
+            obj.updated_at = datetime.now()
+
+        self._commit()
 
         return obj
 
     def delete(self, obj: Base) -> bool:
         """Delete an object from the repository"""
         db.session.delete(obj)
-        db.session.commit()
+        self._commit()
 
         return True
+
+    def _commit(self) -> None:
+        """
+        Commits the session, rolling it back if the commit fails
+
+        Inside `transaction` the changes are only flushed, so they are
+        committed together at its end
+        """
+        if db.session.info.get(IN_TRANSACTION):
+            db.session.flush()
+            return
+
+        try:
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """
+        Groups the writes made inside the block in one transaction,
+        committed at the end of the block or rolled back if it raises
+
+        Nested blocks join the outer transaction
+        """
+        info = db.session.info
+
+        if info.get(IN_TRANSACTION):
+            yield
+            return
+
+        info[IN_TRANSACTION] = True
+
+        try:
+            yield
+        except BaseException:
+            info.pop(IN_TRANSACTION, None)
+            db.session.rollback()
+            raise
+
+        info.pop(IN_TRANSACTION, None)
+        self._commit()
+
+    def save_many(self, objs: Iterable[Base]) -> list:
+        """
+        Save many objects in a single transaction
+
+        The objects already have their ids, so the session inserts them
+        with one executemany per table instead of a statement each
+        """
+        objs = list(objs)
+        db.session.add_all(objs)
+        self._commit()
+
+        return objs
+
+    def update_many(self, objs: Iterable[Base]) -> list:
+        """
+        Update many objects in a single transaction, they all get the
+        same `updated_at`
+        """
+        objs = list(objs)
+        now = datetime.now()
+
+        for obj in objs:
+            if hasattr(obj, "updated_at"):
+                obj.updated_at = now
+
+        self._commit()
+
+        return objs
+
+    def _load_relationships(self, objs: list[Base]) -> None:
+        """
+        Loads the relationships of many objects with a query per chunk
+        of ids, instead of the query per object the session would run
+        to update the related rows when the objects are deleted
+        """
+        by_model: dict[type, list] = {}
+
+        for obj in objs:
+            by_model.setdefault(type(obj), []).append(obj)
+
+        for model, group in by_model.items():
+            mapper = sa.inspect(model)
+
+            if not mapper.relationships or len(mapper.primary_key) != 1:
+                continue
+
+            key = mapper.primary_key[0]
+            ids = [
+                state.identity[0]
+                for state in map(sa.inspect, group)
+                if state.identity
+            ]
+
+            for start in range(0, len(ids), IN_CHUNK_SIZE):
+                db.session.query(model).filter(
+                    key.in_(ids[start:start + IN_CHUNK_SIZE])
+                ).options(so.selectinload("*")).populate_existing().all()
+
+    def delete_many(self, objs: Iterable[Base]) -> int:
+        """Delete many objects in a single transaction"""
+        objs = list(objs)
+        self._load_relationships(objs)
+
+        for obj in objs:
+            db.session.delete(obj)
+
+        self._commit()
+
+        return len(objs)
@@ -3,52 +3,298 @@ This module exports a Repository that persists data in a JSON file
 """
 
 from datetime import datetime
+from functools import partial
 import json
-from typing import Optional
+import os
+import threading
+from typing import Iterable, Optional
+
+import sqlalchemy as sa
+import sqlalchemy.orm as so
 
-from flask import current_app
 from src.models.base import Base
-from src.persistence.repository import Repository
-from utils.constants import FILE_STORAGE_FILENAME
+from src.persistence.flusher import WriteBehindFlusher
+from src.persistence.memory import MemoryRepository
+from src.persistence.table import Table
+from utils.constants import FILE_STORAGE_FILENAME, FILE_STORAGE_JOURNAL_SUFFIX
+
+
+class FileRepository(MemoryRepository):
+    """
+    File Repository
 
+    Keeps the objects in memory like the MemoryRepository and writes
+    them to a JSON file after every change.
 
-class FileRepository(Repository):
-    """File Repository"""
+    In journal mode (`FILE_STORAGE_JOURNAL`) every change is appended as
+    one JSON Lines record to a journal next to the JSON file, so a write
+    costs as much as the changed object and not the whole dataset.
+    `reload` replays the journal on top of the JSON file, and `compact`
+    folds the journal back into the JSON file.
+
+    `reload` only keeps the records read from the files, every object is
+    built the first time it's accessed (by id, through `find_by` or
+    while iterating `get_all`) and kept in its table from then on.
+    Records that are never accessed are written back as they were read.
+
+    In write-behind mode (`STORAGE_WRITE_BEHIND`) changes are persisted
+    by a WriteBehindFlusher, so many requests share one write. `flush`
+    blocks until the changes made so far are on disk.
+    """
 
     __filename = FILE_STORAGE_FILENAME
 
     def __init__(self, filename: Optional[str] = None, *args, **kw) -> None:
         """Calls reload method"""
-        super().__init__(*args, **kw)
-
         if filename:
             self.__filename = filename
 
-        self.reload()
+        self._lock = threading.RLock()
+        self._file_lock = threading.Lock()
+        self._compacting = False
+        self._serial = 0
+        self._written_serial = 0
+        self._pending_records: list[dict] = []
+        self.flusher: Optional[WriteBehindFlusher] = None
+
+        super().__init__(*args, **kw)
+
+        self.flusher = WriteBehindFlusher.from_config(self.config, self._flush)
+
+    @property
+    def filename(self) -> str:
+        """Path of the file the data is stored in"""
+        return self.__filename
+
+    @property
+    def journal(self) -> bool:
+        """Whether changes are appended to the journal"""
+        return bool(self.config.get("FILE_STORAGE_JOURNAL", False))
+
+    @property
+    def journal_filename(self) -> str:
+        """Path of the journal file"""
+        return (
+            os.path.splitext(self.__filename)[0] + FILE_STORAGE_JOURNAL_SUFFIX
+        )
+
+    def files(self) -> list[str]:
+        """Paths of the data file and of the journal"""
+        return [self.filename, self.journal_filename]
+
+    def _new_table(self, model_name: str, objects=()) -> Table:
+        """Creates a table that builds its objects from raw records"""
+        model = self.models.get(model_name)
+        mapper = getattr(model, "__mapper__", None)
+
+        return Table(
+            getattr(model, "__indexes__", ()),
+            objects,
+            hydrate=partial(self._load_object, model_name),
+            id_field=mapper.primary_key[0].key if mapper else "id",
+            order=getattr(model, "__ordering__", ()),
+            location=getattr(model, "__location__", None),
+            ranges=getattr(model, "__ranges__", ()),
+            bitmap=getattr(model, "__bitmap__", None),
+        )
+
+    def _serialize(self) -> dict:
+        """Returns the data of every model as dictionaries"""
+        return {
+            k: self._table(k).records(lambda obj: obj.to_dict())
+            for k in self._data
+        }
+
+    def _serialize_numbered(self) -> tuple[int, dict]:
+        """
+        Serializes the data, numbering the snapshot so an older one is
+        never written over a newer one. Has to be called with the lock
+        """
+        self._serial += 1
+
+        return self._serial, self._serialize()
+
+    def _store(self, number: int, serialized: dict) -> None:
+        """
+        Writes a numbered snapshot of the data, unless a newer one was
+        written already, so writes can't land out of order
+        """
+        with self._file_lock:
+            if number < self._written_serial:
+                return
+
+            self._write_file(serialized)
+            self._written_serial = number
+
+    def _write_file(self, serialized: dict) -> None:
+        """
+        Writes the serialized data to the JSON file
+
+        The data is written to a temporary file first and then renamed,
+        so a crash never leaves a half written file behind
+        """
+        tmp_filename = f"{self.__filename}.tmp"
+
+        with open(tmp_filename, "w") as file:
+            json.dump(serialized, file)
+            self._sync(file)
+
+        os.replace(tmp_filename, self.__filename)
+
+    def _sync(self, file) -> None:
+        """Forces the file to disk if `STORAGE_FSYNC` is enabled"""
+        if self.config.get("STORAGE_FSYNC", False):
+            file.flush()
+            os.fsync(file.fileno())
 
     def _save_to_file(self):
         """Helper method to save the current object data to the file"""
-        serialized = {
-            k: [v.to_dict() for v in l if type(v) is not dict]
-            for k, l in self._data.items()
+        with self._lock:
+            number, serialized = self._serialize_numbered()
+
+        self._store(number, serialized)
+
+    @staticmethod
+    def _journal_record(op: str, obj: Base) -> dict:
+        """Returns the journal record of a change"""
+        return {
+            "op": op,
+            "model": obj.__class__.__name__,
+            "data": {"id": obj.id} if op == "delete" else obj.to_dict(),
         }
 
-        with open(self.__filename, "w") as file:
-            json.dump(serialized, file)
+    def _append_to_journal(self, records: list[dict]) -> None:
+        """Appends records to the journal with a single write"""
+        if not records:
+            return
 
-    def get_all(self, model_name: str):
-        """Get all objects of a given model"""
-        return self._data.get(model_name, [])
+        lines = "".join(json.dumps(record) + "\n" for record in records)
+
+        with self._lock:
+            with open(self.journal_filename, "a") as file:
+                file.write(lines)
+                self._sync(file)
+
+            size = os.path.getsize(self.journal_filename)
+            max_size = self.config.get("FILE_STORAGE_JOURNAL_MAX_SIZE", 0)
+            compact = max_size and size > max_size and not self._compacting
+
+            if compact:
+                self._compacting = True
+
+        if compact:
+            threading.Thread(target=self.compact, daemon=True).start()
+
+    def _persist(self, op: str, objs: list[Base]) -> None:
+        """
+        Persists changes in the journal or in the JSON file, the changes
+        of a batch are written together
+        """
+        if self.journal:
+            records = [self._journal_record(op, obj) for obj in objs]
+
+            if self.flusher:
+                with self._lock:
+                    self._pending_records.extend(records)
+            else:
+                self._append_to_journal(records)
+        elif not self.flusher:
+            self._save_to_file()
+
+        if self.flusher:
+            self.flusher.mark_dirty(len(objs))
+
+    def _flush(self) -> None:
+        """
+        Writes the changes collected since the last flush, and keeps
+        them for the next one if the write fails
+        """
+        if not self.journal:
+            self._save_to_file()
+            return
 
-    def get(self, model_name: str, obj_id: str):
-        """Get an object by its ID"""
-        for obj in self.get_all(model_name):
-            if obj.id == obj_id:
-                return obj
-        return None
+        with self._lock:
+            records, self._pending_records = self._pending_records, []
+
+        try:
+            self._append_to_journal(records)
+        except Exception:
+            with self._lock:
+                self._pending_records[:0] = records
+            raise
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Blocks until every change made so far is persisted"""
+        if not self.flusher:
+            return True
+
+        return self.flusher.barrier(timeout)
+
+    def _load_object(self, model_name: str, item: dict) -> Base:
+        """
+        Builds a model instance from its dictionary
+
+        Mapped models are built without calling their constructor (which
+        would hash the stored password again, for example) by setting
+        their columns directly, the same way SQLAlchemy loads a row
+        """
+        model = self.models[model_name]
+        mapper = getattr(model, "__mapper__", None)
+
+        if mapper is None:
+            instance = model(**item)
+            columns = {"created_at": None, "updated_at": None}
+        else:
+            so.configure_mappers()
+            instance = mapper.class_manager.new_instance()
+            columns = {c.key: c for c in mapper.columns}
+
+        for key, column in columns.items():
+            if key not in item:
+                continue
+
+            value = item[key]
+
+            if isinstance(value, str) and (
+                key in ("created_at", "updated_at")
+                or isinstance(getattr(column, "type", None), sa.DateTime)
+            ):
+                value = datetime.fromisoformat(value) if value else value
+
+            setattr(instance, key, value)
+
+        return instance
+
+    def _replay_journal(self) -> None:
+        """
+        Applies the records of the journal on top of the loaded data
+
+        Records hold the whole state of the object, so replaying a record
+        that is already part of the JSON file (e.g. after a crash during
+        `compact`) leaves the data unchanged
+        """
+        try:
+            with open(self.journal_filename, "r") as file:
+                lines = file.readlines()
+        except FileNotFoundError:
+            return
+
+        for line in lines:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # The last record can be cut if the process died writing it
+                continue
+
+            table = self._table(record["model"])
+
+            if record["op"] == "delete":
+                table.remove(record["data"]["id"])
+            else:
+                table.load(record["data"])
 
     def reload(self):
-        """Reloads the data from the file"""
+        """Reloads the data from the file and replays the journal"""
         file_data = {}
         try:
             with open(self.__filename, "r") as file:
@@ -57,54 +303,109 @@ class FileRepository(Repository):
             self._save_to_file()
 
         for model, data in file_data.items():
+            table = self._table(model)
+
             for item in data:
-                instance: Base = self.models[model](**item)
+                table.load(item)
 
-                if "created_at" in item:
-                    instance.created_at = datetime.fromisoformat(
-                        item["created_at"],
-                    )
-                if "updated_at" in item:
-                    instance.updated_at = datetime.fromisoformat(
-                        item["updated_at"],
-                    )
+        self._replay_journal()
 
-                self.save(data=instance, save_to_file=False)
+    def compact(self) -> None:
+        """
+        Folds the journal into the JSON file
 
-    def save(self, data: Base, save_to_file=True):
-        """Save an object to the repository"""
-        model: str = data.__class__.__name__
+        The data is serialized while holding the lock, the JSON file is
+        written without it so writes can keep going to the journal, and
+        only the records appended meanwhile are kept in the journal.
+        """
+        try:
+            with self._lock:
+                number, serialized = self._serialize_numbered()
+                try:
+                    offset = os.path.getsize(self.journal_filename)
+                except FileNotFoundError:
+                    offset = 0
+
+            self._store(number, serialized)
+
+            with self._lock:
+                if not offset:
+                    return
+
+                with open(self.journal_filename, "rb") as file:
+                    file.seek(offset)
+                    tail = file.read()
 
-        if model not in self._data:
-            self._data[model] = []
+                tmp_filename = f"{self.journal_filename}.tmp"
 
-        self._data[model].append(data)
+                with open(tmp_filename, "wb") as file:
+                    file.write(tail)
+
+                os.replace(tmp_filename, self.journal_filename)
+        finally:
+            with self._lock:
+                self._compacting = False
+
+    def save(self, obj: Base, save_to_file=True):
+        """Save an object to the repository"""
+        with self._lock:
+            super().save(obj)
 
         if save_to_file:
-            self._save_to_file()
+            self._persist("save", [obj])
+
+        return obj
 
     def update(self, obj: Base):
         """Update an object in the repository"""
-        cls = obj.__class__.__name__
+        with self._lock:
+            if not super().update(obj):
+                return None
 
-        for i, o in enumerate(self._data[cls]):
-            if o.id == obj.id:
-                obj.updated_at = datetime.now()
-                self._data[cls][i] = obj
-                self._save_to_file()
-                return obj
+        self._persist("update", [obj])
 
-        return None
+        return obj
 
     def delete(self, obj: Base):
         """Delete an object from the repository"""
-        class_name = obj.__class__.__name__
+        with self._lock:
+            if not super().delete(obj):
+                return False
 
-        if obj not in self._data[class_name]:
-            return False
+        self._persist("delete", [obj])
 
-        self._data[class_name].remove(obj)
+        return True
 
-        self._save_to_file()
+    def save_many(self, objs: Iterable[Base], save_to_file=True) -> list:
+        """Save many objects with a single write"""
+        with self._lock:
+            objs = super().save_many(objs)
 
-        return True
+        if save_to_file and objs:
+            self._persist("save", objs)
+
+        return objs
+
+    def update_many(self, objs: Iterable[Base]) -> list:
+        """Update many objects with a single write"""
+        with self._lock:
+            updated = super().update_many(objs)
+
+        if updated:
+            self._persist("update", updated)
+
+        return updated
+
+    def delete_many(self, objs: Iterable[Base]) -> int:
+        """Delete many objects with a single write"""
+        deleted = []
+
+        with self._lock:
+            for obj in objs:
+                if super().delete(obj):
+                    deleted.append(obj)
+
+        if deleted:
+            self._persist("delete", deleted)
+
+        return len(deleted)
@@ -0,0 +1,198 @@
+"""
+This module exports the WriteBehindFlusher used by the repositories that
+persist their data in files
+"""
+
+import atexit
+from datetime import datetime
+import logging
+import threading
+import time
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class FlushFailed(RuntimeError):
+    """The latest flush failed, the pending changes aren't persisted"""
+
+
+class WriteBehindFlusher:
+    """
+    Persists the changes of a repository from a background thread
+
+    The repository calls `mark_dirty` after every change instead of
+    writing to disk, and the flusher calls `flush` once the oldest
+    pending change is `max_delay` seconds old or `max_batch` changes are
+    pending, whatever happens first. Every change made while a write is
+    being prepared shares that write.
+
+    `barrier` blocks until everything marked before the call has been
+    persisted, for the callers that need the change to be durable. A
+    failed flush is retried after `max_delay` (right away if there's a
+    `barrier` waiting), and `barrier` raises FlushFailed while the
+    flushes keep failing.
+    """
+
+    def __init__(
+        self,
+        flush: Callable[[], None],
+        max_delay: float = 0.05,
+        max_batch: int = 500,
+    ) -> None:
+        """Starts the background thread"""
+        self._flush = flush
+        self.max_delay = max_delay
+        self.max_batch = max_batch
+
+        self._cond = threading.Condition()
+        self._marked = 0
+        self._flushed = 0
+        self._first_pending_at: Optional[float] = None
+        self._failures = 0
+        self._urgent = False
+        self._closed = False
+
+        self.flushes = 0
+        self.last_flush_at: Optional[datetime] = None
+        self.last_flush_duration: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+        self._thread = threading.Thread(
+            target=self._run, name="write-behind", daemon=True
+        )
+        self._thread.start()
+
+        atexit.register(self.close)
+
+    @classmethod
+    def from_config(
+        cls, config: dict, flush: Callable[[], None]
+    ) -> "WriteBehindFlusher | None":
+        """
+        Returns a flusher for the `STORAGE_WRITE_BEHIND_*` settings,
+        or None if write-behind is disabled
+        """
+        if not config.get("STORAGE_WRITE_BEHIND", False):
+            return None
+
+        return cls(
+            flush,
+            max_delay=config.get("STORAGE_WRITE_BEHIND_MAX_DELAY", 0.05),
+            max_batch=config.get("STORAGE_WRITE_BEHIND_MAX_BATCH", 500),
+        )
+
+    @property
+    def pending(self) -> int:
+        """Amount of changes not persisted yet"""
+        return self._marked - self._flushed
+
+    def mark_dirty(self, changes: int = 1) -> None:
+        """Records changes that have to be persisted"""
+        with self._cond:
+            self._marked += changes
+
+            if self._first_pending_at is None:
+                self._first_pending_at = time.monotonic()
+
+            if self.pending >= self.max_batch:
+                self._urgent = True
+
+            self._cond.notify_all()
+
+    def barrier(self, timeout: Optional[float] = None) -> bool:
+        """
+        Blocks until every change marked so far is persisted
+
+        Returns False if the timeout expired before that, and raises
+        FlushFailed if the flush it waited for failed
+        """
+        with self._cond:
+            target = self._marked
+
+            if self._flushed >= target:
+                return True
+
+            failures = self._failures
+            self._urgent = True
+            self._cond.notify_all()
+
+            flushed = self._cond.wait_for(
+                lambda: self._flushed >= target
+                or self._failures != failures,
+                timeout,
+            )
+
+            if self._flushed < target and self.last_error is not None:
+                raise FlushFailed(self.last_error)
+
+            return flushed and self._flushed >= target
+
+    def stats(self) -> dict:
+        """Returns the state of the flusher"""
+        return {
+            "pending": self.pending,
+            "flushes": self.flushes,
+            "last_flush_at": (
+                self.last_flush_at.isoformat() if self.last_flush_at else None
+            ),
+            "last_flush_duration": self.last_flush_duration,
+            "last_error": self.last_error,
+        }
+
+    def close(self) -> None:
+        """Persists the pending changes and stops the background thread"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+        self._thread.join()
+
+    def _run(self) -> None:
+        """Loop of the background thread"""
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self.pending or self._closed)
+
+                if not self.pending:
+                    return
+
+                deadline = self._first_pending_at + self.max_delay
+                self._cond.wait_for(
+                    lambda: self._urgent or self._closed,
+                    max(0.0, deadline - time.monotonic()),
+                )
+
+                target = self._marked
+                self._urgent = False
+                self._first_pending_at = None
+
+            start = time.monotonic()
+
+            try:
+                self._flush()
+            except Exception as e:
+                logger.exception("Write-behind flush failed")
+
+                with self._cond:
+                    self.last_error = str(e)
+                    self._failures += 1
+                    self._first_pending_at = time.monotonic()
+                    self._cond.notify_all()
+
+                if self._closed:
+                    return
+
+                continue
+
+            with self._cond:
+                self._flushed = max(self._flushed, target)
+                self.flushes += 1
+                self.last_flush_at = datetime.now()
+                self.last_flush_duration = time.monotonic() - start
+                self.last_error = None
+
+                if self.pending:
+                    self._first_pending_at = time.monotonic()
+
+                self._cond.notify_all()
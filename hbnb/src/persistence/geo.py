@@ -0,0 +1,167 @@
+"""
+Distances and the spatial index behind the `near` lookups of the
+repositories
+
+Points are (latitude, longitude) pairs in degrees, distances are in
+kilometers along the surface of the earth.
+"""
+
+import math
+from typing import Iterator, Optional
+
+EARTH_RADIUS_KM = 6371.0088
+
+# Side in degrees of the cells of a GeoGrid, about 11km of latitude
+CELL_DEGREES = 0.1
+
+LatitudeRange = tuple[float, float]
+LongitudeRange = tuple[float, float]
+
+
+def haversine(
+    latitude: float, longitude: float, other_lat: float, other_lon: float
+) -> float:
+    """Returns the distance between two points"""
+    phi, other_phi = math.radians(latitude), math.radians(other_lat)
+    d_phi = other_phi - phi
+    d_lambda = math.radians(other_lon - longitude)
+    a = (
+        math.sin(d_phi / 2) ** 2
+        + math.cos(phi) * math.cos(other_phi) * math.sin(d_lambda / 2) ** 2
+    )
+
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def bounding_box(
+    latitude: float, longitude: float, radius_km: float
+) -> tuple[LatitudeRange, list[LongitudeRange]]:
+    """
+    Returns the latitudes and longitudes of the smallest box holding
+    every point within `radius_km` of a point
+
+    There are two longitude ranges when the box crosses the antimeridian,
+    and the whole range of longitudes when it reaches a pole
+    """
+    angle = radius_km / EARTH_RADIUS_KM
+    d_lat = math.degrees(angle)
+    south, north = latitude - d_lat, latitude + d_lat
+
+    if south <= -90 or north >= 90 or angle >= math.pi / 2:
+        return (max(south, -90.0), min(north, 90.0)), [(-180.0, 180.0)]
+
+    d_lon = math.degrees(
+        math.asin(min(1.0, math.sin(angle) / math.cos(math.radians(latitude))))
+    )
+    west, east = longitude - d_lon, longitude + d_lon
+
+    if west < -180:
+        return (south, north), [(west + 360, 180.0), (-180.0, east)]
+    if east > 180:
+        return (south, north), [(west, 180.0), (-180.0, east - 360)]
+
+    return (south, north), [(west, east)]
+
+
+class GeoGrid:
+    """
+    Spatial index of points, bucketed by cells of `CELL_DEGREES` side
+
+    A `near` lookup only checks the points of the cells overlapping the
+    bounding box of the circle, so its cost depends on the amount of
+    points around the center and not on the total. The points are kept
+    in the index itself, the objects aren't read to measure distances.
+    """
+
+    def __init__(self, cell_degrees: float = CELL_DEGREES) -> None:
+        """Creates an empty grid"""
+        self._size = cell_degrees
+        self._cells: dict[tuple[int, int], dict[str, tuple]] = {}
+        self._points: dict[str, tuple[float, float]] = {}
+
+    def __len__(self) -> int:
+        """Amount of points in the grid"""
+        return len(self._points)
+
+    def _cell(self, latitude: float, longitude: float) -> tuple[int, int]:
+        """Returns the cell of a point"""
+        return (
+            math.floor(latitude / self._size),
+            math.floor(longitude / self._size),
+        )
+
+    def add(
+        self, key: str, latitude: Optional[float], longitude: Optional[float]
+    ) -> None:
+        """Adds the point of a key, keys without a location are skipped"""
+        if latitude is None or longitude is None:
+            return
+
+        point = (float(latitude), float(longitude))
+        self._points[key] = point
+        self._cells.setdefault(self._cell(*point), {})[key] = point
+
+    def remove(self, key: str) -> None:
+        """Removes the point of a key, if it has one"""
+        point = self._points.pop(key, None)
+
+        if point is None:
+            return
+
+        cell = self._cell(*point)
+        bucket = self._cells[cell]
+        del bucket[key]
+
+        if not bucket:
+            del self._cells[cell]
+
+    def _covering(
+        self, latitudes: LatitudeRange, longitudes: list[LongitudeRange]
+    ) -> Iterator[dict[str, tuple]]:
+        """Yields the non-empty cells overlapping a bounding box"""
+        rows = range(
+            math.floor(latitudes[0] / self._size),
+            math.floor(latitudes[1] / self._size) + 1,
+        )
+        columns = [
+            range(
+                math.floor(west / self._size),
+                math.floor(east / self._size) + 1,
+            )
+            for west, east in longitudes
+        ]
+
+        # A wide box has more cells than the grid has non-empty ones
+        if len(rows) * sum(map(len, columns)) > len(self._cells):
+            for (row, column), bucket in self._cells.items():
+                if row in rows and any(column in c for c in columns):
+                    yield bucket
+            return
+
+        for row in rows:
+            for columns_range in columns:
+                for column in columns_range:
+                    bucket = self._cells.get((row, column))
+
+                    if bucket:
+                        yield bucket
+
+    def near(
+        self, latitude: float, longitude: float, radius_km: float
+    ) -> list[tuple[float, str]]:
+        """
+        Returns the distance and the key of every point within
+        `radius_km` of a point, unsorted
+        """
+        result = []
+
+        for bucket in self._covering(
+            *bounding_box(latitude, longitude, radius_km)
+        ):
+            for key, (lat, lon) in bucket.items():
+                distance = haversine(latitude, longitude, lat, lon)
+
+                if distance <= radius_km:
+                    result.append((distance, key))
+
+        return result
@@ -4,8 +4,11 @@ it only stores it in memory
 """
 
 from datetime import datetime
+from typing import Iterable, Iterator, Optional, Sequence
 from src.models.base import Base
+from src.persistence import query
 from src.persistence.repository import Repository
+from src.persistence.table import Table
 from utils.populate import populate_memory
 
 
@@ -14,24 +17,245 @@ class MemoryRepository(Repository):
     A Repository that does not persist data, it only stores it in memory
 
     Every time the server is restarted, the data is lost
+
+    Objects are kept in a Table per model keyed by their id, so lookups,
+    updates and deletes by primary key don't depend on the amount of
+    objects stored. Tables keep insertion order, so `get_all` still
+    returns the objects in the order they were saved, and maintain the
+    secondary indexes declared by the models for `find_by`.
+
+    The file and pickle repositories build on top of this one and only
+    add the persistence.
     """
 
     def __init__(self, *args, **kw) -> None:
-        """Calls reload method"""
+        """Calls reload method and rebuilds the aggregates of the models"""
         super().__init__(*args, **kw)
 
         self.reload()
+        self.rebuild_aggregates()
+
+    def _table(self, model_name: str) -> Table:
+        """
+        Returns the table of a model, creating it if needed
+
+        Plain lists found in `_data` (the placeholders registered by the
+        RepositoryManager or data loaded from older files) are turned
+        into tables the first time they are used.
+        """
+        table = self._data.get(model_name)
+
+        if isinstance(table, Table):
+            return table
+
+        table = self._new_table(model_name, table or ())
+        self._data[model_name] = table
+
+        return table
+
+    def _new_table(self, model_name: str, objects=()) -> Table:
+        """Creates the table of a model with the indexes it declares"""
+        model = self.models.get(model_name)
+
+        return Table(
+            getattr(model, "__indexes__", ()),
+            objects,
+            order=getattr(model, "__ordering__", ()),
+            location=getattr(model, "__location__", None),
+            ranges=getattr(model, "__ranges__", ()),
+            bitmap=getattr(model, "__bitmap__", None),
+        )
+
+    def get_all(
+        self,
+        model_name: str,
+        filters: Optional[dict] = None,
+        order_by: "Optional[str | list[str]]" = None,
+        limit: Optional[int] = None,
+        offset: int = 0,
+        load: Iterable[str] = (),
+    ) -> list:
+        """
+        Get the objects of a given model
+
+        The table reads the objects from its most selective index for
+        the filters (see `Table.select`) and checks the conditions only
+        on those. There's nothing to load lazily in memory, so `load` is
+        ignored
+        """
+        table = self._table(model_name)
+        conditions, among = self._conditions(model_name, filters)
+        order = query.parse_order(order_by)
+
+        if (
+            not conditions
+            and among is None
+            and not order
+            and limit is None
+            and not offset
+        ):
+            return table.all()
+
+        objs = (
+            table.select(conditions, among)
+            if conditions or among is not None
+            else table
+        )
+
+        return query.apply(objs, [], order, limit, offset)
+
+    def get_page(
+        self,
+        model_name: str,
+        filters: Optional[dict] = None,
+        after: Optional[tuple] = None,
+        limit: Optional[int] = None,
+        load: Iterable[str] = (),
+    ) -> list:
+        """
+        Get a page of the objects of a given model
+
+        The table keeps its objects sorted by the ordering of the model,
+        so the page starts with a binary search. With equality filters
+        only the objects found in the indexes are sorted.
+        """
+        table = self._table(model_name)
+
+        if not table.order:
+            return super().get_page(model_name, filters, after, limit)
+
+        conditions, among = self._conditions(model_name, filters)
+        equal, rest = self._split_conditions(conditions)
+
+        return query.apply(
+            table.ordered(after, among, **equal), rest, [], limit
+        )
+
+    def iter_all(
+        self,
+        model_name: str,
+        filters: Optional[dict] = None,
+        load: Iterable[str] = (),
+    ) -> Iterator:
+        """
+        Iterates the objects of a given model in the order of pages
+
+        The objects are read from the table while they are consumed, so
+        no list of them is built
+        """
+        table = self._table(model_name)
+
+        if not table.order:
+            return super().iter_all(model_name, filters)
+
+        conditions, among = self._conditions(model_name, filters)
+        equal, rest = self._split_conditions(conditions)
+        objs = table.ordered(among=among, **equal)
+
+        if not rest:
+            return objs
+
+        return (obj for obj in objs if query.matches(obj, rest))
+
+    def iter_values(
+        self, model_name: str, fields: Sequence[str]
+    ) -> Iterator[tuple]:
+        """
+        Iterates the values of some fields of every object of a model,
+        without hydrating the raw records of the table
+        """
+        return self._table(model_name).values(fields)
 
-    def get_all(self, model_name: str) -> list:
-        """Get all objects of a given model"""
-        return self._data.get(model_name, [])
+    def near(
+        self,
+        model_name: str,
+        latitude: float,
+        longitude: float,
+        radius_km: float,
+        limit: Optional[int] = None,
+        load: Iterable[str] = (),
+    ) -> list:
+        """
+        Get the objects of a model around a point, the closest first
 
-    def get(self, model_name: str, obj_id: str):
+        Models with a `__location__` are kept in the spatial index of
+        their table, only the objects near the point are measured
+        """
+        self.location(model_name)
+
+        return self._table(model_name).near(
+            latitude, longitude, radius_km, limit
+        )
+
+    def _conditions(
+        self, model_name: str, filters: Optional[dict]
+    ) -> tuple[list, Optional[set]]:
+        """
+        Parses the filters, turning the `all` conditions on the links of
+        the model into the set of ids of the objects they allow
+
+        The masks of the link table answer them when it keeps a
+        `__bitmap__` of the link, otherwise the owners of each member
+        are intersected
+        """
+        links = getattr(self.models.get(model_name), "__links__", None)
+        conditions = []
+        among: Optional[set] = None
+
+        for field, op, value in query.parse_filters(filters):
+            if op != "all" or field not in (links or {}):
+                conditions.append((field, op, value))
+                continue
+
+            # Every object is linked to all of no members
+            if not value:
+                continue
+
+            link_model, owner, member = self.link(model_name, field)
+            table = self._table(link_model)
+
+            if table.bitmap == (owner, member):
+                owners = table.linked_to_all(value)
+            else:
+                owners = set.intersection(
+                    *(
+                        {getattr(o, owner) for o in table.find(**{member: m})}
+                        for m in set(value)
+                    )
+                )
+
+            among = owners if among is None else among & owners
+
+        return conditions, among
+
+    @staticmethod
+    def _split_conditions(conditions: list) -> tuple[dict, list]:
+        """
+        Splits the conditions the indexes can answer (equality, one per
+        field) from the rest
+        """
+        equal: dict = {}
+        rest = []
+
+        for field, op, value in conditions:
+            if op == "eq" and field not in equal:
+                equal[field] = value
+            else:
+                rest.append((field, op, value))
+
+        return equal, rest
+
+    def get(self, model_name: str, obj_id: str, load: Iterable[str] = ()):
         """Get an object by its ID"""
-        for obj in self.get_all(model_name):
-            if obj.id == obj_id:
-                return obj
-        return None
+        return self._table(model_name).get(obj_id)
+
+    def find_by(self, model_name: str, **fields) -> list:
+        """Get all objects of a given model matching the given values"""
+        return self._table(model_name).find(**fields)
+
+    def find_one_by(self, model_name: str, **fields):
+        """Get the first object of a given model matching the values"""
+        return self._table(model_name).find_one(**fields)
 
     def reload(self):
         """Populates the database with some dummy data"""
@@ -39,31 +263,59 @@ class MemoryRepository(Repository):
 
     def save(self, obj: Base):
         """Save an object"""
-        cls = obj.__class__.__name__
-
-        if obj not in self._data[cls]:
-            self._data[cls].append(obj)
+        self._table(obj.__class__.__name__).add(obj)
 
         return obj
 
     def update(self, obj: Base):
         """Update an object"""
-        cls = obj.__class__.__name__
+        table = self._table(obj.__class__.__name__)
 
-        for i, o in enumerate(self._data[cls]):
-            if o.id == obj.id:
-                obj.updated_at = datetime.now()
-                self._data[cls][i] = obj
-                return obj
+        if obj.id not in table:
+            return None
 
-        return None
+        obj.updated_at = datetime.now()
+        table.replace(obj)
+
+        return obj
 
     def delete(self, obj: Base) -> bool:
         """Delete an object"""
-        cls = obj.__class__.__name__
+        table = self._table(obj.__class__.__name__)
+
+        return table.remove(obj.id) is not None
+
+    def save_many(self, objs: Iterable[Base]) -> list:
+        """Save many objects"""
+        objs = list(objs)
+
+        for obj in objs:
+            self._table(obj.__class__.__name__).add(obj)
+
+        return objs
+
+    def update_many(self, objs: Iterable[Base]) -> list:
+        """
+        Update many objects, they all get the same `updated_at`
+
+        Returns the objects that were stored
+        """
+        now = datetime.now()
+        updated = []
+
+        for obj in objs:
+            table = self._table(obj.__class__.__name__)
+
+            if obj.id in table:
+                obj.updated_at = now
+                table.replace(obj)
+                updated.append(obj)
 
-        if obj in self._data[cls]:
-            self._data[cls].remove(obj)
-            return True
+        return updated
 
-        return False
+    def delete_many(self, objs: Iterable[Base]) -> int:
+        """Delete many objects, returns how many were stored"""
+        return sum(
+            self._table(obj.__class__.__name__).remove(obj.id) is not None
+            for obj in objs
+        )
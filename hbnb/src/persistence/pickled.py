@@ -1,72 +1,364 @@
 """
-This module exports a Repository that persists data in a pickle file
+This module exports a Repository that persists data in pickle files
 """
 
+from concurrent.futures import ThreadPoolExecutor
+import glob
+import os
 import pickle
-from typing import Optional
-from src.persistence.repository import Repository
+import threading
+from typing import Iterable, Optional
+import zlib
+from src.persistence.flusher import WriteBehindFlusher
+from src.persistence.memory import MemoryRepository
+from src.persistence.table import Table
 from utils.constants import PICKLE_STORAGE_FILENAME
 
 
-class PickleRepository(Repository):
-    """Pickle Repository"""
+class PickleRepository(MemoryRepository):
+    """
+    Pickle Repository
+
+    Keeps the objects in memory like the MemoryRepository and pickles
+    them after every change.
+
+    Every model is stored in its own shard files next to the pickle file
+    (`data.User.0.pkl`, `data.Place.0.pkl`, ...), optionally split in
+    `PICKLE_STORAGE_PARTITIONS` partitions by a hash of the id. A change
+    only rewrites the shard of the object that changed, through a
+    temporary file that is renamed into place.
+
+    Shards are loaded the first time their model is accessed, so models
+    that are rarely used aren't loaded at all. With
+    `PICKLE_STORAGE_PRELOAD` every model is loaded on reload instead,
+    reading the shards in parallel.
+
+    A single pickle file written by older versions is still read, and
+    it's split into shards right away.
+
+    In write-behind mode (`STORAGE_WRITE_BEHIND`) changes are persisted
+    by a WriteBehindFlusher, so many requests share one write. `flush`
+    blocks until the changes made so far are on disk.
+    """
 
     __filename = PICKLE_STORAGE_FILENAME
 
     def __init__(self, filename: Optional[str] = None, *args, **kw) -> None:
         """Calls reload method"""
+        if filename:
+            self.__filename = filename
+
+        self._lock = threading.RLock()
+        self._file_lock = threading.Lock()
+        self._dirty: set[tuple[str, int]] = set()
+        self._serial = 0
+        self._written: dict[str, int] = {}
+        self._stale: set[str] = set()
+        self._members: dict[str, list[dict[str, None]]] = {}
+        self.flusher: Optional[WriteBehindFlusher] = None
 
         super().__init__(*args, **kw)
 
-        if filename:
-            self.__filename = filename
+        self.flusher = WriteBehindFlusher.from_config(
+            self.config, self._save_to_file
+        )
+
+    @property
+    def partitions(self) -> int:
+        """Amount of shards each model is split in"""
+        return max(1, int(self.config.get("PICKLE_STORAGE_PARTITIONS", 1)))
+
+    def _partition(self, obj_id: str) -> int:
+        """Returns the partition an id belongs to"""
+        if self.partitions == 1:
+            return 0
+        return zlib.crc32(str(obj_id).encode()) % self.partitions
+
+    def _shard_filename(self, model_name: str, partition: int) -> str:
+        """Path of the shard holding a partition of a model"""
+        stem = os.path.splitext(self.__filename)[0]
+        return f"{stem}.{model_name}.{partition}.pkl"
+
+    def _shard_filenames(self, model_name: str) -> dict[int, str]:
+        """Returns the shards of a model found on disk by partition"""
+        stem = os.path.splitext(self.__filename)[0]
+        shards = {}
+
+        for filename in glob.glob(f"{glob.escape(stem)}.{model_name}.*.pkl"):
+            partition = filename[:-len(".pkl")].rsplit(".", 1)[-1]
+
+            if partition.isdigit():
+                shards[int(partition)] = filename
+
+        return shards
+
+    def files(self) -> list[str]:
+        """Paths of the pickle file and of the shards of every model"""
+        return [self.__filename] + sorted(
+            filename
+            for model_name in self.models
+            for filename in self._shard_filenames(model_name).values()
+        )
+
+    def _read_shards(self, model_name: str) -> tuple[list, set[str], bool]:
+        """
+        Reads every shard of a model
 
-        self.reload()
+        Returns the objects, the shard files that don't belong to the
+        current amount of partitions, and whether the shards have to be
+        rewritten because `PICKLE_STORAGE_PARTITIONS` changed
+        """
+        objects, stale, rewrite = [], set(), False
+
+        for partition, filename in self._shard_filenames(model_name).items():
+            try:
+                with open(filename, "rb") as file:
+                    shard = pickle.load(file)
+            except FileNotFoundError:
+                continue
+
+            objects.extend(shard)
+
+            if partition >= self.partitions:
+                stale.add(filename)
+                rewrite = True
+            elif self.partitions > 1 and not rewrite:
+                rewrite = any(
+                    self._partition(obj.id) != partition for obj in shard
+                )
+
+        return objects, stale, rewrite
+
+    def _table(self, model_name: str) -> Table:
+        """
+        Returns the table of a model, loading its shards if needed
+
+        The shards are read without holding the lock, so different
+        models can be loaded at the same time
+        """
+        table = self._data.get(model_name)
+
+        if isinstance(table, Table):
+            return table
+
+        objects, stale, rewrite = table or [], set(), False
+
+        if not objects:
+            objects, stale, rewrite = self._read_shards(model_name)
+
+        with self._lock:
+            table = self._data.get(model_name)
+
+            if isinstance(table, Table):
+                return table
+
+            table = self._new_table(model_name, objects)
+            self._data[model_name] = table
+
+            members = [{} for _ in range(self.partitions)]
+            for obj in table:
+                members[self._partition(obj.id)][obj.id] = None
+            self._members[model_name] = members
+
+            if rewrite:
+                self._stale |= stale
+                self._dirty |= {
+                    (model_name, p) for p in range(self.partitions)
+                }
+
+        return table
+
+    def _mark_dirty(self, obj) -> None:
+        """Records that the shard of an object has to be written"""
+        model_name = obj.__class__.__name__
+        partition = self._partition(obj.id)
+        members = self._members[model_name][partition]
+
+        if obj.id in self._table(model_name):
+            members[obj.id] = None
+        else:
+            members.pop(obj.id, None)
+
+        self._dirty.add((model_name, partition))
 
     def _save_to_file(self):
-        """Helper method to save the current object data to the file"""
-        with open(self.__filename, "wb") as file:
-            pickle.dump(self._data, file)
+        """
+        Helper method to save the changed shards to their files
 
-    def get_all(self, model_name: str) -> list:
-        """Get all objects of a given model"""
-        return self._data[model_name]
+        The shards are pickled while holding the lock and written to
+        temporary files that are then renamed over the shard files. Every
+        pickling is numbered, and a shard is only written if no newer
+        pickling of it was written already, so writes can't land out of
+        order. The shards are marked dirty again if the write fails.
+        """
+        with self._lock:
+            self._serial += 1
+            number = self._serial
+            dirty = set(self._dirty)
+            shards = {}
 
-    def get(self, model_name: str, obj_id: str):
-        """Get an object by its ID"""
-        for obj in self._data[model_name]:
-            if obj.id == obj_id:
-                return obj
-        return None
+            for model_name, partition in self._dirty:
+                table = self._table(model_name)
+                ids = self._members[model_name][partition]
+                shards[self._shard_filename(model_name, partition)] = (
+                    pickle.dumps([table.get(obj_id) for obj_id in ids])
+                )
+
+            self._dirty.clear()
+            stale, self._stale = self._stale, set()
 
-    def reload(self):
-        """Reloads the data from the pickle file"""
         try:
-            with open(self.__filename, "rb") as file:
-                self._data = pickle.load(file)
-        except FileNotFoundError:
+            self._write_shards(number, shards, stale)
+        except Exception:
+            with self._lock:
+                self._dirty |= dirty
+                self._stale |= stale
+            raise
+
+    def _write_shards(
+        self, number: int, shards: dict[str, bytes], stale: set[str]
+    ) -> None:
+        """Writes pickled shards and removes the stale shard files"""
+        with self._file_lock:
+            for filename, serialized in shards.items():
+                if self._written.get(filename, 0) > number:
+                    continue
+
+                tmp_filename = f"{filename}.tmp"
+
+                with open(tmp_filename, "wb") as file:
+                    file.write(serialized)
+
+                    if self.config.get("STORAGE_FSYNC", False):
+                        file.flush()
+                        os.fsync(file.fileno())
+
+                os.replace(tmp_filename, filename)
+                self._written[filename] = number
+
+            for filename in stale - set(shards):
+                if os.path.exists(filename):
+                    os.remove(filename)
+
+    def _persist(self, changes: int = 1) -> None:
+        """Writes the dirty shards now or lets the flusher do it"""
+        if self.flusher:
+            self.flusher.mark_dirty(changes)
+        else:
             self._save_to_file()
 
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Blocks until every change made so far is persisted"""
+        if not self.flusher:
+            return True
+
+        return self.flusher.barrier(timeout)
+
+    def preload(self) -> None:
+        """Loads every model that isn't loaded yet, in parallel"""
+        with ThreadPoolExecutor() as executor:
+            list(executor.map(self._table, list(self.models)))
+
+    def reload(self):
+        """
+        Forgets the loaded models so they're read again from their
+        shards, and splits the pickle file of older versions in shards
+        """
+        with self._lock:
+            self._data = {}
+            self._members = {}
+            self._dirty.clear()
+
+            legacy = os.path.exists(self.__filename) and not any(
+                self._shard_filenames(model_name)
+                for model_name in self.models
+            )
+
+            if legacy:
+                with open(self.__filename, "rb") as file:
+                    self._data = pickle.load(file)
+
+                for model_name in list(self._data):
+                    self._table(model_name)
+                    self._dirty |= {
+                        (model_name, p) for p in range(self.partitions)
+                    }
+
+                self._save_to_file()
+
+        if self.config.get("PICKLE_STORAGE_PRELOAD", False):
+            self.preload()
+
     def save(self, obj, save_to_file=True):
         """Save an object"""
-        self._data[obj.__class__.__name__].append(obj)
+        with self._lock:
+            super().save(obj)
+            self._mark_dirty(obj)
+
         if save_to_file:
-            self._save_to_file()
+            self._persist()
+
+        return obj
 
     def update(self, obj):
         """Update an object"""
-        for i, o in enumerate(self._data[obj.__class__.__name__]):
-            if o.id == obj.id:
-                self._data[obj.__class__.__name__][i] = obj
-                self._save_to_file()
-                return obj
+        with self._lock:
+            if not super().update(obj):
+                return None
+            self._mark_dirty(obj)
+
+        self._persist()
+
+        return obj
 
     def delete(self, obj) -> bool:
         """Delete an object"""
-        for i, o in enumerate(self._data[obj.__class__.__name__]):
-            if o.id == obj.id:
-                del self._data[obj.__class__.__name__][i]
-                break
+        with self._lock:
+            if not super().delete(obj):
+                return False
+            self._mark_dirty(obj)
+
+        self._persist()
 
-        self._save_to_file()
         return True
+
+    def save_many(self, objs: Iterable, save_to_file=True) -> list:
+        """Save many objects, each dirty shard is written once"""
+        with self._lock:
+            objs = super().save_many(objs)
+
+            for obj in objs:
+                self._mark_dirty(obj)
+
+        if save_to_file and objs:
+            self._persist(len(objs))
+
+        return objs
+
+    def update_many(self, objs: Iterable) -> list:
+        """Update many objects, each dirty shard is written once"""
+        with self._lock:
+            updated = super().update_many(objs)
+
+            for obj in updated:
+                self._mark_dirty(obj)
+
+        if updated:
+            self._persist(len(updated))
+
+        return updated
+
+    def delete_many(self, objs: Iterable) -> int:
+        """Delete many objects, each dirty shard is written once"""
+        deleted = 0
+
+        with self._lock:
+            for obj in objs:
+                if super().delete(obj):
+                    self._mark_dirty(obj)
+                    deleted += 1
+
+        if deleted:
+            self._persist(deleted)
+
+        return deleted
@@ -0,0 +1,162 @@
+"""
+This module exports the helpers the repositories share to handle the
+filters, ordering and pagination accepted by `get_all`
+
+Filters are a dictionary of field names to values. A field can end with
+an operator after a double underscore (`rating__gte`), without one the
+values are compared for equality:
+
+    {"place_id": "...", "rating__gte": 4, "city_id__in": ["...", "..."]}
+
+The ordering is a field name or a list of them, a leading `-` sorts the
+field in descending order (`["-created_at", "id"]`). Null values go
+first in ascending order and last in descending order, as in SQLite.
+
+`all` keeps the objects related to every one of the values, like the
+places with all of some amenities (`{"amenities__all": ["...", "..."]}`),
+through the links the models declare in `__links__`. On a plain field it
+checks the field holds every value.
+"""
+
+from itertools import islice
+import operator
+from typing import Any, Iterable, Optional
+
+Condition = tuple[str, str, Any]
+Order = tuple[str, bool]
+
+
+def _contains(value: Any, values: Any) -> bool:
+    """`in` operator with the arguments in the order of the others"""
+    return value in values
+
+
+def _contains_all(value: Any, values: Any) -> bool:
+    """`all` operator, whether `value` holds every one of `values`"""
+    return set(values) <= set(value)
+
+
+OPERATORS = {
+    "eq": operator.eq,
+    "ne": operator.ne,
+    "lt": operator.lt,
+    "lte": operator.le,
+    "gt": operator.gt,
+    "gte": operator.ge,
+    "in": _contains,
+    "all": _contains_all,
+}
+
+
+# Operators a sorted index can answer with a binary search
+RANGE_OPERATORS = ("eq", "lt", "lte", "gt", "gte")
+
+
+def parse_filters(filters: Optional[dict]) -> list[Condition]:
+    """
+    Turns filters into (field, operator, value) conditions
+
+    Raises ValueError for unknown operators
+    """
+    conditions = []
+
+    for key, value in (filters or {}).items():
+        field, _, op = key.rpartition("__")
+
+        if not field:
+            field, op = key, "eq"
+        elif op not in OPERATORS:
+            raise ValueError(f"Unknown filter operator '{op}' in '{key}'")
+
+        if op in ("in", "all"):
+            value = list(value)
+
+        conditions.append((field, op, value))
+
+    return conditions
+
+
+def parse_order(order_by: "Optional[str | Iterable[str]]") -> list[Order]:
+    """Turns the ordering into (field, descending) pairs"""
+    if not order_by:
+        return []
+
+    if isinstance(order_by, str):
+        order_by = [order_by]
+
+    return [
+        (field[1:], True) if field.startswith("-") else (field, False)
+        for field in order_by
+    ]
+
+
+def matches(obj: Any, conditions: list[Condition]) -> bool:
+    """
+    Whether an object meets every condition
+
+    Like in SQL, null values only match `eq` and `ne` conditions
+    """
+    for field, op, expected in conditions:
+        value = getattr(obj, field, None)
+
+        if value is None and op not in ("eq", "ne"):
+            return False
+
+        try:
+            if not OPERATORS[op](value, expected):
+                return False
+        except TypeError:
+            return False
+
+    return True
+
+
+def sort(objs: Iterable[Any], order: list[Order]) -> list:
+    """Sorts objects by the given fields"""
+    objs = list(objs)
+
+    # Sorting is stable, so sorting by the last field first leaves the
+    # objects sorted by every field
+    for field, descending in reversed(order):
+        objs.sort(
+            key=lambda obj: _sort_key(getattr(obj, field, None)),
+            reverse=descending,
+        )
+
+    return objs
+
+
+def _sort_key(value: Any) -> tuple:
+    """Sort key that puts null values before the rest"""
+    return (value is not None, value)
+
+
+def paginate(
+    objs: Iterable[Any], limit: Optional[int] = None, offset: int = 0
+) -> list:
+    """Skips `offset` objects and returns at most `limit` of the rest"""
+    stop = None if limit is None else offset + limit
+
+    return list(islice(objs, offset or 0, stop))
+
+
+def apply(
+    objs: Iterable[Any],
+    conditions: list[Condition],
+    order: list[Order],
+    limit: Optional[int] = None,
+    offset: int = 0,
+) -> list:
+    """
+    Filters, sorts and paginates objects
+
+    Objects are consumed lazily when there's no ordering, so only the
+    ones up to the end of the page are read
+    """
+    if conditions:
+        objs = (obj for obj in objs if matches(obj, conditions))
+
+    if order:
+        objs = sort(objs, order)
+
+    return paginate(objs, limit, offset)
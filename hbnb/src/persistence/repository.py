@@ -1,31 +1,216 @@
 """ Repository pattern for data access layer """
 
 from abc import ABC, abstractmethod
-from typing import Any
+from collections import Counter
+from contextlib import contextmanager
+import heapq
+import threading
+from typing import Any, Callable, Iterable, Iterator, Optional, Sequence
+import uuid
 from flask import Flask
 
-from src.persistence import get_repo
+from src.persistence import geo, get_repo
 
 
 class Repository(ABC):
     """Abstract class for repository pattern"""
 
-    def __init__(self, models: dict, data: dict) -> None:
-        """Base constructor for the repository"""
+    def __init__(
+        self, models: dict, data: dict, config: Optional[dict] = None
+    ) -> None:
+        """
+        Base constructor for the repository
+
+        `config` holds the settings of the app (the repository options
+        are the ones defined in `src.config.Config`)
+        """
         self.models: dict[str, Any] = models
         self._data: dict[str, list] = data
+        self.config: dict[str, Any] = config or {}
 
     @abstractmethod
     def reload(self) -> None:
         """Reload data to the repository"""
 
     @abstractmethod
-    def get_all(self, model_name: str) -> list:
-        """Get all objects of a model"""
+    def get_all(
+        self,
+        model_name: str,
+        filters: Optional[dict] = None,
+        order_by: "Optional[str | list[str]]" = None,
+        limit: Optional[int] = None,
+        offset: int = 0,
+        load: Iterable[str] = (),
+    ) -> list:
+        """
+        Get the objects of a model
+
+        Only the objects matching `filters` are returned, sorted by
+        `order_by` and paginated with `limit` and `offset`. The syntax of
+        the filters and the ordering is described in
+        `src.persistence.query`
+
+        `load` names the relationships the caller is going to use, so
+        repositories that load them lazily can fetch them for every
+        object at once instead of one query per object
+        """
 
     @abstractmethod
-    def get(self, model_name: str, id: str) -> Any | None:
-        """Get an object by id"""
+    def get(
+        self, model_name: str, id: str, load: Iterable[str] = ()
+    ) -> Any | None:
+        """Get an object by id, loading the relationships in `load`"""
+
+    def get_many(
+        self, model_name: str, ids: Iterable[str], load: Iterable[str] = ()
+    ) -> list:
+        """
+        Get the objects of a model with the given ids, the ones that
+        don't exist are left out
+
+        This default implementation gets them one by one, repositories
+        should override it when a lookup per id is expensive
+        """
+        objs = (self.get(model_name, obj_id, load) for obj_id in ids)
+
+        return [obj for obj in objs if obj is not None]
+
+    def get_page(
+        self,
+        model_name: str,
+        filters: Optional[dict] = None,
+        after: Optional[tuple] = None,
+        limit: Optional[int] = None,
+        load: Iterable[str] = (),
+    ) -> list:
+        """
+        Get a page of the objects of a model for keyset pagination
+
+        The objects are sorted by the `__ordering__` fields of the model
+        and start after the ones whose values are `after` (the values of
+        the last object of the previous page).
+
+        This default implementation sorts every object matching the
+        filters, repositories should override it to start the page
+        without reading the previous ones
+        """
+        order = self.ordering(model_name)
+        objs = self.get_all(model_name, filters, list(order), load=load)
+
+        if after is not None:
+            after = tuple(after)
+            objs = [
+                obj
+                for obj in objs
+                if tuple(getattr(obj, field) for field in order) > after
+            ]
+
+        return objs if limit is None else objs[:limit]
+
+    def iter_all(
+        self,
+        model_name: str,
+        filters: Optional[dict] = None,
+        load: Iterable[str] = (),
+    ) -> Iterator:
+        """
+        Iterates the objects of a model matching `filters`, in the order
+        of `get_page`
+
+        This default implementation reads every object first,
+        repositories should override it to read them while they are
+        consumed
+        """
+        return iter(self.get_page(model_name, filters, load=load))
+
+    def iter_values(
+        self, model_name: str, fields: Sequence[str]
+    ) -> Iterator[tuple]:
+        """
+        Iterates the values of some fields of every object of a model,
+        for the callers that don't need the objects themselves
+
+        This default implementation reads the objects, repositories
+        should override it when reading only the fields is cheaper
+        """
+        return (
+            tuple(getattr(obj, field, None) for field in fields)
+            for obj in self.iter_all(model_name)
+        )
+
+    def near(
+        self,
+        model_name: str,
+        latitude: float,
+        longitude: float,
+        radius_km: float,
+        limit: Optional[int] = None,
+        load: Iterable[str] = (),
+    ) -> list[tuple[Any, float]]:
+        """
+        Get the objects of a model within `radius_km` of a point with
+        their distance in kilometers, the closest first
+
+        This default implementation measures the distance to every
+        object, repositories should override it to use a spatial index
+        """
+        lat_field, lon_field = self.location(model_name)
+        found = []
+
+        for obj in self.iter_all(model_name, load=load):
+            lat, lon = getattr(obj, lat_field), getattr(obj, lon_field)
+
+            if lat is None or lon is None:
+                continue
+
+            distance = geo.haversine(latitude, longitude, lat, lon)
+
+            if distance <= radius_km:
+                found.append((distance, len(found), obj))
+
+        found = (
+            sorted(found) if limit is None else heapq.nsmallest(limit, found)
+        )
+
+        return [(obj, distance) for distance, _, obj in found]
+
+    def ordering(self, model_name: str) -> tuple[str, ...]:
+        """Fields the objects of a model are paginated by"""
+        return tuple(getattr(self.models[model_name], "__ordering__", ("id",)))
+
+    def location(self, model_name: str) -> tuple[str, str]:
+        """
+        Latitude and longitude fields of a model, ValueError if it
+        doesn't declare them
+        """
+        location = getattr(self.models[model_name], "__location__", None)
+
+        if not location:
+            raise ValueError(f"{model_name} has no location")
+
+        return tuple(location)
+
+    def link(self, model_name: str, field: str) -> tuple[str, str, str]:
+        """
+        Link model, owner field and member field behind a field of the
+        `__links__` of a model, ValueError if it doesn't declare it
+        """
+        links = getattr(self.models[model_name], "__links__", None) or {}
+
+        if field not in links:
+            raise ValueError(f"{model_name} has no link '{field}'")
+
+        return tuple(links[field])
+
+    def find_by(self, model_name: str, **fields) -> list:
+        """Get all objects of a model whose fields match the given values"""
+        return self.get_all(model_name, filters=fields)
+
+    def find_one_by(self, model_name: str, **fields) -> Any | None:
+        """Get the first object of a model matching the given values"""
+        return next(
+            iter(self.get_all(model_name, filters=fields, limit=1)), None
+        )
 
     @abstractmethod
     def save(self, obj) -> None:
@@ -39,9 +224,99 @@ class Repository(ABC):
     def delete(self, obj) -> bool:
         """Delete an object"""
 
+    def save_many(self, objs: Iterable) -> list:
+        """
+        Save many objects
+
+        This default implementation saves them one by one, repositories
+        should override it to persist the whole batch at once
+        """
+        objs = list(objs)
+
+        for obj in objs:
+            self.save(obj)
+
+        return objs
+
+    def update_many(self, objs: Iterable) -> list:
+        """Update many objects, returns the ones that were updated"""
+        return [obj for obj in objs if self.update(obj) is not None]
+
+    def delete_many(self, objs: Iterable) -> int:
+        """Delete many objects, returns how many were deleted"""
+        return sum(bool(self.delete(obj)) for obj in objs)
+
+    def rebuild_aggregates(self) -> list:
+        """
+        Computes the values models derive from other models (like the
+        ratings of a place from its reviews) from the stored objects,
+        through the `rebuild_aggregates` hook of each model
+
+        Returns the objects whose values were off, so the callers that
+        persist them can save them
+        """
+        changed = []
+
+        for model in self.models.values():
+            rebuild = getattr(model, "rebuild_aggregates", None)
+
+            if rebuild is not None:
+                changed.extend(rebuild(self))
+
+        return changed
+
+    def files(self) -> list[str]:
+        """
+        Paths of the files the data is stored in, so other stores kept
+        next to them can tell whether they changed. Repositories that
+        don't store their data in files have none
+        """
+        return []
+
+    def state(self, model_name: str) -> Optional[str]:
+        """
+        Returns a token of the stored objects of a model that changes
+        with the writes of every process sharing the storage, or None
+        if the objects are only written by this process (every process
+        keeps its own copy of them)
+        """
+        return None
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """
+        Groups the writes made inside the block, so they are persisted
+        together at its end or not at all if the block raises
+
+        Repositories that can't undo their writes only run the block,
+        the database one overrides it
+        """
+        yield
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Block until every change made so far is persisted
+
+        Repositories that persist changes synchronously have nothing to
+        wait for, the ones that write in the background override it
+        """
+        return True
+
 
 class RepositoryManager:
-    """Manages the initialization of the repository in the Flask App"""
+    """
+    Manages the initialization of the repository in the Flask App
+
+    Every write goes through the manager, which counts the changes of
+    each model. `version` returns a token that changes whenever an
+    object of the model is saved, updated or deleted, so callers can
+    tell whether their copy of a collection is still current without
+    reading it. It only counts the writes of this process, `state`
+    also notices the writes of the other processes (like the other
+    workers of the server) when the storage is shared. Functions
+    registered with `subscribe` are called with the objects of every
+    write.
+    """
 
     models: dict = {}
     _data: dict = {}
@@ -50,13 +325,23 @@ class RepositoryManager:
         """Initialize the repository with the app and models"""
         self.app = app
 
+        # The epoch tells apart the counters of different processes
+        # and of the previous runs of the app
+        self._epoch = uuid.uuid4().hex[:8]
+        self._versions: Counter[str] = Counter()
+        self._versions_lock = threading.Lock()
+        self._listeners: list[Callable[[list], None]] = []
+        self._local = threading.local()
+
         if models:
             for model in models:
                 self.__register_model(model)
 
         Repo = get_repo(app.config["REPOSITORY"])
 
-        self.repo = Repo(self.models, self._data)
+        self.repo = Repo(
+            models=self.models, data=self._data, config=app.config
+        )
 
     def __register_model(self, *models) -> None:
         """Register models in the repository"""
@@ -64,22 +349,211 @@ class RepositoryManager:
             self.models[model.__name__] = model
             self._data[model.__name__] = []
 
-    def get(self, model_name: str, obj_id: str) -> Any | None:
+    def get(
+        self, model_name: str, obj_id: str, load: Iterable[str] = ()
+    ) -> Any | None:
         """Get an object by id"""
-        return self.repo.get(model_name, obj_id)
+        return self.repo.get(model_name, obj_id, load)
+
+    def get_many(
+        self, model_name: str, ids: Iterable[str], load: Iterable[str] = ()
+    ) -> list:
+        """Get the objects of a model with the given ids"""
+        return self.repo.get_many(model_name, ids, load)
+
+    def get_all(
+        self,
+        model_name: str,
+        filters: Optional[dict] = None,
+        order_by: "Optional[str | list[str]]" = None,
+        limit: Optional[int] = None,
+        offset: int = 0,
+        load: Iterable[str] = (),
+    ) -> list:
+        """Get the objects of a model, filtered, sorted and paginated"""
+        return self.repo.get_all(
+            model_name, filters, order_by, limit, offset, load
+        )
+
+    def get_page(
+        self,
+        model_name: str,
+        filters: Optional[dict] = None,
+        after: Optional[tuple] = None,
+        limit: Optional[int] = None,
+        load: Iterable[str] = (),
+    ) -> list:
+        """Get a page of the objects of a model for keyset pagination"""
+        return self.repo.get_page(model_name, filters, after, limit, load)
+
+    def iter_all(
+        self,
+        model_name: str,
+        filters: Optional[dict] = None,
+        load: Iterable[str] = (),
+    ) -> Iterator:
+        """Iterate the objects of a model in the order of the pages"""
+        return self.repo.iter_all(model_name, filters, load)
+
+    def iter_values(
+        self, model_name: str, fields: Sequence[str]
+    ) -> Iterator[tuple]:
+        """Iterate the values of some fields of every object of a model"""
+        return self.repo.iter_values(model_name, fields)
+
+    def find_by(self, model_name: str, **fields) -> list:
+        """Get all objects of a model matching the given field values"""
+        return self.repo.find_by(model_name, **fields)
+
+    def near(
+        self,
+        model_name: str,
+        latitude: float,
+        longitude: float,
+        radius_km: float,
+        limit: Optional[int] = None,
+        load: Iterable[str] = (),
+    ) -> list[tuple[Any, float]]:
+        """Get the objects of a model around a point, the closest first"""
+        return self.repo.near(
+            model_name, latitude, longitude, radius_km, limit, load
+        )
+
+    def find_one_by(self, model_name: str, **fields) -> Any | None:
+        """Get the first object of a model matching the given values"""
+        return self.repo.find_one_by(model_name, **fields)
+
+    def files(self) -> list[str]:
+        """Paths of the files the data is stored in"""
+        return self.repo.files()
+
+    def reload(self) -> None:
+        """
+        Reload the data of the repository and rebuild the aggregates,
+        every model counts as changed
+        """
+        self.repo.reload()
+        self.repo.rebuild_aggregates()
+
+        with self._versions_lock:
+            for model_name in self.models:
+                self._versions[model_name] += 1
+
+    def version(self, model_name: str) -> str:
+        """
+        Returns a token that changes with every change of a model made
+        by this process
+        """
+        return f"{self._epoch}.{self._versions[model_name]}"
 
-    def get_all(self, model_name: str) -> list:
-        """Get all objects of a model"""
-        return self.repo.get_all(model_name)
+    def state(self, model_name: str) -> str:
+        """
+        Returns a token that changes with every change of a model made
+        by any process, derived from the stored objects if the storage
+        is shared and the `version` of the model otherwise
+        """
+        return self.shared_state(model_name) or self.version(model_name)
+
+    def shared_state(self, model_name: str) -> Optional[str]:
+        """
+        Returns the `state` of a model if other processes write to its
+        storage too, or None if the functions registered with
+        `subscribe` see every write of it
+        """
+        return self.repo.state(model_name)
+
+    def subscribe(self, listener: Callable[[list], None]) -> None:
+        """Registers a function to call with the objects of each write"""
+        self._listeners.append(listener)
+
+    def _changed(self, objs: Iterable) -> None:
+        """
+        Counts a change of the models of the given objects and lets the
+        listeners know
+        """
+        objs = list(objs)
+        model_names = {obj.__class__.__name__ for obj in objs}
+        written = getattr(self._local, "written", None)
+
+        if written is not None:
+            written.extend(objs)
+
+        with self._versions_lock:
+            for model_name in model_names:
+                self._versions[model_name] += 1
+
+        for listener in self._listeners:
+            listener(objs)
 
     def save(self, obj) -> None:
         """Save an object"""
-        return self.repo.save(obj)
+        result = self.repo.save(obj)
+        self._changed([obj])
+
+        return result
 
     def update(self, obj) -> None:
         """Update an object"""
-        return self.repo.update(obj)
+        result = self.repo.update(obj)
+        self._changed([obj])
+
+        return result
 
     def delete(self, obj) -> bool:
         """Delete an object"""
-        return self.repo.delete(obj)
+        result = self.repo.delete(obj)
+        self._changed([obj])
+
+        return result
+
+    def save_many(self, objs: Iterable) -> list:
+        """Save many objects at once"""
+        objs = self.repo.save_many(objs)
+        self._changed(objs)
+
+        return objs
+
+    def update_many(self, objs: Iterable) -> list:
+        """Update many objects at once"""
+        objs = list(objs)
+        updated = self.repo.update_many(objs)
+        self._changed(objs)
+
+        return updated
+
+    def delete_many(self, objs: Iterable) -> int:
+        """Delete many objects at once"""
+        objs = list(objs)
+        deleted = self.repo.delete_many(objs)
+        self._changed(objs)
+
+        return deleted
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """
+        Group the writes made inside a block in one transaction
+
+        If the block raises, the objects written in it are reported to
+        the listeners again, since what they saw was rolled back
+        """
+        if getattr(self._local, "written", None) is not None:
+            with self.repo.transaction():
+                yield
+            return
+
+        self._local.written = []
+
+        try:
+            with self.repo.transaction():
+                yield
+        except BaseException:
+            written, self._local.written = self._local.written, None
+            self._changed(written)
+            raise
+
+        self._local.written = None
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Block until every change made so far is persisted"""
+        return self.repo.flush(timeout)
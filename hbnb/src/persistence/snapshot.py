@@ -0,0 +1,520 @@
+"""
+This module exports a Repository that persists data in a binary snapshot
+file, and the functions that read and write that format
+
+Layout of a snapshot (every number is little endian):
+
+    header      magic, version, crc32 of everything after the header,
+                amount of models, offset of the directory and offset of
+                the string table
+    columns     one fixed-width array per field of every model, plus a
+                bitmap of the rows where the field is null
+    directory   for every model its name, amount of rows and columns,
+                and for every column its name, kind and offsets
+    strings     every distinct string once, referenced by its number
+
+Numbers, booleans and dates are stored in place, strings (and values
+that are neither, encoded as JSON) are stored in the string table.
+"""
+
+from array import array
+from collections.abc import Mapping
+from datetime import datetime, timedelta
+from functools import partial
+import json
+import mmap
+import os
+import struct
+import sys
+from typing import Any, BinaryIO, Iterable, Iterator, Optional
+import zlib
+
+import sqlalchemy as sa
+
+from src.models.base import Base
+from src.persistence.file import FileRepository
+from src.persistence.table import Record
+from utils.constants import SNAPSHOT_STORAGE_FILENAME
+
+MAGIC = b"HBNBSNAP"
+VERSION = 1
+
+INT = b"q"
+FLOAT = b"d"
+BOOL = b"?"
+DATETIME = b"t"
+STRING = b"s"
+JSON = b"j"
+
+_HEADER = struct.Struct("<8sHHIIQQ")
+_MODEL = struct.Struct("<III")
+_COLUMN = struct.Struct("<IcxxxQQ")
+# Typecode of the cells of every kind of column
+_CELLS = {
+    INT: "q",
+    FLOAT: "d",
+    BOOL: "B",
+    DATETIME: "q",
+    STRING: "I",
+    JSON: "I",
+}
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+_INT64 = range(-(2**63), 2**63)
+
+
+class SnapshotError(ValueError):
+    """Raised when a file isn't a valid snapshot"""
+
+
+def _column_kind(values: list) -> bytes:
+    """Picks the narrowest kind that can store every value of a column"""
+    present = [value for value in values if value is not None]
+    types = {type(value) for value in present}
+
+    if types <= {bool}:
+        return BOOL if present else STRING
+    if types <= {int} and all(value in _INT64 for value in present):
+        return INT
+    if types <= {int, float}:
+        return FLOAT
+    if types <= {datetime} and all(v.tzinfo is None for v in present):
+        return DATETIME
+    if types <= {str}:
+        return STRING
+
+    return JSON
+
+
+class _StringTable:
+    """Collects the distinct strings of a snapshot while it's written"""
+
+    def __init__(self) -> None:
+        """Creates an empty table"""
+        self._ids: dict[str, int] = {}
+
+    def add(self, value: str) -> int:
+        """Returns the number of a string, adding it if it's new"""
+        return self._ids.setdefault(value, len(self._ids))
+
+    def encode(self) -> bytes:
+        """Returns the string table as stored in the snapshot"""
+        encoded = [value.encode() for value in self._ids]
+        offsets = array("Q", [0])
+
+        for value in encoded:
+            offsets.append(offsets[-1] + len(value))
+
+        return (
+            struct.pack("<I", len(encoded))
+            + _little_endian(offsets)
+            + b"".join(encoded)
+        )
+
+
+def _little_endian(values: array) -> bytes:
+    """Returns the bytes of an array in little endian order"""
+    if sys.byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+
+    return values.tobytes()
+
+
+def _encode_column(
+    values: list, strings: _StringTable
+) -> tuple[bytes, bytes, Optional[bytes]]:
+    """Returns the kind, the cells and the null bitmap of a column"""
+    kind = _column_kind(values)
+    nulls = bytearray((len(values) + 7) // 8)
+    cells = []
+
+    for row, value in enumerate(values):
+        if value is None:
+            nulls[row >> 3] |= 1 << (row & 7)
+            cells.append(0)
+        elif kind == DATETIME:
+            cells.append((value - _EPOCH) // _MICROSECOND)
+        elif kind == STRING:
+            cells.append(strings.add(value))
+        elif kind == JSON:
+            cells.append(strings.add(json.dumps(value, default=str)))
+        else:
+            cells.append(value)
+
+    data = _little_endian(array(_CELLS[kind], cells))
+
+    return kind, data, bytes(nulls) if any(nulls) else None
+
+
+def dump(data: Mapping[str, list[Mapping[str, Any]]], file: BinaryIO):
+    """
+    Writes the records of every model to a file as a snapshot
+
+    The columns of a model are the fields of its records, in the order
+    they first appear
+    """
+    strings = _StringTable()
+    chunks: list[bytes] = []
+    size = _HEADER.size
+    directory = []
+
+    def append(chunk: bytes) -> int:
+        """Appends a chunk aligned to 8 bytes and returns its offset"""
+        nonlocal size
+        padding = -size % 8
+        offset = size + padding
+        chunks.append(b"\0" * padding + chunk)
+        size = offset + len(chunk)
+        return offset
+
+    for model_name, records in data.items():
+        fields = list(
+            dict.fromkeys(key for record in records for key in record)
+        )
+        columns = []
+
+        for field in fields:
+            values = [record.get(field) for record in records]
+            kind, cells, nulls = _encode_column(values, strings)
+            columns.append(
+                _COLUMN.pack(
+                    strings.add(field),
+                    kind,
+                    append(cells),
+                    append(nulls) if nulls else 0,
+                )
+            )
+
+        directory.append(
+            _MODEL.pack(strings.add(model_name), len(records), len(columns))
+        )
+        directory.extend(columns)
+
+    directory_offset = append(b"".join(directory))
+    strings_offset = append(strings.encode())
+    body = b"".join(chunks)
+
+    file.write(
+        _HEADER.pack(
+            MAGIC,
+            VERSION,
+            0,
+            zlib.crc32(body),
+            len(data),
+            directory_offset,
+            strings_offset,
+        )
+    )
+    file.write(body)
+
+
+def _cells(buffer: mmap.mmap, offset: int, count: int, typecode: str):
+    """
+    Returns a sequence over `count` numbers stored at `offset`
+
+    On little endian machines it's a view of the mapped file, nothing is
+    copied or decoded until a number is read
+    """
+    size = array(typecode).itemsize * count
+
+    if sys.byteorder == "little":
+        return memoryview(buffer)[offset:offset + size].cast(typecode)
+
+    values = array(typecode, buffer[offset:offset + size])
+    values.byteswap()
+
+    return values
+
+
+class _Strings:
+    """Reads strings from the string table of a snapshot"""
+
+    def __init__(self, buffer: mmap.mmap, offset: int) -> None:
+        """Locates the offsets and the data of the table"""
+        (count,) = struct.unpack_from("<I", buffer, offset)
+        self._buffer = buffer
+        self._offsets = _cells(buffer, offset + 4, count + 1, "Q")
+        self._data = offset + 4 + 8 * (count + 1)
+
+    def __getitem__(self, index: int) -> str:
+        """Decodes a string by its number"""
+        start = self._data + self._offsets[index]
+        end = self._data + self._offsets[index + 1]
+
+        return self._buffer[start:end].decode()
+
+    def many(self, indexes: Iterable[int]) -> list[str]:
+        """Decodes many strings by their numbers"""
+        buffer, data, offsets = self._buffer, self._data, self._offsets
+
+        return [
+            buffer[data + offsets[i]:data + offsets[i + 1]].decode()
+            for i in indexes
+        ]
+
+
+class _Column:
+    """Reads the cells of one column of a snapshot"""
+
+    __slots__ = ("_buffer", "_strings", "_kind", "_cells", "_nulls")
+
+    def __init__(
+        self,
+        buffer: mmap.mmap,
+        strings: _Strings,
+        kind: bytes,
+        rows: int,
+        offset: int,
+        nulls: int,
+    ) -> None:
+        """Stores where the column is"""
+        if kind not in _CELLS:
+            raise SnapshotError(f"Unknown column kind {kind!r}")
+
+        self._buffer = buffer
+        self._strings = strings
+        self._kind = kind
+        self._cells = _cells(buffer, offset, rows, _CELLS[kind])
+        self._nulls = nulls
+
+    def value(self, row: int) -> Any:
+        """Decodes the value of a row"""
+        if self._nulls and self._buffer[self._nulls + (row >> 3)] & (
+            1 << (row & 7)
+        ):
+            return None
+
+        value = self._cells[row]
+        kind = self._kind
+
+        if kind == STRING:
+            return self._strings[value]
+        if kind == BOOL:
+            return bool(value)
+        if kind == DATETIME:
+            return _EPOCH + value * _MICROSECOND
+        if kind == JSON:
+            return json.loads(self._strings[value])
+
+        return value
+
+    def values(self) -> list:
+        """Decodes the values of every row"""
+        kind, cells = self._kind, self._cells
+
+        if self._nulls or kind == JSON:
+            return [self.value(row) for row in range(len(cells))]
+        if kind == STRING:
+            return self._strings.many(cells)
+        if kind == BOOL:
+            return [bool(value) for value in cells]
+        if kind == DATETIME:
+            return [_EPOCH + value * _MICROSECOND for value in cells]
+
+        return cells.tolist()
+
+
+class SnapshotRecord(Record, Mapping):
+    """A row of a snapshot, its fields are decoded when they are read"""
+
+    __slots__ = ("_columns", "_row")
+
+    def __init__(self, columns: dict[str, _Column], row: int) -> None:
+        """Points the record to its row"""
+        self._columns = columns
+        self._row = row
+
+    def __getitem__(self, field: str) -> Any:
+        """Decodes a field"""
+        return self._columns[field].value(self._row)
+
+    def get(self, field: str, default: Any = None) -> Any:
+        """Decodes a field, returns `default` if there's no such field"""
+        column = self._columns.get(field)
+
+        if column is None:
+            return default
+
+        return column.value(self._row)
+
+    def __iter__(self) -> Iterator[str]:
+        """Iterates the field names"""
+        return iter(self._columns)
+
+    def __len__(self) -> int:
+        """Amount of fields"""
+        return len(self._columns)
+
+
+class Snapshot:
+    """
+    A snapshot file opened with mmap
+
+    Nothing is decoded when the file is opened besides the directory,
+    the pages of the file are shared by every process that opens it and
+    only the ones holding the fields that are read are loaded.
+    """
+
+    def __init__(self, filename: str, verify: bool = True) -> None:
+        """
+        Maps the file and reads its directory
+
+        With `verify` the checksum of the whole file is checked first
+        """
+        with open(filename, "rb") as file:
+            try:
+                self._buffer = mmap.mmap(
+                    file.fileno(), 0, access=mmap.ACCESS_READ
+                )
+            except ValueError:
+                raise SnapshotError(f"{filename} is empty") from None
+
+        buffer = self._buffer
+
+        if len(buffer) < _HEADER.size:
+            raise SnapshotError(f"{filename} is not a snapshot")
+
+        magic, version, _, crc, models, directory, strings = (
+            _HEADER.unpack_from(buffer)
+        )
+
+        if magic != MAGIC:
+            raise SnapshotError(f"{filename} is not a snapshot")
+        if version != VERSION:
+            raise SnapshotError(
+                f"{filename} has version {version}, expected {VERSION}"
+            )
+        if verify:
+            with memoryview(buffer) as view:
+                if zlib.crc32(view[_HEADER.size:]) != crc:
+                    raise SnapshotError(f"{filename} is corrupted")
+
+        self._strings = _Strings(buffer, strings)
+        self._tables: dict[str, tuple[int, dict[str, _Column]]] = {}
+
+        offset = directory
+        for _ in range(models):
+            name, rows, count = _MODEL.unpack_from(buffer, offset)
+            offset += _MODEL.size
+            columns = {}
+
+            for _ in range(count):
+                field, kind, cells, nulls = _COLUMN.unpack_from(
+                    buffer, offset
+                )
+                offset += _COLUMN.size
+                columns[self._strings[field]] = _Column(
+                    buffer, self._strings, kind, rows, cells, nulls
+                )
+
+            self._tables[self._strings[name]] = (rows, columns)
+
+    def __iter__(self) -> Iterator[str]:
+        """Iterates the names of the models"""
+        return iter(self._tables)
+
+    def records(self, model_name: str) -> Iterator[SnapshotRecord]:
+        """Iterates the records of a model"""
+        rows, columns = self._tables.get(model_name, (0, {}))
+
+        for row in range(rows):
+            yield SnapshotRecord(columns, row)
+
+    def column(self, model_name: str, field: str) -> list:
+        """Decodes a field of every record of a model"""
+        rows, columns = self._tables.get(model_name, (0, {}))
+
+        if field not in columns:
+            return [None] * rows
+
+        return columns[field].values()
+
+
+class SnapshotRepository(FileRepository):
+    """
+    Snapshot Repository
+
+    Works like the FileRepository (journal and write-behind modes
+    included), but the data is stored in a binary snapshot instead of a
+    JSON file.
+
+    `reload` maps the snapshot and only keeps a record pointing to the
+    row of every object, the fields are decoded from the file when
+    they are read (to build the indexes, or when the object is built
+    the first time it's accessed), so starting doesn't depend on the
+    size of the data and workers share the pages of the file.
+    """
+
+    def __init__(self, filename: Optional[str] = None, *args, **kw) -> None:
+        """Calls reload method"""
+        self.snapshot: Optional[Snapshot] = None
+
+        super().__init__(filename or SNAPSHOT_STORAGE_FILENAME, *args, **kw)
+
+    def _record(self, model_name: str, obj: Base) -> dict:
+        """
+        Returns the fields of an object as they are stored
+
+        The columns of mapped models are stored with their own types,
+        other objects are stored as their `to_dict`
+        """
+        mapper = getattr(self.models.get(model_name), "__mapper__", None)
+
+        if mapper is None:
+            return obj.to_dict()
+
+        record = {}
+
+        for column in mapper.columns:
+            value = getattr(obj, column.key)
+
+            if type(value) is int and isinstance(column.type, sa.Float):
+                value = float(value)
+
+            record[column.key] = value
+
+        return record
+
+    def _serialize(self) -> dict:
+        """Returns the records of every model"""
+        return {
+            k: self._table(k).records(partial(self._record, k))
+            for k in self._data
+        }
+
+    def _write_file(self, serialized: dict) -> None:
+        """
+        Writes the records to the snapshot
+
+        The snapshot is written to a temporary file first and then
+        renamed, the snapshot that is mapped stays readable until the
+        records pointing to it are gone
+        """
+        tmp_filename = f"{self.filename}.tmp"
+
+        with open(tmp_filename, "wb") as file:
+            dump(serialized, file)
+            self._sync(file)
+
+        os.replace(tmp_filename, self.filename)
+
+    def reload(self):
+        """Maps the snapshot and replays the journal"""
+        try:
+            self.snapshot = Snapshot(
+                self.filename,
+                verify=self.config.get("SNAPSHOT_STORAGE_VERIFY", True),
+            )
+        except FileNotFoundError:
+            self.snapshot = None
+            self._save_to_file()
+
+        for model_name in self.snapshot or ():
+            self._table(model_name).add_records(
+                list(self.snapshot.records(model_name)),
+                partial(self.snapshot.column, model_name),
+            )
+
+        self._replay_journal()
@@ -0,0 +1,664 @@
+"""
+This module exports the Table class used by the repositories that keep
+their objects in memory (memory, file and pickle)
+"""
+
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime
+from collections import Counter
+import heapq
+from itertools import chain
+from typing import (
+    Any,
+    Callable,
+    Collection,
+    Iterable,
+    Iterator,
+    Optional,
+    Sequence,
+)
+
+from src.persistence import query
+from src.persistence.geo import GeoGrid
+
+IndexFields = tuple[str, ...]
+
+
+def normalize_index(fields: "str | Iterable[str]") -> IndexFields:
+    """Turns an index declaration into a tuple of field names"""
+    if isinstance(fields, str):
+        return (fields,)
+    return tuple(fields)
+
+
+class Record:
+    """
+    Base class of the raw records that aren't dictionaries, e.g. the
+    rows of a snapshot that decode their fields when they are read
+
+    Subclasses implement the Mapping interface, this class isn't a
+    Mapping itself so telling records apart stays a cheap check
+    """
+
+    __slots__ = ()
+
+
+def is_record(row: Any) -> bool:
+    """Whether a row is a raw record and not an object"""
+    return type(row) is dict or isinstance(row, Record)
+
+
+def order_value(value: Any) -> Any:
+    """
+    Normalizes a value of an ordering field, so raw records (with dates
+    as ISO strings) and objects sort the same way
+    """
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if value is None:
+        return ""
+    return value
+
+
+def _value(entry: tuple[Any, str]) -> Any:
+    """Value of an entry of a sorted field"""
+    return entry[0]
+
+
+def field_value(row: Any, field: str) -> Any:
+    """Reads a field from an object or from a raw record"""
+    if is_record(row):
+        return row.get(field)
+    return getattr(row, field, None)
+
+
+class Table:
+    """
+    Stores the objects of one model keyed by their id
+
+    Besides the primary key, a table maintains the secondary indexes
+    declared by the model in `__indexes__`. An index can be a single
+    field (`"email"`) or a composite one (`("name", "country_code")`).
+    Each index maps the values of its fields to the ids of the objects
+    that have them, so `find` costs about the same as a dict lookup.
+
+    The key an object was indexed with is remembered, objects are
+    usually mutated before being updated so the old key can't be read
+    from the object itself.
+
+    A table can also hold raw records (the dictionaries read from a
+    file, or any other `Record`) that are only turned into objects with
+    `hydrate` the first time they are accessed. Indexes are built from
+    the raw values, so `find` only hydrates the records it returns.
+    `id_field` names the field holding the id in those records.
+
+    With `order` (the `__ordering__` of the model, e.g. `("created_at",
+    "id")`) the table also keeps its ids sorted by those fields, so
+    `ordered` can start at any position with a binary search, which is
+    what keyset pagination relies on.
+
+    With `ranges` (the `__ranges__` of the model) the table keeps the ids
+    sorted by each of those fields too, so `select` can find the objects
+    with a value in a range with a binary search.
+
+    `select` plans which index to start from: it counts the objects each
+    usable index would return and reads the smallest of those sets.
+
+    With `location` (the `__location__` of the model, its latitude and
+    longitude fields) the table keeps the objects in a `GeoGrid` too,
+    for `near`.
+
+    With `bitmap` (the `__bitmap__` of a link model, its owner and member
+    fields, e.g. `("place_id", "amenity_id")`) every member gets a bit
+    and the table keeps a mask per owner with the bits of its members,
+    so `linked_to_all` checks an owner with one bitwise and. Bits aren't
+    reused, members are meant to be few (like amenities).
+    """
+
+    def __init__(
+        self,
+        indexes: Iterable["str | Iterable[str]"] = (),
+        objects: Iterable[Any] = (),
+        hydrate: Optional[Callable[[dict], Any]] = None,
+        id_field: str = "id",
+        order: Iterable[str] = (),
+        location: Optional[Sequence[str]] = None,
+        ranges: Iterable[str] = (),
+        bitmap: Optional[Sequence[str]] = None,
+    ) -> None:
+        """Creates the table and adds the given objects"""
+        self._rows: dict[str, Any] = {}
+        self._indexes: dict[IndexFields, dict[tuple, dict[str, None]]] = {
+            normalize_index(fields): {} for fields in indexes
+        }
+        self._keys: dict[str, list[tuple]] = {}
+        self._hydrate = hydrate
+        self._id_field = id_field
+        self._order = tuple(order)
+        self._ordered: list[tuple[tuple, str]] = []
+        self._order_keys: dict[str, tuple] = {}
+        self._ranges: dict[str, list[tuple[Any, str]]] = {
+            field: [] for field in ranges
+        }
+        self._range_values: dict[str, tuple] = {}
+        self._location = tuple(location) if location else None
+        self._grid = GeoGrid() if location else None
+        self._bitmap = tuple(bitmap) if bitmap else None
+        self._bits: dict[Any, int] = {}
+        self._masks: dict[Any, int] = {}
+        self._pairs: Counter = Counter()
+        self._links: dict[str, tuple] = {}
+
+        for obj in objects:
+            self.add(obj)
+
+    def __len__(self) -> int:
+        """Amount of objects in the table"""
+        return len(self._rows)
+
+    def __iter__(self) -> Iterator[Any]:
+        """Iterates the objects in insertion order"""
+        for obj_id in list(self._rows):
+            obj = self._row(obj_id)
+
+            if obj is not None:
+                yield obj
+
+    def __contains__(self, obj_id: str) -> bool:
+        """Whether an object with the given id is stored"""
+        return obj_id in self._rows
+
+    @property
+    def order(self) -> tuple[str, ...]:
+        """Fields the table keeps its objects sorted by"""
+        return self._order
+
+    @property
+    def bitmap(self) -> Optional[tuple[str, ...]]:
+        """Owner and member fields the table keeps masks for"""
+        return self._bitmap
+
+    @property
+    def hydrated(self) -> int:
+        """Amount of rows that are objects and not raw records"""
+        return sum(not is_record(row) for row in self._rows.values())
+
+    def all(self) -> list:
+        """Returns every object in insertion order"""
+        return list(self)
+
+    def records(self, serialize: Callable[[Any], dict]) -> list[dict]:
+        """
+        Returns every row as a dictionary
+
+        Raw records are returned as they are, objects are turned into
+        dictionaries with `serialize`
+        """
+        return [
+            row if is_record(row) else serialize(row)
+            for row in self._rows.values()
+        ]
+
+    def values(self, fields: Sequence[str]) -> Iterator[tuple]:
+        """
+        Yields the values of some fields of every row, raw records are
+        read without being hydrated
+        """
+        for row in list(self._rows.values()):
+            if row is not None:
+                yield tuple(field_value(row, field) for field in fields)
+
+    def get(self, obj_id: str) -> Any | None:
+        """Returns an object by its id"""
+        return self._row(obj_id)
+
+    def add(self, obj: Any) -> bool:
+        """Adds an object, returns False if its id is already stored"""
+        obj_id = field_value(obj, self._id_field)
+
+        if obj_id in self._rows:
+            return False
+
+        self._rows[obj_id] = obj
+        self._index(obj_id, obj)
+
+        return True
+
+    def replace(self, obj: Any) -> bool:
+        """
+        Stores the new state of an object and moves it between index
+        buckets if the indexed fields changed
+
+        Returns False if the id isn't stored
+        """
+        obj_id = field_value(obj, self._id_field)
+
+        if obj_id not in self._rows:
+            return False
+
+        self._unindex(obj_id)
+        self._rows[obj_id] = obj
+        self._index(obj_id, obj)
+
+        return True
+
+    def load(self, record: dict) -> None:
+        """Adds or replaces a raw record, it's hydrated on first access"""
+        if not self.replace(record):
+            self.add(record)
+
+    def add_records(
+        self, records: Sequence[Any], column: Callable[[str], Sequence[Any]]
+    ) -> None:
+        """
+        Adds many raw records at once, skipping the ids already stored
+
+        `column` returns the value of a field for every record, so the
+        ids and the indexed fields can be decoded a column at a time
+        instead of a record at a time
+        """
+        fields = {self._id_field}.union(
+            *self._indexes,
+            self._order,
+            self._ranges,
+            self._location or (),
+            self._bitmap or (),
+        )
+        columns = {field: column(field) for field in fields}
+        keys = [
+            list(zip(*(columns[field] for field in index)))
+            for index in self._indexes
+        ]
+        indexes = list(self._indexes.values())
+
+        for row, (obj_id, record) in enumerate(
+            zip(columns[self._id_field], records)
+        ):
+            if obj_id in self._rows:
+                continue
+
+            self._rows[obj_id] = record
+            self._keys[obj_id] = row_keys = [key[row] for key in keys]
+
+            for index, key in zip(indexes, row_keys):
+                index.setdefault(key, {})[obj_id] = None
+
+            if self._order:
+                key = tuple(
+                    order_value(columns[field][row]) for field in self._order
+                )
+                self._order_keys[obj_id] = key
+                self._ordered.append((key, obj_id))
+
+            if self._grid is not None:
+                self._grid.add(
+                    obj_id, *(columns[field][row] for field in self._location)
+                )
+
+            if self._ranges:
+                self._range_values[obj_id] = values = tuple(
+                    columns[field][row] for field in self._ranges
+                )
+
+                for entries, value in zip(self._ranges.values(), values):
+                    if value is not None:
+                        entries.append((value, obj_id))
+
+            if self._bitmap:
+                self._link(
+                    obj_id, *(columns[field][row] for field in self._bitmap)
+                )
+
+        # Records are usually stored sorted already, which makes sorting
+        # them again nearly free
+        if self._order:
+            self._ordered.sort()
+
+        for entries in self._ranges.values():
+            entries.sort()
+
+    def remove(self, obj_id: str) -> Any | None:
+        """
+        Removes an object by its id and returns it (or its raw record if
+        it was never hydrated)
+        """
+        obj = self._rows.pop(obj_id, None)
+
+        if obj is not None:
+            self._unindex(obj_id)
+
+        return obj
+
+    def find(self, **fields) -> list:
+        """
+        Returns the objects whose attributes match the given values
+
+        Uses the index with the fewest objects for the queried values
+        (see `select`) and checks the fields on the objects it returns.
+        If no index is usable every object is checked.
+        """
+        return list(self._find(fields))
+
+    def find_one(self, **fields) -> Any | None:
+        """Returns the first object that matches the given values"""
+        return next(self._find(fields), None)
+
+    def find_iter(self, **fields) -> Iterator[Any]:
+        """Like `find`, but objects are found as they are iterated"""
+        return self._find(fields)
+
+    def ordered(
+        self,
+        after: Optional[Sequence[Any]] = None,
+        among: Optional[Collection[str]] = None,
+        **fields,
+    ) -> Iterator[Any]:
+        """
+        Iterates the objects sorted by the `order` of the table
+
+        Only the objects whose ordering values come after `after` are
+        returned, and only the ones matching `fields` and whose id is in
+        `among` if given (found through the indexes and sorted, instead
+        of walking the whole table in order)
+        """
+        if not self._order:
+            raise ValueError("The table has no order")
+
+        if fields or among is not None:
+            entries = sorted(
+                (self._order_keys[obj_id], obj_id)
+                for obj_id in self._find_ids(fields, among)
+            )
+        else:
+            entries = self._ordered
+
+        position = 0
+
+        if after is not None:
+            start = tuple(order_value(value) for value in after)
+            position = bisect_right(entries, start, key=lambda e: e[0])
+
+        while position < len(entries):
+            obj = self._row(entries[position][1])
+            position += 1
+
+            if obj is not None:
+                yield obj
+
+    def select(
+        self,
+        conditions: Sequence[query.Condition],
+        among: Optional[Collection[str]] = None,
+    ) -> Iterator[Any]:
+        """
+        Yields the objects meeting every condition (see
+        `src.persistence.query`), and whose id is in `among` if given
+
+        The objects are read from the smallest set of candidates an
+        index gives: the bucket of a hash index covered by `eq`
+        conditions, the buckets of the values of an `in` condition, the
+        range of a sorted field, or `among` itself. Every row is read
+        when no index is usable. The order of the objects depends on the
+        index used
+        """
+        for obj_id in list(self._plan(conditions, among)):
+            if among is not None and obj_id not in among:
+                continue
+
+            obj = self._row(obj_id)
+
+            if obj is not None and query.matches(obj, conditions):
+                yield obj
+
+    def linked_to_all(self, members: Iterable[Any]) -> set:
+        """
+        Returns the owners linked to every one of the members, with the
+        masks of the `bitmap` of the table
+        """
+        if self._bitmap is None:
+            raise ValueError("The table has no bitmap")
+
+        required = 0
+
+        for member in set(members):
+            bit = self._bits.get(member)
+
+            # Nobody is linked to a member without a bit
+            if bit is None:
+                return set()
+
+            required |= 1 << bit
+
+        return {
+            owner
+            for owner, mask in self._masks.items()
+            if mask & required == required
+        }
+
+    def _plan(
+        self,
+        conditions: Sequence[query.Condition],
+        among: Optional[Collection[str]] = None,
+    ) -> Iterable[str]:
+        """Returns the ids of the candidates of the cheapest index"""
+        best: Iterable[str] = self._rows
+        cost = len(self._rows)
+        equal: dict = {}
+
+        if among is not None and len(among) < cost:
+            best, cost = among, len(among)
+
+        for field, op, value in conditions:
+            if op == "eq":
+                equal.setdefault(field, value)
+
+        for fields, index in self._indexes.items():
+            if all(field in equal for field in fields):
+                bucket = index.get(tuple(equal[f] for f in fields), {})
+
+                if len(bucket) < cost:
+                    best, cost = bucket, len(bucket)
+
+        for field, op, values in conditions:
+            index = self._indexes.get((field,))
+
+            if op != "in" or index is None:
+                continue
+
+            buckets = [index.get((value,), {}) for value in set(values)]
+            size = sum(map(len, buckets))
+
+            if size < cost:
+                best, cost = chain.from_iterable(buckets), size
+
+        bounded = {
+            field for field, op, _ in conditions if op in query.RANGE_OPERATORS
+        }
+
+        for field, entries in self._ranges.items():
+            if field not in bounded:
+                continue
+
+            try:
+                start, stop = self._range(entries, field, conditions)
+            except TypeError:
+                continue
+
+            if stop - start < cost:
+                best = (obj_id for _, obj_id in entries[start:stop])
+                cost = stop - start
+
+        return best
+
+    @staticmethod
+    def _range(
+        entries: list[tuple[Any, str]],
+        field: str,
+        conditions: Sequence[query.Condition],
+    ) -> tuple[int, int]:
+        """
+        Returns the positions of the entries of a sorted field that the
+        conditions on that field allow
+        """
+        start, stop = 0, len(entries)
+
+        for name, op, value in conditions:
+            if name != field:
+                continue
+
+            if op in ("gt", "gte", "eq"):
+                find = bisect_right if op == "gt" else bisect_left
+                start = max(start, find(entries, value, key=_value))
+
+            if op in ("lt", "lte", "eq"):
+                find = bisect_left if op == "lt" else bisect_right
+                stop = min(stop, find(entries, value, key=_value))
+
+        return start, max(start, stop)
+
+    def near(
+        self,
+        latitude: float,
+        longitude: float,
+        radius_km: float,
+        limit: Optional[int] = None,
+    ) -> list[tuple[Any, float]]:
+        """
+        Returns the objects within `radius_km` of a point with their
+        distance, the closest first
+        """
+        if self._grid is None:
+            raise ValueError("The table has no location")
+
+        found = self._grid.near(latitude, longitude, radius_km)
+        found = (
+            sorted(found) if limit is None else heapq.nsmallest(limit, found)
+        )
+
+        return [(self._row(obj_id), distance) for distance, obj_id in found]
+
+    def _row(self, obj_id: str) -> Any | None:
+        """Returns a row, hydrating it if it's still a raw record"""
+        row = self._rows.get(obj_id)
+
+        if self._hydrate and is_record(row):
+            row = self._rows[obj_id] = self._hydrate(row)
+
+        return row
+
+    def _find(self, fields: dict) -> Iterator[Any]:
+        """Generator behind `find` and `find_one`"""
+        for obj_id in self._find_ids(fields):
+            yield self._row(obj_id)
+
+    def _find_ids(
+        self, fields: dict, among: Optional[Collection[str]] = None
+    ) -> Iterator[str]:
+        """
+        Generates the ids of the rows matching the given values, and in
+        `among` if given
+        """
+        candidates = self._plan(
+            [(k, "eq", v) for k, v in fields.items()], among
+        )
+
+        for obj_id in list(candidates):
+            row = self._rows.get(obj_id)
+
+            if row is None or (among is not None and obj_id not in among):
+                continue
+
+            if all(field_value(row, k) == v for k, v in fields.items()):
+                yield obj_id
+
+    def _index(self, obj_id: str, obj: Any) -> None:
+        """Adds an object to every secondary index"""
+        keys = []
+
+        for fields, index in self._indexes.items():
+            key = tuple(field_value(obj, field) for field in fields)
+            index.setdefault(key, {})[obj_id] = None
+            keys.append(key)
+
+        self._keys[obj_id] = keys
+
+        if self._order:
+            key = tuple(
+                order_value(field_value(obj, field)) for field in self._order
+            )
+            self._order_keys[obj_id] = key
+
+            if not self._ordered or self._ordered[-1] <= (key, obj_id):
+                self._ordered.append((key, obj_id))
+            else:
+                insort(self._ordered, (key, obj_id))
+
+        if self._grid is not None:
+            self._grid.add(
+                obj_id, *(field_value(obj, field) for field in self._location)
+            )
+
+        if self._ranges:
+            self._range_values[obj_id] = values = tuple(
+                field_value(obj, field) for field in self._ranges
+            )
+
+            for entries, value in zip(self._ranges.values(), values):
+                if value is not None:
+                    insort(entries, (value, obj_id))
+
+        if self._bitmap:
+            self._link(
+                obj_id, *(field_value(obj, field) for field in self._bitmap)
+            )
+
+    def _unindex(self, obj_id: str) -> None:
+        """Removes an object from every secondary index"""
+        keys = self._keys.pop(obj_id, [])
+
+        for index, key in zip(self._indexes.values(), keys):
+            bucket = index.get(key, {})
+            bucket.pop(obj_id, None)
+
+            if not bucket:
+                index.pop(key, None)
+
+        key = self._order_keys.pop(obj_id, None)
+
+        if key is not None:
+            position = bisect_left(self._ordered, (key, obj_id))
+            del self._ordered[position]
+
+        if self._grid is not None:
+            self._grid.remove(obj_id)
+
+        values = self._range_values.pop(obj_id, ())
+
+        for entries, value in zip(self._ranges.values(), values):
+            if value is not None:
+                del entries[bisect_left(entries, (value, obj_id))]
+
+        link = self._links.pop(obj_id, None)
+
+        if link is not None:
+            self._pairs[link] -= 1
+
+            if not self._pairs[link]:
+                del self._pairs[link]
+                owner, member = link
+                mask = self._masks[owner] & ~(1 << self._bits[member])
+
+                if mask:
+                    self._masks[owner] = mask
+                else:
+                    del self._masks[owner]
+
+    def _link(self, obj_id: str, owner: Any, member: Any) -> None:
+        """Sets the bit of the member in the mask of the owner"""
+        if owner is None or member is None:
+            return
+
+        bit = self._bits.setdefault(member, len(self._bits))
+        link = self._links[obj_id] = (owner, member)
+        self._pairs[link] += 1
+        self._masks[owner] = self._masks.get(owner, 0) | 1 << bit
@@ -0,0 +1,438 @@
+"""
+Full-text search over the text fields of the models
+
+Models opt in by naming their text fields in `__search__`. Each of them
+gets an inverted index mapping every term to the objects holding it and
+how many times, and results are ranked with BM25: rare terms weigh more
+than common ones, and a term counts more in a short text than in a long
+one.
+
+Texts are normalized before they're split in terms: they're lowercased,
+accents are removed (so "café" matches "cafe") and the most common
+English words are dropped.
+
+The index is built from the repository the first time it's searched.
+After that every write through the repository marks the objects it
+changed, and they are read again and reindexed together on the next
+search, so a write doesn't pay for it and a batch of them is read with
+one query. Objects that no longer exist are removed, which covers
+deletes and rolled back transactions alike.
+
+The writes of other processes sharing the database (like the other
+workers of the server) don't go through this repository manager. On
+every search the shared state of each model (see
+`RepositoryManager.shared_state`) is compared with the one last seen,
+and when it changed the id and `updated_at` of every object are read
+and the objects that differ from the indexed ones are reindexed. That
+also catches the writes made around the repository (like through
+`db.session` directly).
+
+With `SEARCH_INDEX_PERSIST` the index of the repositories that keep
+their data in files is saved next to them after it's built and when the
+app exits. The next process loads it instead of building it, as long as
+the files didn't change in between.
+"""
+
+import atexit
+from collections import Counter
+import heapq
+import math
+import os
+import pickle
+import re
+import threading
+import unicodedata
+from typing import Any, Optional
+
+from flask import Flask
+
+from utils.constants import SEARCH_INDEX_SUFFIX
+
+# Parameters of BM25, the usual ones: K1 caps the weight of a repeated
+# term and B sets how much longer texts are penalized
+K1 = 1.2
+B = 0.75
+
+# Changes whenever the layout of the saved index does
+FORMAT = 1
+
+TOKEN = re.compile(r"\w+")
+
+STOPWORDS = frozenset(
+    "a an and are as at be but by for from has have in is it its of on or "
+    "that the this to was were will with".split()
+)
+
+
+def normalize(text: str) -> str:
+    """Lowercases a text and removes its accents"""
+    text = text.casefold()
+
+    if text.isascii():
+        return text
+
+    return "".join(
+        char
+        for char in unicodedata.normalize("NFKD", text)
+        if not unicodedata.combining(char)
+    )
+
+
+def tokenize(text: Optional[str]) -> list[str]:
+    """Splits a text in normalized terms, without the stopwords"""
+    if not text:
+        return []
+
+    return [
+        term
+        for term in TOKEN.findall(normalize(text))
+        if term not in STOPWORDS
+    ]
+
+
+class TextIndex:
+    """Inverted index of the texts of the objects of one model"""
+
+    def __init__(self) -> None:
+        """Creates an empty index"""
+        self._postings: dict[str, dict[str, int]] = {}
+        self._lengths: dict[str, int] = {}
+        self._terms: dict[str, tuple[str, ...]] = {}
+        self._total = 0
+        # Length normalization of every object, computed again on the
+        # first search after a change since it depends on the average
+        self._norms: Optional[dict[str, float]] = None
+
+    def __len__(self) -> int:
+        """Amount of objects indexed"""
+        return len(self._lengths)
+
+    def add(self, key: str, terms: list[str]) -> None:
+        """Indexes the terms of an object, replacing the previous ones"""
+        self.remove(key)
+
+        if not terms:
+            return
+
+        counts = Counter(terms)
+
+        for term, frequency in counts.items():
+            self._postings.setdefault(term, {})[key] = frequency
+
+        self._terms[key] = tuple(counts)
+        self._lengths[key] = len(terms)
+        self._total += len(terms)
+        self._norms = None
+
+    def remove(self, key: str) -> None:
+        """Removes an object from the index, if it's in it"""
+        terms = self._terms.pop(key, None)
+
+        if terms is None:
+            return
+
+        self._total -= self._lengths.pop(key)
+        self._norms = None
+
+        for term in terms:
+            keys = self._postings[term]
+            del keys[key]
+
+            if not keys:
+                del self._postings[term]
+
+    def search(self, terms: list[str], limit: int) -> list[tuple[str, float]]:
+        """
+        Returns the key and the score of the `limit` objects ranking
+        highest for the terms, the best first
+        """
+        if not self._lengths or limit <= 0:
+            return []
+
+        amount = len(self._lengths)
+
+        if self._norms is None:
+            average = self._total / amount
+            self._norms = {
+                key: K1 * (1 - B + B * length / average)
+                for key, length in self._lengths.items()
+            }
+
+        norms = self._norms
+        scores: dict[str, float] = {}
+        get = scores.get
+
+        for term in set(terms):
+            keys = self._postings.get(term)
+
+            if not keys:
+                continue
+
+            idf = math.log(1 + (amount - len(keys) + 0.5) / (len(keys) + 0.5))
+            weight = idf * (K1 + 1)
+
+            for key, frequency in keys.items():
+                scores[key] = get(key, 0.0) + weight * frequency / (
+                    frequency + norms[key]
+                )
+
+        best = heapq.nsmallest(
+            limit, ((-score, key) for key, score in scores.items())
+        )
+
+        return [(key, -score) for score, key in best]
+
+
+class SearchIndex:
+    """Manages the full-text indexes of the Flask App"""
+
+    def __init__(self) -> None:
+        """Creates an empty index, `init_app` configures it"""
+        self._lock = threading.RLock()
+        self._pending_lock = threading.Lock()
+        self._indexes: dict[str, TextIndex] = {}
+        self._pending: dict[str, set[str]] = {}
+        self._fields: dict[str, tuple[str, ...]] = {}
+        # Shared state of every model and `updated_at` of every object
+        # indexed, to catch up with the writes of other processes
+        self._states: dict[str, Optional[str]] = {}
+        self._stamps: dict[str, dict[str, Any]] = {}
+        self._tracking = False
+        self._exit_hook = False
+        self.repo: Any = None
+        self.app: Optional[Flask] = None
+        self.path: Optional[str] = None
+
+    def init_app(self, app: Flask, repo: Any) -> None:
+        """
+        Configures the index for the app and subscribes it to the
+        changes made through the repository manager `repo`
+        """
+        with self._lock:
+            self.app = app
+            self.repo = repo
+            self._fields = {
+                model_name: tuple(model.__search__)
+                for model_name, model in repo.models.items()
+                if getattr(model, "__search__", None)
+            }
+            self._indexes = {}
+            self._pending = {model_name: set() for model_name in self._fields}
+            self._states = {}
+            self._stamps = {}
+            self._tracking = False
+            self.path = None
+
+            files = repo.files()
+
+            if app.config.get("SEARCH_INDEX_PERSIST", False) and files:
+                self.path = os.path.splitext(files[0])[0] + SEARCH_INDEX_SUFFIX
+
+                if not self._exit_hook:
+                    atexit.register(self._save_on_exit)
+                    self._exit_hook = True
+
+        repo.subscribe(self.track)
+
+    def track(self, objs: list) -> None:
+        """Marks written objects to be reindexed on the next search"""
+        if not self._tracking:
+            return
+
+        with self._pending_lock:
+            for obj in objs:
+                pending = self._pending.get(obj.__class__.__name__)
+
+                if pending is not None:
+                    pending.add(obj.id)
+
+    def search(
+        self, model_name: str, text: str, limit: int, offset: int = 0
+    ) -> list[tuple[str, float]]:
+        """
+        Returns the id and the score of the objects of a model matching
+        a text, the best first, paginated with `limit` and `offset`
+        """
+        if model_name not in self._fields:
+            raise ValueError(f"{model_name} can't be searched")
+
+        terms = tokenize(text)
+
+        with self._lock:
+            self.refresh()
+            found = self._indexes[model_name].search(terms, offset + limit)
+
+        return found[offset:]
+
+    def refresh(self) -> None:
+        """
+        Builds the index if needed, reindexes the written objects and
+        catches up with the writes of other processes
+        """
+        with self._lock:
+            if not self._tracking:
+                self._build()
+
+            with self._pending_lock:
+                pending = {
+                    model_name: ids
+                    for model_name, ids in self._pending.items()
+                    if ids
+                }
+                self._pending = {
+                    model_name: set() for model_name in self._fields
+                }
+
+            for model_name, ids in pending.items():
+                self._reindex(model_name, ids)
+
+            for model_name in self._fields:
+                self._catch_up(model_name)
+
+    def _terms(self, obj: Any, fields: tuple[str, ...]) -> list[str]:
+        """Returns the terms of the text fields of an object"""
+        return tokenize(" ".join(getattr(obj, f, None) or "" for f in fields))
+
+    def _reindex(self, model_name: str, ids: set[str]) -> None:
+        """Reads the objects again and updates their terms"""
+        fields = self._fields[model_name]
+        index = self._indexes[model_name]
+        stamps = self._stamps.get(model_name)
+        found = {obj.id: obj for obj in self.repo.get_many(model_name, ids)}
+
+        for key in ids:
+            obj = found.get(key)
+
+            if obj is None:
+                index.remove(key)
+            else:
+                index.add(key, self._terms(obj, fields))
+
+            if stamps is not None:
+                if obj is None:
+                    stamps.pop(key, None)
+                else:
+                    stamps[key] = obj.updated_at
+
+    def _catch_up(self, model_name: str) -> None:
+        """
+        Reindexes the objects of a model written by other processes, if
+        they share its storage and its state changed since last seen
+        """
+        state = self.repo.shared_state(model_name)
+
+        if state is None or state == self._states.get(model_name):
+            return
+
+        # The state is read first, so writes made while the objects are
+        # read change it again and are caught up with on the next search
+        self._states[model_name] = state
+        stamps = self._stamps.setdefault(model_name, {})
+        current = dict(
+            self.repo.iter_values(model_name, ("id", "updated_at"))
+        )
+        changed = {
+            key for key, stamp in current.items() if stamps.get(key) != stamp
+        }
+        changed |= stamps.keys() - current.keys()
+
+        if changed:
+            self._reindex(model_name, changed)
+
+    def _build(self) -> None:
+        """Loads the saved index if it's current, or reads every object"""
+        # Writes from now on are tracked, the ones before are in the
+        # files or the objects read below
+        self._tracking = True
+        fingerprint = self._fingerprint()
+
+        if self._load(fingerprint):
+            return
+
+        self._indexes = {}
+
+        for model_name, fields in self._fields.items():
+            index = self._indexes[model_name] = TextIndex()
+            state = self.repo.shared_state(model_name)
+            stamps = None
+
+            if state is not None:
+                self._states[model_name] = state
+                stamps = self._stamps[model_name] = {}
+
+            for obj in self.repo.iter_all(model_name):
+                index.add(obj.id, self._terms(obj, fields))
+
+                if stamps is not None:
+                    stamps[obj.id] = obj.updated_at
+
+        self._save(fingerprint)
+
+    def _fingerprint(self) -> Optional[tuple]:
+        """
+        Size and modification time of the files of the repository, after
+        writing their pending changes
+        """
+        if self.path is None:
+            return None
+
+        self.repo.flush()
+        fingerprint = []
+
+        for filename in self.repo.files():
+            if os.path.exists(filename):
+                stat = os.stat(filename)
+                fingerprint.append(
+                    (filename, stat.st_size, stat.st_mtime_ns)
+                )
+
+        return tuple(fingerprint)
+
+    def _load(self, fingerprint: Optional[tuple]) -> bool:
+        """Loads the saved index if it matches the files"""
+        if fingerprint is None or not os.path.exists(self.path):
+            return False
+
+        try:
+            with open(self.path, "rb") as file:
+                saved = pickle.load(file)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return False
+
+        if (saved.get("format"), saved.get("fields")) != (
+            FORMAT,
+            self._fields,
+        ) or saved.get("fingerprint") != fingerprint:
+            return False
+
+        self._indexes = saved["indexes"]
+
+        return True
+
+    def _save(self, fingerprint: Optional[tuple]) -> None:
+        """Saves the index, through a temporary file renamed into place"""
+        if fingerprint is None:
+            return
+
+        saved = {
+            "format": FORMAT,
+            "fields": self._fields,
+            "fingerprint": fingerprint,
+            "indexes": self._indexes,
+        }
+        temporary = f"{self.path}.{os.getpid()}.tmp"
+
+        with open(temporary, "wb") as file:
+            pickle.dump(saved, file, protocol=pickle.HIGHEST_PROTOCOL)
+
+        os.replace(temporary, self.path)
+
+    def _save_on_exit(self) -> None:
+        """Saves the index with the changes made by this process"""
+        if self.path is None or not self._tracking or self.app is None:
+            return
+
+        with self.app.app_context(), self._lock:
+            fingerprint = self._fingerprint()
+            self.refresh()
+            self._save(fingerprint)
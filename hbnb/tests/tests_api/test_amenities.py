@@ -1,3 +1,4 @@
+import json
 import unittest
 import uuid
 
@@ -56,6 +57,39 @@ class AmenityManagementTests(unittest.TestCase):
         ), f"Expected status code 201 but got {response.status_code}. Response: {response.json}"
         return response.get_json()["id"]
 
+    def test_post_amenities_bulk(self):
+        name = f"Bulk Amenity {uuid.uuid4()}"
+        response = self.app.post(
+            "/amenities/bulk",
+            json=[{"name": name}, {"name": f"{name}!"}, {"name": name}],
+            headers=self.headers,
+        )
+        self.assertEqual(response.status_code, 200)
+
+        data = response.get_json()
+        self.assertEqual(data["created"], 2)
+        self.assertEqual(
+            [r["status"] for r in data["results"]], [201, 201, 400]
+        )
+
+        response = self.app.get(
+            f"/amenities/{data['results'][0]['body']['id']}"
+        )
+        self.assertEqual(response.get_json()["name"], name)
+
+        response = self.app.post(
+            "/amenities/bulk", json=[{}], headers=self.headers
+        )
+        self.assertEqual(response.status_code, 400)
+
+        self.client.config["BULK_MAX_ITEMS"] = 1
+        response = self.app.post(
+            "/amenities/bulk",
+            json=[{"name": f"{name}?"}, {"name": f"{name}??"}],
+            headers=self.headers,
+        )
+        self.assertEqual(response.status_code, 400)
+
     def test_get_amenities(self):
         response = self.app.get("/amenities")
         self.assertEqual(
@@ -69,6 +103,95 @@ class AmenityManagementTests(unittest.TestCase):
             f"Expected response to be a list but got {type(response.get_json())}",
         )
 
+    def test_get_amenities_pages(self):
+        created = {self.create_unique_amenity() for _ in range(3)}
+        seen = []
+        url = "/amenities?limit=2"
+
+        while url:
+            response = self.app.get(url)
+            self.assertEqual(response.status_code, 200)
+            page = response.get_json()
+            self.assertLessEqual(len(page), 2, "Expected at most 2 per page")
+            seen.extend(amenity["id"] for amenity in page)
+
+            cursor = response.headers.get("X-Next-Cursor")
+            url = f"/amenities?limit=2&cursor={cursor}" if cursor else None
+            if cursor:
+                self.assertIn('rel="next"', response.headers["Link"])
+
+        self.assertEqual(len(seen), len(set(seen)), "Expected no repeats")
+        self.assertTrue(created <= set(seen), "Expected every amenity")
+
+        response = self.app.get("/amenities?cursor=not-a-cursor")
+        self.assertEqual(response.status_code, 400)
+
+        response = self.app.get("/amenities?limit=0")
+        self.assertEqual(response.status_code, 400)
+
+    def test_get_amenities_etag(self):
+        response = self.app.get("/amenities")
+        etag = response.headers["ETag"]
+
+        response = self.app.get(
+            "/amenities", headers={"If-None-Match": etag}
+        )
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.data, b"", "Expected an empty body")
+        self.assertEqual(response.headers["ETag"], etag)
+
+        response = self.app.get(
+            "/amenities?fields=id", headers={"If-None-Match": etag}
+        )
+        self.assertEqual(response.status_code, 200, "Expected other args")
+
+        self.create_unique_amenity()
+        response = self.app.get(
+            "/amenities", headers={"If-None-Match": etag}
+        )
+        self.assertEqual(response.status_code, 200, "Expected a new ETag")
+        self.assertNotEqual(response.headers["ETag"], etag)
+
+    def test_get_amenity_etag(self):
+        amenity_id = self.create_unique_amenity()
+        response = self.app.get(f"/amenities/{amenity_id}")
+        etag = response.headers["ETag"]
+
+        response = self.app.get(
+            f"/amenities/{amenity_id}", headers={"If-None-Match": etag}
+        )
+        self.assertEqual(response.status_code, 304)
+
+        self.app.put(
+            f"/amenities/{amenity_id}",
+            json={"name": f"Updated Amenity {uuid.uuid4()}"},
+            headers=self.headers,
+        )
+        response = self.app.get(
+            f"/amenities/{amenity_id}", headers={"If-None-Match": etag}
+        )
+        self.assertEqual(response.status_code, 200, "Expected a new ETag")
+
+    def test_stream_amenities(self):
+        created = {self.create_unique_amenity() for _ in range(3)}
+
+        response = self.app.get("/amenities?stream=true&limit=1")
+        self.assertTrue(response.is_streamed, "Expected a streamed body")
+        amenities = response.get_json()
+        self.assertIsInstance(amenities, list)
+        self.assertTrue(created <= {a["id"] for a in amenities})
+
+        response = self.app.get(
+            "/amenities?fields=id",
+            headers={"Accept": "application/x-ndjson"},
+        )
+        self.assertEqual(response.mimetype, "application/x-ndjson")
+        lines = response.get_data(as_text=True).splitlines()
+        self.assertEqual(
+            [json.loads(line) for line in lines],
+            [{"id": amenity["id"]} for amenity in amenities],
+        )
+
     def test_post_amenity(self):
         unique_amenity_name = f"Test Amenity {uuid.uuid4()}"
         new_amenity = {"name": unique_amenity_name}
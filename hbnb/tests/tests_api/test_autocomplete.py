@@ -0,0 +1,164 @@
+from datetime import datetime
+import unittest
+import uuid
+
+from flask_jwt_extended import create_access_token
+from src import create_app, db
+from src.autocomplete import NameIndex
+from src.config import TestingConfig
+from src.models.amenity import Amenity
+from tests.tests_api.test_amenities import create_admin_user
+
+
+class NameIndexTests(unittest.TestCase):
+
+    def test_complete(self):
+        index = NameIndex()
+        index.load([("1", "Montevideo"), ("2", "Montréal"), ("3", "Lima")])
+        index.add("4", "montañas")
+        index.add("5", "")
+
+        self.assertEqual(
+            index.complete("MONT", 10),
+            [("4", "montañas"), ("1", "Montevideo"), ("2", "Montréal")],
+        )
+        self.assertEqual(index.complete("montre", 10), [("2", "Montréal")])
+        self.assertEqual(index.complete("mont", 1), [("4", "montañas")])
+        self.assertEqual(
+            index.complete("Mont", 10, exact=True),
+            [("1", "Montevideo"), ("2", "Montréal")],
+        )
+        self.assertEqual(index.complete("montre", 10, exact=True), [])
+
+        index.add("2", "Quebec")
+        index.remove("1")
+        index.remove("9")
+        self.assertEqual(index.complete("mont", 10), [("4", "montañas")])
+        self.assertEqual(len(index), 3)
+
+
+class AutocompleteTests(unittest.TestCase):
+
+    def setUp(self):
+        self.client = create_app(TestingConfig)
+        self.app = self.client.test_client()
+        self.app.testing = True
+
+        admin_user = create_admin_user(self.client)
+
+        with self.client.app_context():
+            token = create_access_token(
+                admin_user, additional_claims={"is_admin": True}
+            )
+
+        self.headers = {"Authorization": f"Bearer {token}"}
+        self.prefix = f"x{uuid.uuid4().hex[:8]}"
+
+    def complete(self, query: str) -> list[str]:
+        response = self.app.get(f"/autocomplete?{query}")
+        self.assertEqual(response.status_code, 200, response.get_json())
+
+        return [obj["name"] for obj in response.get_json()]
+
+    def test_autocomplete_amenities(self):
+        ids = {}
+
+        for name in ("Pool", "Piscina climatizada", "Párking"):
+            response = self.app.post(
+                "/amenities",
+                json={"name": f"{self.prefix} {name}"},
+                headers=self.headers,
+            )
+            self.assertEqual(response.status_code, 201)
+            ids[name] = response.get_json()["id"]
+
+        # The index is built on the first lookup
+        self.assertEqual(
+            self.complete(f"q={self.prefix}+p&type=amenity"),
+            [
+                f"{self.prefix} Párking",
+                f"{self.prefix} Piscina climatizada",
+                f"{self.prefix} Pool",
+            ],
+        )
+        self.assertEqual(
+            self.complete(f"q={self.prefix}+PA&type=amenity&exact=true"), []
+        )
+
+        # And follows the writes after it
+        self.app.put(
+            f"/amenities/{ids['Pool']}",
+            json={"name": f"{self.prefix} Gym"},
+            headers=self.headers,
+        )
+        self.app.delete(f"/amenities/{ids['Párking']}", headers=self.headers)
+        self.assertEqual(
+            self.complete(f"q={self.prefix.upper()}&type=amenity&limit=5"),
+            [f"{self.prefix} Gym", f"{self.prefix} Piscina climatizada"],
+        )
+        self.assertEqual(
+            self.complete(f"q={self.prefix}&type=amenity&limit=1"),
+            [f"{self.prefix} Gym"],
+        )
+
+    def test_autocomplete_follows_other_workers(self):
+        ids = {}
+
+        for name in ("Pool", "Parking"):
+            response = self.app.post(
+                "/amenities",
+                json={"name": f"{self.prefix} {name}"},
+                headers=self.headers,
+            )
+            self.assertEqual(response.status_code, 201)
+            ids[name] = response.get_json()["id"]
+
+        self.assertEqual(
+            self.complete(f"q={self.prefix}&type=amenity"),
+            [f"{self.prefix} Parking", f"{self.prefix} Pool"],
+        )
+
+        # Written straight to the database, like another worker would
+        with self.client.app_context():
+            db.session.add(Amenity(f"{self.prefix} Sauna"))
+            db.session.delete(db.session.get(Amenity, ids["Parking"]))
+            pool = db.session.get(Amenity, ids["Pool"])
+            pool.name = f"{self.prefix} Gym"
+            pool.updated_at = datetime.now()
+            db.session.commit()
+
+        self.assertEqual(
+            self.complete(f"q={self.prefix}&type=amenity"),
+            [f"{self.prefix} Gym", f"{self.prefix} Sauna"],
+        )
+
+    def test_autocomplete_cities(self):
+        response = self.app.post(
+            "/cities",
+            json={"name": f"{self.prefix} São Paulo", "country_code": "UY"},
+            headers=self.headers,
+        )
+        self.assertEqual(response.status_code, 201)
+
+        response = self.app.get(
+            f"/autocomplete?q={self.prefix}+sao&type=city"
+        )
+        self.assertEqual(
+            response.get_json(),
+            [
+                {
+                    "id": response.get_json()[0]["id"],
+                    "name": f"{self.prefix} São Paulo",
+                }
+            ],
+        )
+        self.assertEqual(self.complete(f"q={self.prefix}"), [])
+
+    def test_invalid_query(self):
+        for query in ("", "q=", "q=a&type=users", "q=a&limit=0"):
+            response = self.app.get(f"/autocomplete?{query}")
+            self.assertEqual(response.status_code, 400, query)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,141 @@
+import unittest
+import uuid
+
+from flask_jwt_extended import create_access_token
+from src import create_app
+from src.config import TestingConfig
+from tests.tests_api.test_amenities import create_admin_user
+
+
+class BatchTests(unittest.TestCase):
+
+    def setUp(self):
+        self.client = create_app(TestingConfig)
+        self.app = self.client.test_client()
+        self.app.testing = True
+
+        self.admin_user = create_admin_user(self.client)
+
+        with self.client.app_context():
+            self.token = create_access_token(
+                self.admin_user, additional_claims={"is_admin": True}
+            )
+
+        self.headers = {"Authorization": f"Bearer {self.token}"}
+
+    def batch(self, operations: list, atomic: bool = False):
+        return self.app.post(
+            "/batch",
+            json={"operations": operations, "atomic": atomic},
+            headers=self.headers,
+        )
+
+    def test_operations_use_previous_results(self):
+        name = f"Batch Amenity {uuid.uuid4()}"
+        response = self.batch(
+            [
+                {"method": "POST", "path": "/amenities",
+                 "body": {"name": name}},
+                {"method": "GET", "path": "/amenities/${0.id}"},
+                {"method": "PUT", "path": "/amenities/${0.id}",
+                 "body": {"name": "${1.name}!"}},
+            ]
+        )
+        self.assertEqual(response.status_code, 200)
+
+        data = response.get_json()
+        self.assertTrue(data["committed"])
+        self.assertEqual(
+            [r["status"] for r in data["results"]], [201, 200, 200]
+        )
+        self.assertEqual(data["results"][1]["body"]["name"], name)
+
+        amenity_id = data["results"][0]["body"]["id"]
+        response = self.app.get(f"/amenities/{amenity_id}")
+        self.assertEqual(response.get_json()["name"], f"{name}!")
+
+    def test_failures_dont_stop_a_batch(self):
+        name = f"Batch Amenity {uuid.uuid4()}"
+        response = self.batch(
+            [
+                {"method": "GET", "path": "/amenities/missing"},
+                {"method": "POST", "path": "/amenities",
+                 "body": {"name": name}},
+                {"method": "GET", "path": "/amenities/${9.id}"},
+                {"method": "POST", "path": "/batch"},
+            ]
+        )
+
+        data = response.get_json()
+        self.assertEqual(
+            [r["status"] for r in data["results"]], [404, 201, 400, 400]
+        )
+
+    def test_references_cant_point_to_the_batch(self):
+        response = self.batch(
+            [
+                {"method": "POST", "path": "/amenities",
+                 "body": {"name": "batch"}},
+                {"method": "POST", "path": "/${0.name}"},
+                {"method": "GET", "path": "${0.id}"},
+            ]
+        )
+
+        data = response.get_json()
+        self.assertEqual(
+            [r["status"] for r in data["results"]], [201, 400, 400]
+        )
+
+    def test_atomic_batch_rolls_back(self):
+        name = f"Batch Amenity {uuid.uuid4()}"
+        response = self.batch(
+            [
+                {"method": "POST", "path": "/amenities",
+                 "body": {"name": name}},
+                {"method": "POST", "path": "/amenities",
+                 "body": {"name": name}},
+                {"method": "GET", "path": "/amenities/${0.id}"},
+            ],
+            atomic=True,
+        )
+        self.assertEqual(response.status_code, 200)
+
+        data = response.get_json()
+        self.assertFalse(data["committed"])
+        self.assertEqual(
+            [r["status"] for r in data["results"]], [201, 400, 424]
+        )
+
+        amenity_id = data["results"][0]["body"]["id"]
+        response = self.app.get(f"/amenities/{amenity_id}")
+        self.assertEqual(response.status_code, 404)
+
+    def test_atomic_batch_commits(self):
+        names = [f"Batch Amenity {uuid.uuid4()}" for _ in range(2)]
+        response = self.batch(
+            [
+                {"method": "POST", "path": "/amenities",
+                 "body": {"name": name}}
+                for name in names
+            ],
+            atomic=True,
+        )
+
+        data = response.get_json()
+        self.assertTrue(data["committed"])
+
+        for result in data["results"]:
+            response = self.app.get(f"/amenities/{result['body']['id']}")
+            self.assertEqual(response.status_code, 200)
+
+    def test_operations_are_limited(self):
+        self.client.config["BATCH_MAX_OPERATIONS"] = 1
+        response = self.batch(
+            [{"method": "GET", "path": "/amenities"}] * 2
+        )
+
+        self.assertEqual(response.status_code, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,169 @@
+from datetime import datetime
+import time
+import unittest
+import uuid
+
+from flask_jwt_extended import create_access_token
+from src import cache, create_app, db
+from src.cache import CachedResponse
+from src.config import TestingConfig
+from src.models.amenity import Amenity
+from tests.tests_api.test_amenities import create_admin_user
+
+
+class ResponseCacheTests(unittest.TestCase):
+
+    def setUp(self):
+        self.client = create_app(TestingConfig)
+        self.app = self.client.test_client()
+        self.app.testing = True
+
+        self.admin_user = create_admin_user(self.client)
+
+        with self.client.app_context():
+            self.token = create_access_token(
+                self.admin_user, additional_claims={"is_admin": True}
+            )
+
+        self.headers = {"Authorization": f"Bearer {self.token}"}
+
+    def test_hit_after_miss(self):
+        first = self.app.get("/countries")
+        second = self.app.get("/countries")
+
+        self.assertEqual(first.headers["X-Cache"], "MISS")
+        self.assertEqual(second.headers["X-Cache"], "HIT")
+        self.assertEqual(first.data, second.data)
+        self.assertEqual(first.headers["ETag"], second.headers["ETag"])
+
+        response = self.app.get(
+            "/countries", headers={"If-None-Match": second.headers["ETag"]}
+        )
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.data, b"")
+
+        stats = self.app.get("/cache", headers=self.headers).get_json()
+        self.assertEqual(stats["hits"], 2)
+        self.assertEqual(stats["misses"], 1)
+        self.assertEqual(stats["entries"], 1)
+
+    def test_write_invalidates(self):
+        self.app.get("/amenities")
+        self.assertEqual(
+            self.app.get("/amenities").headers["X-Cache"], "HIT"
+        )
+
+        name = f"Cached Amenity {uuid.uuid4()}"
+        response = self.app.post(
+            "/amenities", json={"name": name}, headers=self.headers
+        )
+        amenity_id = response.get_json()["id"]
+
+        response = self.app.get("/amenities?limit=1000")
+        self.assertEqual(response.headers["X-Cache"], "MISS")
+        self.assertIn(name, [a["name"] for a in response.get_json()])
+
+        self.app.get(f"/amenities/{amenity_id}")
+        self.app.put(
+            f"/amenities/{amenity_id}",
+            json={"name": f"{name}!"},
+            headers=self.headers,
+        )
+        response = self.app.get(f"/amenities/{amenity_id}")
+        self.assertEqual(response.headers["X-Cache"], "MISS")
+        self.assertEqual(response.get_json()["name"], f"{name}!")
+
+    def test_writes_of_other_workers_invalidate(self):
+        name = f"Cached Amenity {uuid.uuid4()}"
+        response = self.app.post(
+            "/amenities", json={"name": name}, headers=self.headers
+        )
+        amenity_id = response.get_json()["id"]
+
+        self.app.get("/amenities?limit=1000")
+        self.app.get(f"/amenities/{amenity_id}")
+
+        # Written straight to the database, like another worker would
+        with self.client.app_context():
+            amenity = db.session.get(Amenity, amenity_id)
+            amenity.name = f"{name}!"
+            amenity.updated_at = datetime.now()
+            db.session.commit()
+
+        response = self.app.get("/amenities?limit=1000")
+        self.assertEqual(response.headers["X-Cache"], "MISS")
+        self.assertIn(f"{name}!", [a["name"] for a in response.get_json()])
+
+        response = self.app.get(f"/amenities/{amenity_id}")
+        self.assertEqual(response.headers["X-Cache"], "MISS")
+        self.assertEqual(response.get_json()["name"], f"{name}!")
+
+    def test_streams_skip_the_cache(self):
+        response = self.app.get("/amenities")
+        self.assertIn("Accept", response.headers["Vary"])
+        self.assertEqual(
+            self.app.get("/amenities").headers["X-Cache"], "HIT"
+        )
+
+        for headers, url in (
+            ({"Accept": "application/x-ndjson"}, "/amenities"),
+            ({}, "/amenities?stream=true"),
+        ):
+            response = self.app.get(url, headers=headers)
+
+            self.assertNotIn("X-Cache", response.headers)
+            self.assertIn("Accept", response.headers["Vary"])
+            self.assertTrue(response.is_streamed, "Expected a stream")
+
+        response = self.app.get(
+            "/amenities", headers={"Accept": "application/x-ndjson"}
+        )
+        self.assertEqual(response.mimetype, "application/x-ndjson")
+
+    def test_not_found_is_not_cached(self):
+        self.app.get("/amenities/missing")
+        response = self.app.get("/amenities/missing")
+
+        self.assertEqual(response.status_code, 404)
+        self.assertNotIn("X-Cache", response.headers)
+
+    def test_bounds(self):
+        cache.max_entries = 2
+
+        for key in ("a", "b", "c"):
+            cache.set(key, self.entry(key, ttl=60))
+
+        self.assertIsNone(cache.get("a"), "Expected the LRU entry evicted")
+        self.assertIsNotNone(cache.get("b"))
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+        cache.invalidate(("tag", "b"))
+        self.assertIsNone(cache.get("b"))
+        self.assertIsNotNone(cache.get("c"))
+
+        cache.set("d", self.entry("d", ttl=-1))
+        self.assertIsNone(cache.get("d"), "Expected the entry expired")
+
+        generation = cache.generation
+        cache.invalidate("other")
+        cache.set("e", self.entry("e", ttl=60), generation)
+        self.assertIsNone(cache.get("e"), "Expected a stale build dropped")
+
+    def test_stats_require_admin(self):
+        response = self.app.get("/cache")
+
+        self.assertEqual(response.status_code, 401)
+
+    @staticmethod
+    def entry(key: str, ttl: float) -> CachedResponse:
+        return CachedResponse(
+            body=key.encode(),
+            status=200,
+            headers=[],
+            tags=frozenset([("tag", key)]),
+            expires=time.monotonic() + ttl,
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
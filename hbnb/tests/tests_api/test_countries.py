@@ -1,6 +1,10 @@
 import unittest
-from src import create_app
+
+import sqlalchemy as sa
+
+from src import create_app, db, repo
 from src.config import TestingConfig
+from src.models.country import Country
 
 
 class CountryManagementTests(unittest.TestCase):
@@ -39,6 +43,35 @@ class CountryManagementTests(unittest.TestCase):
         )
         self.assertIn("name", country_data, "Name not in response")
 
+    def test_country_lookups_skip_the_database(self):
+        statements = []
+
+        def count(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        with self.client.app_context():
+            self.assertEqual(Country.get("UY").code, "UY")
+
+            sa.event.listen(db.engine, "before_cursor_execute", count)
+            try:
+                self.assertEqual(Country.get("UY").name, "Uruguay")
+                self.assertIsNone(Country.get("XX"))
+                self.assertEqual(
+                    list(Country.get_many(["UY", "XX"])), ["UY"]
+                )
+                self.assertEqual(
+                    self.app.get("/countries/UY").status_code, 200
+                )
+            finally:
+                sa.event.remove(db.engine, "before_cursor_execute", count)
+
+            self.assertEqual(statements, [])
+
+            # Reloading the repository reads the countries again
+            catalog = Country.catalog()
+            repo.reload()
+            self.assertIsNot(Country.catalog(), catalog)
+
 
 if __name__ == "__main__":
     unittest.main()
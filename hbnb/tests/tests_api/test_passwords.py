@@ -0,0 +1,117 @@
+import threading
+import unittest
+
+from flask_jwt_extended import create_access_token
+from src import bcrypt, create_app, passwords
+from src.config import TestingConfig
+from src.passwords import PasswordPool, PasswordPoolFull
+from tests.tests_api.test_amenities import create_admin_user
+
+
+class BlockingBcrypt:
+    """Checks passwords once `release` is set"""
+
+    def __init__(self) -> None:
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def check_password_hash(self, hashed: str, password: str) -> bool:
+        self.started.set()
+        self.release.wait(5)
+
+        return hashed == password
+
+    def generate_password_hash(self, password: str) -> bytes:
+        return password.encode()
+
+
+class SmallPoolConfig(TestingConfig):
+    PASSWORD_POOL_WORKERS = 1
+    PASSWORD_POOL_MAX_QUEUE = 0
+    PASSWORD_POOL_RETRY_AFTER = 3
+
+
+class PasswordPoolTests(unittest.TestCase):
+
+    def setUp(self):
+        self.client = create_app(SmallPoolConfig)
+        self.app = self.client.test_client()
+        self.app.testing = True
+
+    def tearDown(self):
+        passwords.init_app(self.client, bcrypt)
+
+    def test_hash_and_check(self):
+        pool = PasswordPool()
+        pool.init_app(self.client, bcrypt)
+
+        hashed = pool.hash("secret")
+        self.assertTrue(pool.check(hashed, "secret"))
+        self.assertFalse(pool.check(hashed, "wrong"))
+
+        stats = pool.stats()
+        self.assertEqual(stats["completed"], {"hash": 1, "check": 2})
+        self.assertEqual(stats["latency_ms"]["check"]["count"], 2)
+        self.assertEqual(stats["latency_ms"]["wait"]["count"], 3)
+        self.assertGreater(stats["utilization"], 0)
+        self.assertEqual((stats["running"], stats["queued"]), (0, 0))
+
+    def test_saturated_pool_answers_503(self):
+        fake, app_fake = BlockingBcrypt(), BlockingBcrypt()
+        pool = PasswordPool()
+        pool.init_app(self.client, fake)
+        passwords.init_app(self.client, app_fake)
+
+        busy = threading.Thread(target=pool.check, args=("a", "a"))
+        busy.start()
+        fake.started.wait(5)
+
+        with self.assertRaises(PasswordPoolFull):
+            pool.check("a", "a")
+
+        # The pool of the app is saturated the same way
+        admin_user = create_admin_user(self.client)
+        login = threading.Thread(target=passwords.check, args=("a", "a"))
+        login.start()
+        app_fake.started.wait(5)
+        response = self.app.post(
+            "/auth",
+            json={"email": admin_user.email, "password": "password"},
+        )
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.headers.get("Retry-After"), "3")
+
+        fake.release.set()
+        app_fake.release.set()
+        busy.join()
+        login.join()
+
+        self.assertEqual(pool.stats()["rejected"], 1)
+        self.assertEqual(pool.stats()["completed"]["check"], 1)
+        self.assertTrue(pool.check("a", "a"))
+
+    def test_metrics(self):
+        admin_user = create_admin_user(self.client)
+        response = self.app.post(
+            "/auth",
+            json={"email": admin_user.email, "password": "password"},
+        )
+        self.assertEqual(response.status_code, 200)
+
+        with self.client.app_context():
+            token = create_access_token(
+                admin_user, additional_claims={"is_admin": True}
+            )
+
+        self.assertEqual(self.app.get("/auth/metrics").status_code, 401)
+
+        response = self.app.get(
+            "/auth/metrics", headers={"Authorization": f"Bearer {token}"}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()["workers"], 1)
+        self.assertEqual(response.get_json()["completed"]["check"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -2,11 +2,14 @@ import unittest
 import uuid
 
 from flask_jwt_extended import create_access_token
+import sqlalchemy as sa
 
 from src import create_app, db
 from src.models.user import User
 from src.config import TestingConfig
+from src.models.amenity import Amenity, PlaceAmenity
 from src.models.city import City
+from src.models.place import Place
 
 
 class PlaceManagementTests(unittest.TestCase):
@@ -127,6 +130,281 @@ class PlaceManagementTests(unittest.TestCase):
         self.assertIn("created_at", place_data, "Created_at not in response")
         self.assertIn("updated_at", place_data, "Updated_at not in response")
 
+    def test_get_place_fields(self):
+        self.test_post_place()
+        response = self.app.get(
+            f"/places/{self.place_id}?fields=id,name,created_at,host"
+        )
+        self.assertEqual(response.status_code, 200)
+        place_data = response.get_json()
+        self.assertEqual(
+            list(place_data), ["id", "name", "created_at", "host"]
+        )
+        self.assertEqual(place_data["id"], self.place_id)
+        self.assertEqual(place_data["host"]["email"], "mo@lojo.ar")
+
+        response = self.app.get("/places?fields=id,latitude")
+        self.assertEqual(response.status_code, 200)
+        for place in response.get_json():
+            self.assertEqual(set(place), {"id", "latitude"})
+
+        response = self.app.get(f"/places/{self.place_id}?fields=id,nope")
+        self.assertEqual(response.status_code, 400)
+
+    def create_places_with_hosts(self, amount: int) -> list[str]:
+        ids = []
+
+        with self.client.app_context():
+            for i in range(amount):
+                host = User(
+                    email=f"host-{uuid.uuid4()}@example.com",
+                    first_name="Host",
+                    last_name=str(i),
+                    password="password",
+                )
+                place = Place(
+                    {
+                        "name": f"Place {i}",
+                        "address": "Somewhere",
+                        "city_id": self.city.id,
+                        "host_id": host.id,
+                    }
+                )
+                db.session.add_all([host, place])
+                ids.append(place.id)
+
+            db.session.commit()
+
+        return ids
+
+    def count_statements(
+        self, url: str, method: str = "get", **kwargs
+    ) -> tuple[int, list]:
+        statements = []
+
+        def count(conn, cursor, statement, *args):
+            # The ETag state of the models isn't part of the loading
+            if not statement.startswith("SELECT count(*) AS count_1, max("):
+                statements.append(statement)
+
+        with self.client.app_context():
+            engine = db.engine
+        sa.event.listen(engine, "before_cursor_execute", count)
+        try:
+            response = getattr(self.app, method)(url, **kwargs)
+        finally:
+            sa.event.remove(engine, "before_cursor_execute", count)
+
+        self.assertEqual(response.status_code, 200)
+
+        return len(statements), response.get_json()
+
+    def test_get_places_loads_hosts_in_one_query(self):
+        ids = self.create_places_with_hosts(5)
+
+        count, places = self.count_statements("/places?limit=1000")
+        self.assertTrue(set(ids) <= {place["id"] for place in places})
+        self.assertTrue(all("email" in place["host"] for place in places))
+        self.assertEqual(count, 1, "Expected the hosts joined to the page")
+
+        count, place = self.count_statements(f"/places/{ids[0]}")
+        self.assertEqual(place["host"]["last_name"], "0")
+        self.assertEqual(count, 1, "Expected the host joined to the place")
+
+        count, _ = self.count_statements("/places?limit=1000&fields=id,name")
+        self.assertEqual(count, 1)
+
+    def test_get_nearby_places(self):
+        points = {
+            "Ciudad Vieja": (-34.9067, -56.2106),
+            "Pocitos": (-34.9108, -56.1500),
+            "Punta del Este": (-34.9600, -54.9400),
+        }
+
+        with self.client.app_context():
+            for name, (latitude, longitude) in points.items():
+                db.session.add(
+                    Place(
+                        {
+                            "name": name,
+                            "address": "Somewhere",
+                            "latitude": latitude,
+                            "longitude": longitude,
+                            "city_id": self.city.id,
+                            "host_id": self.admin_user.id,
+                        }
+                    )
+                )
+            db.session.commit()
+
+        response = self.app.get(
+            "/places/nearby?lat=-34.9055&lon=-56.2000&radius_km=20"
+        )
+        self.assertEqual(response.status_code, 200)
+
+        places = response.get_json()
+        self.assertEqual(
+            [place["name"] for place in places], ["Ciudad Vieja", "Pocitos"]
+        )
+        self.assertLess(places[0]["distance_km"], places[1]["distance_km"])
+        self.assertIn("host", places[0])
+
+        response = self.app.get(
+            "/places/nearby?lat=-34.9055&lon=-56.2&radius_km=200"
+            "&limit=1&fields=id,name"
+        )
+        self.assertEqual(
+            list(response.get_json()[0]), ["id", "name", "distance_km"]
+        )
+        self.assertEqual(len(response.get_json()), 1)
+
+        for query in ("lon=-56.2", "lat=91&lon=0", "lat=0&lon=0&radius_km=-1"):
+            response = self.app.get(f"/places/nearby?{query}")
+            self.assertEqual(response.status_code, 400, query)
+
+    def test_get_places_with_amenities(self):
+        with self.client.app_context():
+            wifi, pool, gym = (
+                Amenity(name=f"{name} {uuid.uuid4()}")
+                for name in ("Wifi", "Pool", "Gym")
+            )
+            places = {}
+
+            for name, amenities in [
+                ("Both", (wifi, pool)),
+                ("Wifi", (wifi,)),
+                ("All", (wifi, pool, gym)),
+            ]:
+                place = Place(
+                    {
+                        "name": name,
+                        "address": "Somewhere",
+                        "latitude": 0.0,
+                        "longitude": 0.0,
+                        "city_id": self.city.id,
+                        "host_id": self.admin_user.id,
+                    }
+                )
+                db.session.add(place)
+                places[name] = place.id
+                db.session.add_all(
+                    PlaceAmenity(place.id, amenity.id) for amenity in amenities
+                )
+
+            db.session.add_all([wifi, pool, gym])
+            db.session.commit()
+            ids = {"wifi": wifi.id, "pool": pool.id, "gym": gym.id}
+
+        def names(amenities: str) -> list:
+            response = self.app.get(
+                f"/places?limit=1000&amenities={amenities}"
+            )
+            self.assertEqual(response.status_code, 200)
+
+            return sorted(
+                place["name"]
+                for place in response.get_json()
+                if place["id"] in places.values()
+            )
+
+        self.assertEqual(names(ids["wifi"]), ["All", "Both", "Wifi"])
+        self.assertEqual(
+            names(f"{ids['pool']},{ids['wifi']},{ids['pool']}"),
+            ["All", "Both"],
+        )
+        self.assertEqual(names(f"{ids['gym']}, {ids['pool']}"), ["All"])
+        self.assertEqual(names(f"{ids['gym']},unknown"), [])
+
+    def test_post_places_bulk(self):
+        def place(i: int, city_id: str) -> dict:
+            return {
+                "name": f"Bulk Place {i}",
+                "address": f"{i} Bulk Street",
+                "latitude": 0.0,
+                "longitude": 0.0,
+                "host_id": self.admin_user.id,
+                "city_id": city_id,
+                "price_per_night": 100,
+                "number_of_rooms": 1,
+                "number_of_bathrooms": 1,
+                "max_guests": 2,
+            }
+
+        items = [place(i, self.city.id) for i in range(50)]
+        items.insert(1, place(50, "missing"))
+
+        count, data = self.count_statements(
+            "/places/bulk", "post", json=items, headers=self.headers
+        )
+
+        self.assertEqual(data["created"], 50)
+        self.assertEqual(data["results"][1]["status"], 400)
+        self.assertIn("missing", data["results"][1]["body"])
+        self.assertEqual(data["results"][2]["body"]["name"], "Bulk Place 1")
+        self.assertLess(count, 10, "Expected no query per place")
+
+        place_id = data["results"][0]["body"]["id"]
+        response = self.app.get(f"/places/{place_id}")
+        self.assertEqual(response.get_json()["name"], "Bulk Place 0")
+
+    def test_post_places_bulk_for_other_hosts(self):
+        user = User(
+            email=f"host-{uuid.uuid4()}@example.com",
+            first_name="Host",
+            last_name="Host",
+            password="password",
+        )
+
+        with self.client.app_context():
+            db.session.add(user)
+            db.session.commit()
+            token = create_access_token(user)
+
+        response = self.app.post(
+            "/places/bulk",
+            json=[
+                {
+                    "name": "Not Mine",
+                    "address": "Somewhere",
+                    "latitude": 0.0,
+                    "longitude": 0.0,
+                    "host_id": self.admin_user.id,
+                    "city_id": self.city.id,
+                    "price_per_night": 100,
+                    "number_of_rooms": 1,
+                    "number_of_bathrooms": 1,
+                    "max_guests": 2,
+                }
+            ],
+            headers={"Authorization": f"Bearer {token}"},
+        )
+
+        self.assertEqual(response.get_json()["results"][0]["status"], 403)
+
+        # Like a single create, an admin's places are hosted by the admin
+        response = self.app.post(
+            "/places/bulk",
+            json=[
+                {
+                    "name": "For Someone Else",
+                    "address": "Somewhere",
+                    "latitude": 0.0,
+                    "longitude": 0.0,
+                    "host_id": user.id,
+                    "city_id": self.city.id,
+                    "price_per_night": 100,
+                    "number_of_rooms": 1,
+                    "number_of_bathrooms": 1,
+                    "max_guests": 2,
+                }
+            ],
+            headers=self.headers,
+        )
+
+        result = response.get_json()["results"][0]
+        self.assertEqual(result["status"], 201)
+        self.assertEqual(result["body"]["host_id"], self.admin_user.id)
+
     def test_put_place(self):
         self.test_post_place()  # Ensure a place is created
         updated_place = {
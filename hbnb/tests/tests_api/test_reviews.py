@@ -1,12 +1,14 @@
 import unittest
+from unittest import mock
 import uuid
 
 from flask.testing import FlaskClient
 from flask_jwt_extended import create_access_token
 
-from src import create_app, db
+from src import create_app, db, repo
 from src.models.city import City
 from src.models.place import Place
+from src.models.review import Review
 from src.models.user import User
 from src.config import TestingConfig
 
@@ -260,6 +262,243 @@ class ReviewManagementTests(unittest.TestCase):
             f"Expected status code 204 but got {response.status_code}. Response: {response.text}",
         )
 
+    def test_place_ratings(self):
+        def ratings():
+            place = self.app.get(f"/places/{self.place.id}").get_json()
+            return (
+                place["review_count"],
+                place["rating_average"],
+                place["rating_min"],
+                place["rating_max"],
+                place["rating_histogram"],
+            )
+
+        self.assertEqual(ratings(), (0, None, None, None, [0] * 6))
+
+        review_ids = []
+        for rating in (5.0, 3.0, 4.5):
+            response = self.app.post(
+                f"/places/{self.place.id}/reviews",
+                json={
+                    "user_id": self.admin_user.id,
+                    "comment": "Rated",
+                    "rating": rating,
+                },
+                headers=self.headers,
+            )
+            self.assertEqual(response.status_code, 201)
+            review_ids.append(response.get_json()["id"])
+
+        self.assertEqual(
+            ratings(), (3, 12.5 / 3, 3.0, 5.0, [0, 0, 0, 1, 1, 1])
+        )
+
+        response = self.app.put(
+            f"/reviews/{review_ids[0]}",
+            json={
+                "user_id": self.admin_user.id,
+                "comment": "Not that good",
+                "rating": 2.0,
+            },
+            headers=self.headers,
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            ratings(), (3, 9.5 / 3, 2.0, 4.5, [0, 0, 1, 1, 1, 0])
+        )
+
+        self.app.delete(f"/reviews/{review_ids[2]}", headers=self.headers)
+        self.assertEqual(ratings(), (2, 2.5, 2.0, 3.0, [0, 0, 1, 1, 0, 0]))
+
+        # Rebuilding from the reviews gives the same aggregates
+        with self.client.app_context():
+            from src import repo
+
+            self.assertEqual(Place.rebuild_aggregates(repo.repo), [])
+
+            place = Place.get(self.place.id)
+            place.reset_ratings()
+            db.session.commit()
+
+            self.assertEqual(
+                [p.id for p in Place.rebuild_aggregates(repo.repo)],
+                [self.place.id],
+            )
+            self.assertEqual(place.review_count, 2)
+
+        for review_id in review_ids[:2]:
+            self.app.delete(f"/reviews/{review_id}", headers=self.headers)
+        self.assertEqual(ratings(), (0, None, None, None, [0] * 6))
+
+    def test_post_reviews_bulk_for_other_users(self):
+        user = self.create_user()
+
+        with self.client.app_context():
+            token = create_access_token(user)
+
+        def review(user_id: str) -> dict:
+            return {
+                "place_id": self.place.id,
+                "user_id": user_id,
+                "comment": "Bulk",
+                "rating": 4.0,
+            }
+
+        response = self.app.post(
+            "/reviews/bulk",
+            json=[review(self.admin_user.id)],
+            headers={"Authorization": f"Bearer {token}"},
+        )
+        self.assertEqual(response.get_json()["results"][0]["status"], 403)
+
+        # Like a single review, an admin's reviews are written by the admin
+        response = self.app.post(
+            "/reviews/bulk", json=[review(user.id)], headers=self.headers
+        )
+
+        result = response.get_json()["results"][0]
+        self.assertEqual(result["status"], 201)
+        self.assertEqual(result["body"]["user_id"], self.admin_user.id)
+
+    def test_moving_a_review_moves_its_rating(self):
+        other = self.create_place()
+
+        def ratings(place_id: str):
+            place = self.app.get(f"/places/{place_id}").get_json()
+            return (
+                place["review_count"],
+                place["rating_sum"],
+                place["rating_histogram"],
+            )
+
+        response = self.app.post(
+            f"/places/{self.place.id}/reviews",
+            json={
+                "user_id": self.admin_user.id,
+                "comment": "Moving",
+                "rating": 4.0,
+            },
+            headers=self.headers,
+        )
+        review_id = response.get_json()["id"]
+
+        response = self.app.put(
+            f"/reviews/{review_id}",
+            json={
+                "user_id": self.admin_user.id,
+                "place_id": other.id,
+                "comment": "Moved",
+                "rating": 3.0,
+            },
+            headers=self.headers,
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(ratings(self.place.id), (0, 0.0, [0] * 6))
+        self.assertEqual(ratings(other.id), (1, 3.0, [0, 0, 0, 1, 0, 0]))
+
+        response = self.app.put(
+            f"/reviews/{review_id}",
+            json={
+                "user_id": self.admin_user.id,
+                "place_id": "missing",
+                "comment": "Nowhere",
+                "rating": 3.0,
+            },
+            headers=self.headers,
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            self.app.get(f"/reviews/{review_id}").get_json()["place_id"],
+            other.id,
+        )
+
+    def test_place_updates_keep_the_ratings(self):
+        self.app.post(
+            f"/places/{self.place.id}/reviews",
+            json={
+                "user_id": self.admin_user.id,
+                "comment": "Rated",
+                "rating": 5.0,
+            },
+            headers=self.headers,
+        )
+        place = self.app.get(f"/places/{self.place.id}").get_json()
+
+        response = self.app.put(
+            f"/places/{self.place.id}",
+            json={
+                key: place[key]
+                for key in (
+                    "name", "description", "address", "latitude",
+                    "longitude", "host_id", "city_id", "price_per_night",
+                    "number_of_rooms", "number_of_bathrooms", "max_guests",
+                )
+            }
+            | {"review_count": 99, "rating_sum": 0.0, "rating_max": 1.0},
+            headers=self.headers,
+        )
+        self.assertEqual(response.status_code, 200)
+
+        place = self.app.get(f"/places/{self.place.id}").get_json()
+        self.assertEqual(
+            (place["review_count"], place["rating_sum"], place["rating_max"]),
+            (1, 5.0, 5.0),
+        )
+
+
+class MemoryConfig(TestingConfig):
+    REPOSITORY = "memory"
+
+
+class ReviewRatingRollbackTests(unittest.TestCase):
+    """Failed writes leave the ratings of the in-memory places right"""
+
+    def setUp(self):
+        self.client = create_app(MemoryConfig)
+
+        with self.client.app_context():
+            self.user = User(
+                email=f"memory.{uuid.uuid4()}@example.com",
+                password="password",
+                first_name="John",
+                last_name="Doe",
+            )
+            city = City(name="Rollback City", country_code="UY")
+            self.place = Place(
+                {
+                    "name": "Rollback Place",
+                    "address": "Somewhere",
+                    "city_id": city.id,
+                    "host_id": self.user.id,
+                }
+            )
+            repo.save_many([self.user, city, self.place])
+
+    def test_failed_create_many_keeps_the_ratings(self):
+        items = [
+            {
+                "place_id": self.place.id,
+                "user_id": self.user.id,
+                "comment": "Never saved",
+                "rating": 4.0,
+            }
+        ]
+
+        with self.client.app_context():
+            with mock.patch(
+                "src.models.review.save_in_chunks",
+                side_effect=RuntimeError("disk full"),
+            ):
+                with self.assertRaises(RuntimeError):
+                    Review.create_many(items)
+
+            place = Place.get(self.place.id)
+
+            self.assertEqual(place.review_count, 0)
+            self.assertEqual(place.rating_sum, 0.0)
+            self.assertEqual(len(Review.create_many(items)), 1)
+            self.assertEqual(place.review_count, 1)
+
 
 if __name__ == "__main__":
     unittest.main()
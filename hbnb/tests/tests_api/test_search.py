@@ -0,0 +1,165 @@
+from datetime import datetime
+import unittest
+import uuid
+
+from flask_jwt_extended import create_access_token
+from src import create_app, db
+from src.config import TestingConfig
+from src.models.city import City
+from src.models.place import Place
+from src.search import TextIndex, tokenize
+from tests.tests_api.test_amenities import create_admin_user
+
+
+class TextIndexTests(unittest.TestCase):
+
+    def test_tokenize(self):
+        self.assertEqual(
+            tokenize("The Café at Łódź, near the SEA!"),
+            ["cafe", "łodz", "near", "sea"],
+        )
+        self.assertEqual(tokenize(None), [])
+
+    def test_ranking(self):
+        index = TextIndex()
+        index.add("a", tokenize("quiet loft with a view"))
+        index.add("b", tokenize("loft loft loft downtown"))
+        index.add("c", tokenize("house with a garden and a very long text"))
+
+        found = index.search(tokenize("loft"), 10)
+        self.assertEqual([key for key, _ in found], ["b", "a"])
+        self.assertGreater(found[0][1], found[1][1])
+
+        # The rare term weighs more than the common one
+        found = index.search(tokenize("garden loft"), 1)
+        self.assertEqual(found[0][0], "c")
+
+        index.add("b", tokenize("downtown"))
+        index.remove("a")
+        self.assertEqual(index.search(tokenize("loft"), 10), [])
+        self.assertEqual(len(index), 2)
+
+
+class SearchTests(unittest.TestCase):
+
+    def setUp(self):
+        self.client = create_app(TestingConfig)
+        self.app = self.client.test_client()
+        self.app.testing = True
+
+        self.admin_user = create_admin_user(self.client)
+
+        with self.client.app_context():
+            self.token = create_access_token(
+                self.admin_user, additional_claims={"is_admin": True}
+            )
+            city = City(name=f"Search City {uuid.uuid4()}", country_code="UY")
+            db.session.add(city)
+            db.session.commit()
+            self.city_id = city.id
+
+        self.headers = {"Authorization": f"Bearer {self.token}"}
+        self.word = f"w{uuid.uuid4().hex[:10]}"
+
+    def create_place(self, name: str, description: str) -> str:
+        response = self.app.post(
+            "/places",
+            json={
+                "name": name,
+                "description": description,
+                "address": "Somewhere",
+                "latitude": 0.0,
+                "longitude": 0.0,
+                "host_id": self.admin_user.id,
+                "city_id": self.city_id,
+                "price_per_night": 100,
+                "number_of_rooms": 1,
+                "number_of_bathrooms": 1,
+                "max_guests": 2,
+            },
+            headers=self.headers,
+        )
+        self.assertEqual(response.status_code, 201, response.get_json())
+
+        return response.get_json()["id"]
+
+    def search(self, query: str) -> list[str]:
+        response = self.app.get(f"/search?{query}")
+        self.assertEqual(response.status_code, 200, response.get_json())
+
+        return [obj["id"] for obj in response.get_json()]
+
+    def test_search_places(self):
+        cabin = self.create_place("Cabin", f"A café {self.word} by the lake")
+        loft = self.create_place(f"Loft {self.word}", f"{self.word} downtown")
+
+        # The index is built on the first search
+        self.assertEqual(self.search(f"q={self.word}"), [loft, cabin])
+        self.assertEqual(self.search(f"q=cafe+{self.word}"), [cabin, loft])
+
+        # And follows the writes after it
+        house = self.create_place(f"House {self.word}", "With a garden")
+        self.assertEqual(
+            self.app.delete(f"/places/{loft}", headers=self.headers)
+            .status_code,
+            204,
+        )
+        self.assertEqual(
+            sorted(self.search(f"q={self.word}")), sorted([cabin, house])
+        )
+
+        response = self.app.get(f"/search?q={self.word}&limit=1&offset=1")
+        self.assertEqual(len(response.get_json()), 1)
+        self.assertIn("score", response.get_json()[0])
+        self.assertIn("host", response.get_json()[0])
+
+    def test_search_follows_other_workers(self):
+        cabin = self.create_place("Cabin", f"A {self.word} by the lake")
+        loft = self.create_place("Loft", f"A {self.word} downtown")
+        self.assertEqual(
+            sorted(self.search(f"q={self.word}")), sorted([cabin, loft])
+        )
+
+        # Written straight to the database, like another worker would
+        with self.client.app_context():
+            house = Place(
+                {
+                    "name": f"House {self.word}",
+                    "address": "Somewhere",
+                    "city_id": self.city_id,
+                    "host_id": self.admin_user.id,
+                }
+            )
+            db.session.add(house)
+            db.session.delete(db.session.get(Place, loft))
+            cabin_place = db.session.get(Place, cabin)
+            cabin_place.description = "A cabin by the lake"
+            cabin_place.updated_at = datetime.now()
+            db.session.commit()
+            house_id = house.id
+
+        self.assertEqual(self.search(f"q={self.word}"), [house_id])
+
+    def test_search_reviews(self):
+        place_id = self.create_place("Reviewed", "A place")
+        response = self.app.post(
+            f"/places/{place_id}/reviews",
+            json={
+                "user_id": self.admin_user.id,
+                "comment": f"Loved it {self.word}",
+                "rating": 5,
+            },
+            headers=self.headers,
+        )
+        self.assertEqual(response.status_code, 201)
+
+        self.assertEqual(
+            self.search(f"q={self.word}&type=reviews"),
+            [response.get_json()["id"]],
+        )
+        self.assertEqual(self.search(f"q={self.word}"), [])
+
+    def test_invalid_query(self):
+        for query in ("", "q=", "q=loft&type=users", "q=loft&offset=-1"):
+            response = self.app.get(f"/search?{query}")
+            self.assertEqual(response.status_code, 400, query)
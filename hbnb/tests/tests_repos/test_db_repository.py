@@ -1,5 +1,7 @@
+from datetime import datetime
 from src.config import TestingConfig
-from src import db, create_app
+from src import db, create_app, repo
+from src.persistence import query
 from src.persistence.db import DBRepository
 import unittest
 
@@ -13,13 +15,22 @@ class DummyModel(db.Model):
     )
 
 
+class NamedModel(db.Model):
+    __ordering__ = ("name", "id")
+
+    id: so.Mapped[int] = sa.Column(
+        sa.Integer, primary_key=True, autoincrement=True
+    )
+    name: so.Mapped[str] = sa.Column(sa.String(32), nullable=True)
+
+
 class TestDBRepository(unittest.TestCase):
 
     @classmethod
     def setUpClass(cls) -> None:
         cls.app = create_app(TestingConfig)
 
-        cls.models = {"DummyModel": DummyModel}
+        cls.models = {"DummyModel": DummyModel, "NamedModel": NamedModel}
         cls.data = {}
 
         with cls.app.app_context():
@@ -67,6 +78,172 @@ class TestDBRepository(unittest.TestCase):
 
         self.assertTrue(result, "Expected True")
 
+    def test_bulk_operations(self):
+        objs = [DummyModel() for _ in range(3)]
+
+        with self.app.app_context():
+            self.assertEqual(self.repo.save_many(objs), objs)
+            self.assertTrue(all(obj.id for obj in objs), "Expected ids")
+            self.assertEqual(self.repo.update_many(objs), objs)
+            self.assertEqual(self.repo.delete_many(objs), 3)
+            self.assertIsNone(self.repo.get("DummyModel", objs[0].id))
+
+    def test_get_all_query(self):
+        from src.models.amenity import Amenity
+
+        names = ["query-b", "query-a", "query-c"]
+
+        with self.app.app_context():
+            self.repo.models["Amenity"] = Amenity
+            self.repo.save_many(Amenity(name=name) for name in names)
+
+            result = self.repo.get_all(
+                "Amenity",
+                filters={"name__in": names, "name__ne": "query-c"},
+                order_by="-name",
+            )
+
+            self.assertEqual(
+                [amenity.name for amenity in result], ["query-b", "query-a"]
+            )
+
+            result = self.repo.get_all(
+                "Amenity",
+                filters={"name__gte": "query-"},
+                order_by="name",
+                limit=1,
+                offset=1,
+            )
+
+            self.assertEqual([amenity.name for amenity in result], ["query-b"])
+
+            with self.assertRaises(ValueError):
+                self.repo.get_all("Amenity", filters={"unknown": 1})
+
+            with self.assertRaises(ValueError):
+                self.repo.get_all("Amenity", load=["unknown"])
+
+    def test_get_page(self):
+        from src.models.amenity import Amenity
+
+        names = [f"page-{i}" for i in range(5)]
+
+        with self.app.app_context():
+            self.repo.models["Amenity"] = Amenity
+            saved = self.repo.save_many(Amenity(name=name) for name in names)
+            saved.sort(key=lambda amenity: (amenity.created_at, amenity.id))
+            filters = {"name__in": names}
+
+            first = self.repo.get_page("Amenity", filters, limit=2)
+            last = first[-1]
+            rest = self.repo.get_page(
+                "Amenity", filters, (last.created_at, last.id)
+            )
+
+            self.assertEqual(first + rest, saved, "Expected every amenity")
+            self.assertEqual(
+                list(self.repo.iter_all("Amenity", filters)), saved
+            )
+
+    def test_state_follows_writes_of_other_processes(self):
+        from src.models.amenity import Amenity
+
+        with self.app.app_context():
+            self.repo.models["Amenity"] = Amenity
+            states = [self.repo.state("Amenity")]
+
+            # Written straight to the database, like another worker would
+            amenity = Amenity(name="state-amenity")
+            db.session.add(amenity)
+            db.session.commit()
+            states.append(self.repo.state("Amenity"))
+
+            amenity.name = "state-renamed"
+            amenity.updated_at = datetime.now()
+            db.session.commit()
+            states.append(self.repo.state("Amenity"))
+
+            db.session.delete(amenity)
+            db.session.commit()
+            states.append(self.repo.state("Amenity"))
+
+        for before, after in zip(states, states[1:]):
+            self.assertNotEqual(before, after, "Expected a new state")
+
+    def test_null_values_sort_like_in_memory(self):
+        with self.app.app_context():
+            objs = self.repo.save_many(
+                NamedModel(name=name) for name in ("b", None, "a", None)
+            )
+            filters = {"id__in": [obj.id for obj in objs]}
+
+            for order_by in ("name", "-name", ["-name", "id"]):
+                result = self.repo.get_all("NamedModel", filters, order_by)
+                expected = query.sort(objs, query.parse_order(order_by))
+
+                self.assertEqual(
+                    [obj.name for obj in result],
+                    [obj.name for obj in expected],
+                )
+
+            first = self.repo.get_page("NamedModel", filters, limit=1)
+            rest = self.repo.get_page(
+                "NamedModel", filters, (first[0].name, first[0].id)
+            )
+
+            self.assertEqual(
+                [obj.name for obj in first + rest], [None, None, "a", "b"]
+            )
+
+            # SQLite sorts null values this way anyway, PostgreSQL doesn't
+            statements = []
+
+            def record(conn, cursor, statement, *args):
+                statements.append(statement)
+
+            sa.event.listen(db.engine, "before_cursor_execute", record)
+            try:
+                self.repo.get_all("NamedModel", filters, "-name")
+                self.repo.get_page("NamedModel", filters, limit=1)
+            finally:
+                sa.event.remove(db.engine, "before_cursor_execute", record)
+
+            self.assertIn("DESC NULLS LAST", statements[0])
+            self.assertIn("ASC NULLS FIRST", statements[1])
+
+
+class TestDBUpgrade(unittest.TestCase):
+
+    def test_upgrade_adds_missing_columns_and_indexes(self):
+        app = create_app(TestingConfig)
+
+        with app.app_context():
+            with db.engine.begin() as connection:
+                for statement in (
+                    "DROP INDEX ix_place_rating_average",
+                    "DROP INDEX ix_place_location",
+                    "ALTER TABLE place DROP COLUMN rating_average",
+                    "ALTER TABLE place DROP COLUMN review_count",
+                ):
+                    connection.execute(sa.text(statement))
+
+            self.assertEqual(
+                repo.repo.upgrade(),
+                ["place.review_count", "place.rating_average"],
+            )
+            self.assertEqual(repo.repo.upgrade(), [])
+
+            inspector = sa.inspect(db.engine)
+            columns = {
+                column["name"]: column
+                for column in inspector.get_columns("place")
+            }
+            indexes = {i["name"] for i in inspector.get_indexes("place")}
+
+            self.assertFalse(columns["review_count"]["nullable"])
+            self.assertIn("ix_place_rating_average", indexes)
+            self.assertIn("ix_place_location", indexes)
+
 
 if __name__ == "__main__":
     unittest.main()
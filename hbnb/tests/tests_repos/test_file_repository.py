@@ -0,0 +1,259 @@
+import json
+import os
+import tempfile
+from typing import Optional
+from uuid import uuid4
+from src import get_models
+from src.persistence.file import FileRepository
+from src.persistence.flusher import FlushFailed
+import unittest
+
+
+class DummyModel:
+    __indexes__ = ["name"]
+
+    id: str
+    name: str = ""
+
+    def __init__(self, name: str, id: Optional[str] = None, **kw) -> None:
+        self.id = id or str(uuid4())
+        self.name = name
+
+    def to_dict(self):
+        return {"id": self.id, "name": self.name}
+
+
+class TestFileRepositoryJournal(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.dir = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.dir.name, "test_file.json")
+        self.config = {
+            "FILE_STORAGE_JOURNAL": True,
+            "FILE_STORAGE_JOURNAL_MAX_SIZE": 0,
+        }
+        self.repo = self.new_repo()
+
+    def tearDown(self) -> None:
+        self.dir.cleanup()
+
+    def new_repo(self) -> FileRepository:
+        return FileRepository(
+            self.filename,
+            models={"DummyModel": DummyModel},
+            data={"DummyModel": []},
+            config=self.config,
+        )
+
+    def journal_records(self) -> list:
+        with open(self.repo.journal_filename) as file:
+            return [json.loads(line) for line in file]
+
+    def test_writes_go_to_the_journal(self):
+        obj = DummyModel("dummy")
+
+        self.repo.save(obj)
+        obj.name = "updated"
+        self.repo.update(obj)
+        self.repo.delete(obj)
+
+        ops = [record["op"] for record in self.journal_records()]
+
+        self.assertEqual(ops, ["save", "update", "delete"])
+
+        with open(self.filename) as file:
+            self.assertEqual(json.load(file), {"DummyModel": []})
+
+    def test_reload_replays_the_journal(self):
+        kept, deleted = DummyModel("kept"), DummyModel("deleted")
+
+        self.repo.save(kept)
+        self.repo.save(deleted)
+        kept.name = "renamed"
+        self.repo.update(kept)
+        self.repo.delete(deleted)
+
+        result = self.new_repo().get_all("DummyModel")
+
+        self.assertEqual([obj.id for obj in result], [kept.id])
+        self.assertEqual(result[0].name, "renamed", "Expected 'renamed'")
+
+    def test_truncated_record_is_ignored(self):
+        obj = DummyModel("dummy")
+        self.repo.save(obj)
+
+        with open(self.repo.journal_filename, "a") as file:
+            file.write('{"op": "save", "mod')
+
+        self.assertIsNotNone(self.new_repo().get("DummyModel", obj.id))
+
+    def test_compact(self):
+        objs = [DummyModel(f"dummy{i}") for i in range(3)]
+
+        for obj in objs:
+            self.repo.save(obj)
+
+        self.repo.compact()
+
+        self.assertEqual(self.journal_records(), [], "Expected empty journal")
+
+        with open(self.filename) as file:
+            self.assertEqual(len(json.load(file)["DummyModel"]), 3)
+
+        self.assertEqual(len(self.new_repo().get_all("DummyModel")), 3)
+
+    def test_bulk_operations_write_once(self):
+        objs = [DummyModel(f"dummy{i}") for i in range(3)]
+        writes = []
+        append = self.repo._append_to_journal
+        self.repo._append_to_journal = lambda records: (
+            writes.append(len(records)),
+            append(records),
+        )
+
+        self.repo.save_many(objs)
+        self.repo.update_many(objs)
+        self.repo.delete_many(objs[:2])
+
+        self.assertEqual(writes, [3, 3, 2], "Expected one write per batch")
+        self.assertEqual(
+            [obj.id for obj in self.new_repo().get_all("DummyModel")],
+            [objs[2].id],
+        )
+
+    def test_failed_flush_keeps_the_records(self):
+        self.config["STORAGE_WRITE_BEHIND"] = True
+        self.config["STORAGE_WRITE_BEHIND_MAX_DELAY"] = 0.05
+        self.repo = self.new_repo()
+        self.addCleanup(self.repo.flusher.close)
+        append = self.repo._append_to_journal
+        failures = [OSError("disk full")]
+
+        def flaky(records):
+            if failures:
+                raise failures.pop()
+            append(records)
+
+        self.repo._append_to_journal = flaky
+        obj = DummyModel("dummy")
+        self.repo.save(obj)
+
+        with self.assertRaises(FlushFailed):
+            self.repo.flush(timeout=5)
+
+        self.assertTrue(self.repo.flush(timeout=5), "Expected a retry")
+        self.assertIsNone(self.repo.flusher.last_error)
+        self.assertEqual(
+            [record["data"]["id"] for record in self.journal_records()],
+            [obj.id],
+        )
+
+    def test_older_snapshots_are_not_written(self):
+        self.config["FILE_STORAGE_JOURNAL"] = False
+        self.repo = self.new_repo()
+
+        with self.repo._lock:
+            old = self.repo._serialize_numbered()
+        self.repo.save(DummyModel("dummy"))
+        self.repo._store(*old)
+
+        with open(self.filename) as file:
+            self.assertEqual(len(json.load(file)["DummyModel"]), 1)
+
+    def test_snapshot_mode(self):
+        self.config["FILE_STORAGE_JOURNAL"] = False
+        self.repo = self.new_repo()
+
+        self.repo.save(DummyModel("dummy"))
+
+        self.assertFalse(os.path.exists(self.repo.journal_filename))
+
+        with open(self.filename) as file:
+            self.assertEqual(len(json.load(file)["DummyModel"]), 1)
+
+
+class TestFileRepositoryLazyHydration(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.dir = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.dir.name, "test_file.json")
+        self.records = [
+            {"id": str(uuid4()), "name": f"dummy{i % 3}"} for i in range(9)
+        ]
+
+        with open(self.filename, "w") as file:
+            json.dump({"DummyModel": self.records}, file)
+
+        self.repo = FileRepository(
+            self.filename, models={"DummyModel": DummyModel}, data={}
+        )
+
+    def tearDown(self) -> None:
+        self.dir.cleanup()
+
+    def test_reload_does_not_build_objects(self):
+        table = self.repo._table("DummyModel")
+
+        self.assertEqual(len(table), 9, "Expected 9 records")
+        self.assertEqual(table.hydrated, 0, "Expected nothing hydrated")
+
+        obj = self.repo.get("DummyModel", self.records[0]["id"])
+
+        self.assertIsInstance(obj, DummyModel)
+        self.assertEqual(table.hydrated, 1, "Expected one hydrated object")
+        self.assertIs(self.repo.get("DummyModel", obj.id), obj)
+
+    def test_find_by_only_hydrates_matches(self):
+        result = self.repo.find_by("DummyModel", name="dummy1")
+
+        self.assertEqual(len(result), 3, "Expected 3 matches")
+        self.assertEqual(self.repo._table("DummyModel").hydrated, 3)
+
+    def test_iter_values_does_not_build_objects(self):
+        obj = self.repo.get("DummyModel", self.records[0]["id"])
+        obj.name = "updated"
+
+        values = list(self.repo.iter_values("DummyModel", ("id", "name")))
+
+        self.assertEqual(values[0], (obj.id, "updated"))
+        self.assertEqual(
+            values[1:], [(r["id"], r["name"]) for r in self.records[1:]]
+        )
+        self.assertEqual(self.repo._table("DummyModel").hydrated, 1)
+
+    def test_untouched_records_are_written_back(self):
+        obj = self.repo.get("DummyModel", self.records[0]["id"])
+        obj.name = "updated"
+        self.repo.update(obj)
+
+        with open(self.filename) as file:
+            records = json.load(file)["DummyModel"]
+
+        self.assertEqual(records[0]["name"], "updated")
+        self.assertEqual(records[1:], self.records[1:])
+
+    def test_mapped_models_skip_the_constructor(self):
+        models = {model.__name__: model for model in get_models()}
+        record = {
+            "id": str(uuid4()),
+            "email": "lazy@example.com",
+            "password": "stored-hash",
+            "first_name": "Lazy",
+            "last_name": "Loader",
+            "is_admin": False,
+            "created_at": "2024-01-01T10:00:00",
+            "updated_at": "2024-01-02T10:00:00",
+        }
+
+        with open(self.filename, "w") as file:
+            json.dump({"User": [record]}, file)
+
+        repo = FileRepository(self.filename, models=models, data={})
+        user = repo.find_one_by("User", email="lazy@example.com")
+
+        self.assertEqual(user.password, "stored-hash", "Expected no rehash")
+        self.assertEqual(user.updated_at.day, 2, "Expected a datetime")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,129 @@
+import os
+import tempfile
+import threading
+import time
+from typing import Optional
+from uuid import uuid4
+from src.persistence.flusher import FlushFailed, WriteBehindFlusher
+from src.persistence.pickled import PickleRepository
+import unittest
+
+
+class DummyModel:
+    def __init__(self, name: str, id: Optional[str] = None) -> None:
+        self.id = id or str(uuid4())
+        self.name = name
+
+
+class TestWriteBehindFlusher(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.writes = 0
+        self.flusher = WriteBehindFlusher(self.write, max_delay=10)
+
+    def tearDown(self) -> None:
+        self.flusher.close()
+
+    def write(self):
+        time.sleep(0.01)
+        self.writes += 1
+
+    def test_changes_share_one_write(self):
+        for _ in range(100):
+            self.flusher.mark_dirty()
+
+        self.assertEqual(self.flusher.pending, 100, "Expected 100 pending")
+        self.assertTrue(self.flusher.barrier(timeout=5), "Expected True")
+        self.assertEqual(self.writes, 1, "Expected a single write")
+
+        stats = self.flusher.stats()
+
+        self.assertEqual(stats["pending"], 0, "Expected nothing pending")
+        self.assertEqual(stats["flushes"], 1, "Expected one flush")
+        self.assertIsNotNone(stats["last_flush_at"])
+        self.assertGreater(stats["last_flush_duration"], 0)
+
+    def test_max_batch_triggers_a_write(self):
+        self.flusher.max_batch = 10
+
+        for _ in range(10):
+            self.flusher.mark_dirty()
+
+        time.sleep(0.5)
+
+        self.assertEqual(self.writes, 1, "Expected a write without barrier")
+
+    def test_concurrent_barriers(self):
+        def work():
+            self.flusher.mark_dirty()
+            self.assertTrue(self.flusher.barrier(timeout=5))
+
+        threads = [threading.Thread(target=work) for _ in range(20)]
+
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(self.flusher.pending, 0, "Expected nothing pending")
+        self.assertLess(self.writes, 20, "Expected writes to be shared")
+
+    def test_barrier_raises_while_flushes_fail(self):
+        self.flusher.close()
+        errors = [OSError("disk full")]
+
+        def write():
+            if errors:
+                raise errors.pop()
+            self.writes += 1
+
+        self.flusher = WriteBehindFlusher(write, max_delay=0.05)
+        self.flusher.mark_dirty()
+
+        with self.assertRaises(FlushFailed):
+            self.flusher.barrier(timeout=5)
+
+        self.assertEqual(self.flusher.stats()["last_error"], "disk full")
+        self.assertTrue(self.flusher.barrier(timeout=5), "Expected True")
+        self.assertEqual(self.writes, 1, "Expected the retry to write")
+
+
+class TestPickleRepositoryWriteBehind(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.dir = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.dir.name, "test_file.pkl")
+        self.config = {
+            "STORAGE_WRITE_BEHIND": True,
+            "STORAGE_WRITE_BEHIND_MAX_DELAY": 10,
+        }
+
+    def tearDown(self) -> None:
+        self.dir.cleanup()
+
+    def new_repo(self) -> PickleRepository:
+        return PickleRepository(
+            self.filename,
+            models={"DummyModel": DummyModel},
+            data={"DummyModel": []},
+            config=self.config,
+        )
+
+    def test_flush_persists_pending_changes(self):
+        repo = self.new_repo()
+
+        for i in range(50):
+            repo.save(DummyModel(f"dummy{i}"))
+
+        self.assertEqual(len(self.new_repo().get_all("DummyModel")), 0)
+
+        self.assertTrue(repo.flush(timeout=5), "Expected True")
+
+        self.assertEqual(len(self.new_repo().get_all("DummyModel")), 50)
+        self.assertEqual(repo.flusher.flushes, 1, "Expected one flush")
+
+        repo.flusher.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
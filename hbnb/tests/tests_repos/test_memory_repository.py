@@ -0,0 +1,269 @@
+import random
+from typing import Optional
+from uuid import uuid4
+from src import get_models
+from src.persistence.memory import MemoryRepository
+from src.persistence.repository import Repository
+import unittest
+
+
+class DummyModel:
+    __indexes__ = ["name"]
+
+    id: str
+    name: str = ""
+
+    def __init__(self, name: str, id: Optional[str] = None) -> None:
+        self.id = id or str(uuid4())
+        self.name = name
+        self.updated_at = None
+
+    def to_dict(self):
+        return {"id": self.id, "name": self.name}
+
+
+class OrderedModel(DummyModel):
+    __ordering__ = ("name", "id")
+
+
+class LocatedModel(OrderedModel):
+    __location__ = ("latitude", "longitude")
+
+    def __init__(self, latitude: float, longitude: float) -> None:
+        super().__init__("located")
+        self.latitude = latitude
+        self.longitude = longitude
+
+
+class LinkedModel(OrderedModel):
+    __links__ = {"tags": ("TagLink", "owner_id", "tag")}
+
+
+class TagLink(DummyModel):
+    __bitmap__ = ("owner_id", "tag")
+
+    def __init__(self, owner_id: str, tag: str) -> None:
+        super().__init__(tag)
+        self.owner_id = owner_id
+        self.tag = tag
+
+
+class TestMemoryRepository(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        get_models()
+
+    def setUp(self) -> None:
+        self.repo = MemoryRepository({"DummyModel": DummyModel}, {})
+
+    def test_get_all_keeps_insertion_order(self):
+        objs = [DummyModel(f"dummy{i}") for i in range(5)]
+
+        for obj in objs:
+            self.repo.save(obj)
+
+        result = self.repo.get_all("DummyModel")
+
+        self.assertIsInstance(
+            result, list, f"Expected a list but got {type(result)}"
+        )
+        self.assertEqual(result, objs, "Expected insertion order")
+
+    def test_get(self):
+        self.assertIsNone(self.repo.get("DummyModel", "1"), "Expected None")
+
+        obj = DummyModel("dummy")
+        self.repo.save(obj)
+
+        self.assertIs(self.repo.get("DummyModel", obj.id), obj)
+
+    def test_save_twice(self):
+        obj = DummyModel("dummy")
+
+        self.repo.save(obj)
+        self.repo.save(obj)
+
+        self.assertEqual(len(self.repo.get_all("DummyModel")), 1)
+
+    def test_update(self):
+        obj = DummyModel("dummy")
+
+        self.assertIsNone(self.repo.update(obj), "Expected None")
+
+        self.repo.save(obj)
+        obj.name = "updated"
+
+        result = self.repo.update(obj)
+
+        self.assertEqual(result.name, "updated", "Expected 'updated'")
+        self.assertIsNotNone(result.updated_at, "Expected updated_at")
+
+    def test_delete(self):
+        first, second = DummyModel("first"), DummyModel("second")
+        self.repo.save(first)
+        self.repo.save(second)
+
+        self.assertTrue(self.repo.delete(first), "Expected True")
+        self.assertFalse(self.repo.delete(first), "Expected False")
+        self.assertIsNone(self.repo.get("DummyModel", first.id))
+        self.assertEqual(self.repo.get_all("DummyModel"), [second])
+
+    def test_find_by(self):
+        obj = DummyModel("dummy")
+        self.repo.save(obj)
+        self.repo.save(DummyModel("other"))
+
+        self.assertEqual(self.repo.find_by("DummyModel", name="dummy"), [obj])
+
+        obj.name = "renamed"
+        self.repo.update(obj)
+
+        self.assertIsNone(self.repo.find_one_by("DummyModel", name="dummy"))
+        self.assertIs(
+            self.repo.find_one_by("DummyModel", name="renamed"), obj
+        )
+
+    def test_bulk_operations(self):
+        objs = [DummyModel(f"dummy{i}") for i in range(5)]
+
+        self.assertEqual(self.repo.save_many(objs), objs)
+        self.assertEqual(self.repo.get_all("DummyModel"), objs)
+
+        for obj in objs:
+            obj.name = "renamed"
+
+        updated = self.repo.update_many(objs[:3] + [DummyModel("missing")])
+
+        self.assertEqual(updated, objs[:3], "Expected the stored objects")
+        self.assertEqual(len({obj.updated_at for obj in updated}), 1)
+        self.assertEqual(
+            len(self.repo.find_by("DummyModel", name="renamed")), 3
+        )
+        self.assertEqual(self.repo.delete_many(objs[:2] + objs[:1]), 2)
+        self.assertEqual(self.repo.get_all("DummyModel"), objs[2:])
+
+    def test_get_all_query(self):
+        objs = [DummyModel(name) for name in ("b", "a", "c", "a")]
+        self.repo.save_many(objs)
+
+        result = self.repo.get_all(
+            "DummyModel", filters={"name__in": ["a", "b"]}, order_by="name"
+        )
+
+        self.assertEqual(result, [objs[1], objs[3], objs[0]])
+
+        result = self.repo.get_all(
+            "DummyModel", filters={"name": "a"}, limit=1, offset=1
+        )
+
+        self.assertEqual(result, [objs[3]])
+
+    def test_get_page(self):
+        objs = [DummyModel(name) for name in ("b", "a", "c", "a")]
+        self.repo.save_many(objs)
+        by_id = sorted(objs, key=lambda obj: obj.id)
+
+        first = self.repo.get_page("DummyModel", limit=3)
+        rest = self.repo.get_page("DummyModel", after=(first[-1].id,))
+
+        self.assertEqual(first + rest, by_id, "Expected pages by id")
+
+        ordered = MemoryRepository({"OrderedModel": OrderedModel}, {})
+        objs = [OrderedModel(name) for name in ("b", "a", "c", "a")]
+        ordered.save_many(objs)
+
+        page = ordered.get_page("OrderedModel", {"name": "a"}, limit=1)
+        after = (page[-1].name, page[-1].id)
+
+        self.assertEqual(
+            page + ordered.get_page("OrderedModel", {"name": "a"}, after),
+            sorted(objs[1::2], key=lambda obj: obj.id),
+        )
+        self.assertEqual(
+            ordered.get_page("OrderedModel", after=("b", "")),
+            [objs[0], objs[2]],
+        )
+
+    def test_iter_all(self):
+        ordered = MemoryRepository({"OrderedModel": OrderedModel}, {})
+        objs = [OrderedModel(name) for name in ("b", "a", "c", "a")]
+        ordered.save_many(objs)
+
+        result = ordered.iter_all("OrderedModel", {"name__ne": "c"})
+
+        self.assertNotIsInstance(result, list, "Expected an iterator")
+        self.assertEqual(
+            list(result),
+            sorted(
+                [objs[1], objs[3], objs[0]],
+                key=lambda obj: (obj.name, obj.id),
+            ),
+        )
+
+    def test_linked_to_all(self):
+        # Without the bitmap the owners of each tag are intersected
+        unmapped = type("TagLink", (TagLink,), {"__bitmap__": None})
+
+        for link in (TagLink, unmapped):
+            models = {"LinkedModel": LinkedModel, "TagLink": link}
+            repo = MemoryRepository(models, {})
+            objs = [LinkedModel(name) for name in ("b", "a", "c")]
+            repo.save_many(objs)
+            repo.save_many(
+                link(obj.id, tag)
+                for obj, tags in zip(objs, ("xy", "x", "xyz"))
+                for tag in tags
+            )
+
+            filters = {"tags__all": ["x", "y"]}
+            expected = [objs[0], objs[2]]
+
+            self.assertCountEqual(
+                repo.get_all("LinkedModel", filters), expected
+            )
+            self.assertEqual(
+                repo.get_page("LinkedModel", filters, limit=1), expected[:1]
+            )
+            self.assertEqual(
+                list(repo.iter_all("LinkedModel", filters | {"name": "c"})),
+                expected[1:],
+            )
+            self.assertEqual(
+                repo.get_all("LinkedModel", {"tags__all": ["w", "x"]}), []
+            )
+            self.assertEqual(
+                len(repo.get_all("LinkedModel", {"tags__all": []})), 3
+            )
+
+    def test_near(self):
+        located = MemoryRepository({"LocatedModel": LocatedModel}, {})
+        rng = random.Random(0)
+        located.save_many(
+            LocatedModel(rng.uniform(-35, -30), rng.uniform(-58, -53))
+            for _ in range(2000)
+        )
+
+        for latitude, longitude, radius_km in [
+            (-34.9, -56.2, 25), (-32, -55, 150), (-30, -53, 5)
+        ]:
+            self.assertEqual(
+                located.near(
+                    "LocatedModel", latitude, longitude, radius_km, 50
+                ),
+                Repository.near(
+                    located, "LocatedModel", latitude, longitude,
+                    radius_km, 50
+                ),
+                "Expected the index to find what a scan finds",
+            )
+
+        with self.assertRaises(ValueError):
+            self.repo.near("DummyModel", 0, 0, 1)
+
+    def test_reload_populates_country(self):
+        self.assertIsNotNone(self.repo.get("Country", "UY"), "Expected UY")
+
+
+if __name__ == "__main__":
+    unittest.main()
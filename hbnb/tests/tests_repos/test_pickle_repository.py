@@ -1,6 +1,10 @@
+import os
+import pickle
+import tempfile
 from typing import Optional
 from uuid import uuid4
 from src.persistence.pickled import PickleRepository
+from src.persistence.table import Table
 import unittest
 
 
@@ -87,3 +91,152 @@ class TestPickleRepository(unittest.TestCase):
         result = self.repo.delete(obj)
 
         self.assertTrue(result, "Expected True")
+
+
+class OtherModel(DummyModel):
+    pass
+
+
+class TestPickleRepositoryShards(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.dir = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.dir.name, "test_file.pkl")
+        self.config = {"PICKLE_STORAGE_PARTITIONS": 1}
+
+    def tearDown(self) -> None:
+        self.dir.cleanup()
+
+    def new_repo(self) -> PickleRepository:
+        return PickleRepository(
+            self.filename,
+            models={"DummyModel": DummyModel, "OtherModel": OtherModel},
+            data={"DummyModel": [], "OtherModel": []},
+            config=self.config,
+        )
+
+    def shard(self, model: str, partition: int = 0) -> str:
+        filename = f"test_file.{model}.{partition}.pkl"
+        return os.path.join(self.dir.name, filename)
+
+    def test_one_shard_per_model(self):
+        repo = self.new_repo()
+        repo.save(DummyModel("dummy"))
+        repo.save(OtherModel("other"))
+
+        self.assertTrue(os.path.exists(self.shard("DummyModel")))
+        self.assertTrue(os.path.exists(self.shard("OtherModel")))
+
+        mtime = os.stat(self.shard("OtherModel")).st_mtime_ns
+        repo.save(DummyModel("dummy2"))
+
+        self.assertEqual(
+            os.stat(self.shard("OtherModel")).st_mtime_ns,
+            mtime,
+            "Expected the untouched shard not to be rewritten",
+        )
+
+    def test_models_are_loaded_on_demand(self):
+        repo = self.new_repo()
+        obj = DummyModel("dummy")
+        repo.save(obj)
+        repo.save(OtherModel("other"))
+
+        repo = self.new_repo()
+
+        self.assertNotIsInstance(repo._data.get("OtherModel"), Table)
+        self.assertEqual(repo.get("DummyModel", obj.id).name, "dummy")
+        self.assertNotIsInstance(repo._data.get("OtherModel"), Table)
+
+    def test_partitions(self):
+        self.config["PICKLE_STORAGE_PARTITIONS"] = 4
+        repo = self.new_repo()
+        objs = [DummyModel(f"dummy{i}") for i in range(20)]
+
+        for obj in objs:
+            repo.save(obj)
+
+        shards = [
+            p for p in range(4) if os.path.exists(self.shard("DummyModel", p))
+        ]
+
+        self.assertGreater(len(shards), 1, "Expected several shards")
+
+        repo.delete(objs[0])
+        self.config["PICKLE_STORAGE_PARTITIONS"] = 2
+        repo = self.new_repo()
+        repo.preload()
+        repo._save_to_file()
+
+        self.assertEqual(len(repo.get_all("DummyModel")), 19)
+        self.assertFalse(os.path.exists(self.shard("DummyModel", 3)))
+        self.assertEqual(len(self.new_repo().get_all("DummyModel")), 19)
+
+    def test_bulk_operations_write_each_shard_once(self):
+        self.config["PICKLE_STORAGE_PARTITIONS"] = 2
+        repo = self.new_repo()
+        writes = []
+        save_to_file = repo._save_to_file
+        repo._save_to_file = lambda: (
+            writes.append(len(repo._dirty)),
+            save_to_file(),
+        )
+        objs = [DummyModel(f"dummy{i}") for i in range(10)]
+
+        repo.save_many(objs + [OtherModel("other")])
+        repo.delete_many(objs[:5])
+
+        self.assertEqual(len(writes), 2, "Expected one write per batch")
+        self.assertLessEqual(writes[0], 3)
+        self.assertEqual(len(self.new_repo().get_all("DummyModel")), 5)
+
+    def test_older_shards_are_not_written(self):
+        repo = self.new_repo()
+        repo.save(DummyModel("dummy"))
+        writes = []
+        write_shards = repo._write_shards
+        repo._write_shards = lambda *args: writes.append(args)
+
+        repo.save(DummyModel("dummy2"))
+        repo.save(DummyModel("dummy3"))
+        repo._write_shards = write_shards
+
+        for args in reversed(writes):
+            repo._write_shards(*args)
+
+        self.assertEqual(len(self.new_repo().get_all("DummyModel")), 3)
+
+    def test_failed_write_keeps_the_shards_dirty(self):
+        repo = self.new_repo()
+
+        def fail(*args):
+            raise OSError("disk full")
+
+        repo._write_shards = fail
+
+        with self.assertRaises(OSError):
+            repo.save(DummyModel("dummy"))
+
+        self.assertEqual(repo._dirty, {("DummyModel", 0)})
+
+        del repo._write_shards
+        repo._save_to_file()
+
+        self.assertEqual(len(self.new_repo().get_all("DummyModel")), 1)
+
+    def test_single_file_is_split(self):
+        obj = DummyModel("legacy")
+
+        with open(self.filename, "wb") as file:
+            pickle.dump({"DummyModel": [obj], "OtherModel": []}, file)
+
+        repo = self.new_repo()
+
+        self.assertTrue(os.path.exists(self.shard("DummyModel")))
+        self.assertEqual(repo.get("DummyModel", obj.id).name, "legacy")
+        reloaded = self.new_repo().get("DummyModel", obj.id)
+        self.assertEqual(reloaded.name, "legacy")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+from datetime import datetime, timedelta
+import random
+import unittest
+
+from src import create_app, repo
+from src.config import TestingConfig
+
+QUERIES = [
+    "",
+    "min_price=100&max_price=250",
+    "city_id=city-0&min_guests=4",
+    "country_code=AR&sort=-price_per_night",
+    "country_code=UY&min_rooms=2&min_bathrooms=2&sort=max_guests,-name",
+    "min_price=300&sort=price_per_night&limit=7&offset=3",
+    "max_price=50&min_guests=6&sort=-number_of_rooms,created_at",
+    "city_id=city-1&country_code=AR",
+    "min_price=1000",
+    "sort=-created_at&limit=20&offset=100",
+]
+
+
+class MemoryConfig(TestingConfig):
+    REPOSITORY = "memory"
+
+
+class PlaceSearchEquivalenceTests(unittest.TestCase):
+    """The database and the in-memory planner return the same places"""
+
+    def search(self, config) -> dict:
+        app = create_app(config)
+        client = app.test_client()
+
+        with app.app_context():
+            from src.models.city import City
+            from src.models.place import Place
+            from src.models.user import User
+
+            rng = random.Random(0)
+            host = User(
+                email="search@example.com",
+                first_name="Search",
+                last_name="Host",
+                password="password",
+                id="host",
+            )
+            cities = [
+                City(
+                    name=f"City {i}",
+                    country_code=("UY", "AR", "BR")[i % 3],
+                    id=f"city-{i}",
+                )
+                for i in range(6)
+            ]
+            start = datetime(2024, 1, 1)
+            places = [
+                Place(
+                    {
+                        "name": f"Place {rng.randrange(50)}",
+                        "address": "Somewhere",
+                        "city_id": rng.choice(cities).id,
+                        "host_id": host.id,
+                        "price_per_night": rng.randrange(0, 500),
+                        "max_guests": rng.randrange(1, 9),
+                        "number_of_rooms": rng.randrange(1, 5),
+                        "number_of_bathrooms": rng.randrange(1, 4),
+                    },
+                    id=f"place-{i:03}",
+                    created_at=start + timedelta(hours=rng.randrange(100)),
+                )
+                for i in range(300)
+            ]
+            repo.save_many([host, *cities])
+            repo.save_many(places)
+
+        results = {}
+
+        for query in QUERIES:
+            response = client.get(f"/places/search?fields=id&{query}")
+            self.assertEqual(response.status_code, 200, query)
+            results[query] = [place["id"] for place in response.get_json()]
+
+        return results
+
+    def test_same_results(self):
+        expected = self.search(TestingConfig)
+        result = self.search(MemoryConfig)
+
+        self.assertTrue(all(expected[query] for query in QUERIES[:-2]))
+
+        for query in QUERIES:
+            self.assertEqual(result[query], expected[query], query)
+
+    def test_invalid_arguments(self):
+        client = create_app(TestingConfig).test_client()
+
+        for query in ("min_price=cheap", "min_guests=-1", "sort=host_id"):
+            response = client.get(f"/places/search?{query}")
+            self.assertEqual(response.status_code, 400, query)
+
+
+if __name__ == "__main__":
+    unittest.main()
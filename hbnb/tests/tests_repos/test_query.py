@@ -0,0 +1,77 @@
+from src.persistence import query
+import unittest
+
+
+class DummyModel:
+    def __init__(self, name: str, rating: "int | None") -> None:
+        self.name = name
+        self.rating = rating
+
+
+class TestQuery(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.objs = [
+            DummyModel("b", 3),
+            DummyModel("a", None),
+            DummyModel("c", 5),
+            DummyModel("a", 4),
+        ]
+
+    def test_parse_filters(self):
+        conditions = query.parse_filters(
+            {"name": "a", "rating__gte": 4, "name__in": ("a", "b")}
+        )
+
+        self.assertEqual(
+            conditions,
+            [
+                ("name", "eq", "a"),
+                ("rating", "gte", 4),
+                ("name", "in", ["a", "b"]),
+            ],
+        )
+
+        with self.assertRaises(ValueError):
+            query.parse_filters({"rating__between": (1, 2)})
+
+    def test_filters(self):
+        conditions = query.parse_filters({"rating__gte": 4})
+        result = query.apply(self.objs, conditions, [])
+
+        self.assertEqual(result, [self.objs[2], self.objs[3]])
+
+        conditions = query.parse_filters({"rating__ne": 3})
+        result = query.apply(self.objs, conditions, [])
+
+        self.assertEqual(result, self.objs[1:], "Expected nulls to match ne")
+
+    def test_order(self):
+        order = query.parse_order(["name", "-rating"])
+        result = query.apply(self.objs, [], order)
+
+        self.assertEqual(
+            [(obj.name, obj.rating) for obj in result],
+            [("a", 4), ("a", None), ("b", 3), ("c", 5)],
+        )
+
+    def test_paginate(self):
+        order = query.parse_order("rating")
+        result = query.apply(self.objs, [], order, limit=2, offset=1)
+
+        self.assertEqual(result, [self.objs[0], self.objs[3]])
+
+    def test_pagination_is_lazy(self):
+        read = []
+
+        def objs():
+            for obj in self.objs:
+                read.append(obj)
+                yield obj
+
+        self.assertEqual(query.apply(objs(), [], [], limit=1), self.objs[:1])
+        self.assertEqual(len(read), 1, "Expected only one object read")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,156 @@
+from datetime import datetime
+import os
+import tempfile
+from typing import Optional
+from uuid import uuid4
+from src import get_models
+from src.persistence import get_repo
+from src.persistence.snapshot import (
+    Snapshot,
+    SnapshotError,
+    SnapshotRepository,
+)
+import unittest
+
+
+class DummyModel:
+    __indexes__ = ["name"]
+
+    id: str
+
+    def __init__(
+        self,
+        name: str,
+        id: Optional[str] = None,
+        price: Optional[int] = None,
+        rating: float = 0.0,
+        active: bool = True,
+        tags: Optional[list] = None,
+        **kw,
+    ) -> None:
+        self.id = id or str(uuid4())
+        self.name = name
+        self.price = price
+        self.rating = rating
+        self.active = active
+        self.tags = tags or []
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "name": self.name,
+            "price": self.price,
+            "rating": self.rating,
+            "active": self.active,
+            "tags": self.tags,
+        }
+
+
+class TestSnapshotRepository(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.dir = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.dir.name, "test_file.bin")
+        self.config = {}
+
+    def tearDown(self) -> None:
+        self.dir.cleanup()
+
+    def new_repo(self, models: Optional[dict] = None) -> SnapshotRepository:
+        return SnapshotRepository(
+            self.filename,
+            models=models or {"DummyModel": DummyModel},
+            data={},
+            config=self.config,
+        )
+
+    def test_get_repo(self):
+        self.assertIs(get_repo("snapshot"), SnapshotRepository)
+
+    def test_round_trip(self):
+        repo = self.new_repo()
+        objs = [
+            DummyModel("first", price=120, rating=4.5, tags=["wifi"]),
+            DummyModel("sécond", active=False),
+        ]
+
+        for obj in objs:
+            repo.save(obj)
+
+        result = self.new_repo().get_all("DummyModel")
+
+        self.assertEqual(
+            [obj.to_dict() for obj in result],
+            [obj.to_dict() for obj in objs],
+        )
+
+    def test_fields_are_decoded_on_demand(self):
+        repo = self.new_repo()
+        objs = [DummyModel(f"dummy{i % 2}") for i in range(6)]
+
+        for obj in objs:
+            repo.save(obj)
+
+        repo = self.new_repo()
+        table = repo._table("DummyModel")
+
+        self.assertEqual(table.hydrated, 0, "Expected nothing hydrated")
+        self.assertEqual(len(repo.find_by("DummyModel", name="dummy1")), 3)
+        self.assertEqual(table.hydrated, 3, "Expected 3 hydrated objects")
+
+    def test_corrupted_file(self):
+        self.new_repo().save(DummyModel("dummy"))
+
+        with open(self.filename, "r+b") as file:
+            file.seek(-4, os.SEEK_END)
+            last = file.read(1)
+            file.seek(-4, os.SEEK_END)
+            file.write(bytes([last[0] ^ 0x01]))
+
+        with self.assertRaises(SnapshotError):
+            Snapshot(self.filename)
+
+        Snapshot(self.filename, verify=False)
+
+    def test_journal(self):
+        self.config["FILE_STORAGE_JOURNAL"] = True
+        repo = self.new_repo()
+        obj = DummyModel("dummy")
+        repo.save(obj)
+
+        reloaded = self.new_repo().get("DummyModel", obj.id)
+        self.assertEqual(reloaded.name, "dummy")
+
+        repo.compact()
+
+        self.assertEqual(os.path.getsize(repo.journal_filename), 0)
+        reloaded = self.new_repo().get("DummyModel", obj.id)
+        self.assertEqual(reloaded.name, "dummy")
+
+    def test_mapped_models(self):
+        models = {model.__name__: model for model in get_models()}
+        repo = self.new_repo(models)
+        repo._table("User").add(
+            {
+                "id": str(uuid4()),
+                "email": "snapshot@example.com",
+                "password": "stored-hash",
+                "first_name": "Snap",
+                "last_name": "Shot",
+                "is_admin": True,
+                "created_at": "2024-01-01T10:00:00",
+                "updated_at": "2024-01-02T10:00:00",
+            }
+        )
+        user = repo.find_one_by("User", email="snapshot@example.com")
+        repo._save_to_file()
+
+        reloaded = self.new_repo(models).get("User", user.id)
+
+        self.assertEqual(reloaded.password, "stored-hash")
+        self.assertIs(reloaded.is_admin, True)
+        self.assertEqual(reloaded.updated_at, datetime(2024, 1, 2, 10))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,221 @@
+import random
+from uuid import uuid4
+from src.persistence import query
+from src.persistence.geo import bounding_box, haversine
+from src.persistence.table import Table
+import unittest
+
+
+class DummyModel:
+    def __init__(self, name: str, code: str) -> None:
+        self.id = str(uuid4())
+        self.name = name
+        self.code = code
+
+
+class DummyPoint:
+    def __init__(self, latitude: float, longitude: float) -> None:
+        self.id = str(uuid4())
+        self.latitude = latitude
+        self.longitude = longitude
+
+
+class TestTable(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.table = Table(["code", ("name", "code")])
+        self.objs = [
+            DummyModel("a", "UY"),
+            DummyModel("b", "UY"),
+            DummyModel("a", "AR"),
+        ]
+
+        for obj in self.objs:
+            self.table.add(obj)
+
+    def test_find_single_index(self):
+        result = self.table.find(code="UY")
+
+        self.assertEqual(result, self.objs[:2], "Expected both UY objects")
+
+    def test_find_composite_index(self):
+        result = self.table.find_one(name="a", code="AR")
+
+        self.assertIs(result, self.objs[2])
+        self.assertIsNone(self.table.find_one(name="b", code="AR"))
+
+    def test_find_without_index(self):
+        result = self.table.find(name="a")
+
+        self.assertEqual(result, [self.objs[0], self.objs[2]])
+
+    def test_replace_moves_between_buckets(self):
+        obj = self.objs[0]
+        obj.code = "AR"
+
+        self.assertTrue(self.table.replace(obj), "Expected True")
+
+        self.assertEqual(self.table.find(code="UY"), [self.objs[1]])
+        self.assertIs(self.table.find_one(name="a", code="AR"), self.objs[2])
+        self.assertEqual(len(self.table.find(code="AR")), 2)
+
+    def test_remove(self):
+        obj = self.objs[1]
+
+        self.assertIs(self.table.remove(obj.id), obj)
+        self.assertIsNone(self.table.remove(obj.id))
+        self.assertEqual(self.table.find(code="UY"), [self.objs[0]])
+        self.assertEqual(len(self.table), 2)
+
+    def test_add_records(self):
+        records = [
+            {"id": self.objs[0].id, "name": "z", "code": "UY"},
+            {"id": "new", "name": "a", "code": "UY"},
+        ]
+
+        self.table.add_records(
+            records, lambda field: [record[field] for record in records]
+        )
+
+        self.assertEqual(len(self.table), 4, "Expected the known id skipped")
+        self.assertIs(self.table.find_one(name="a", code="UY"), self.objs[0])
+        self.assertEqual(len(self.table.find(code="UY")), 3)
+        self.assertIs(self.table.remove("new"), records[1])
+        self.assertEqual(len(self.table.find(code="UY")), 2)
+
+    def test_ordered(self):
+        table = Table(["code"], self.objs, order=("name", "id"))
+        by_order = sorted(self.objs, key=lambda obj: (obj.name, obj.id))
+
+        self.assertEqual(list(table.ordered()), by_order)
+        self.assertEqual(
+            list(table.ordered((by_order[0].name, by_order[0].id))),
+            by_order[1:],
+        )
+        self.assertEqual(list(table.ordered(("a", "~"))), [self.objs[1]])
+        self.assertEqual(
+            list(table.ordered(code="UY")), [self.objs[0], self.objs[1]]
+        )
+
+        table.remove(self.objs[1].id)
+        self.assertEqual(list(table.ordered(("a", "~"))), [])
+
+        with self.assertRaises(ValueError):
+            list(self.table.ordered())
+
+    def test_select(self):
+        rng = random.Random(0)
+        objs = []
+
+        for _ in range(500):
+            obj = DummyModel(rng.choice("abc"), rng.choice(["UY", "AR"]))
+            obj.price = rng.choice([None, *range(100)])
+            objs.append(obj)
+
+        table = Table(["code", ("name", "code")], objs, ranges=["price"])
+
+        for filters in [
+            {"code": "UY"},
+            {"name": "a", "code": "AR", "price__lt": 50},
+            {"price__gte": 10, "price__lte": 20},
+            {"price": 42, "name__ne": "b"},
+            {"code__in": ["AR"], "price__gt": 98},
+            {"price__gt": 80, "price__lt": 20},
+            {"price__gte": "x"},
+            {"name": "b"},
+        ]:
+            conditions = query.parse_filters(filters)
+            expected = [obj for obj in objs if query.matches(obj, conditions)]
+
+            self.assertCountEqual(
+                list(table.select(conditions)), expected, str(filters)
+            )
+
+        obj = objs[0]
+        table.remove(obj.id)
+        obj.price = 1000
+        table.add(obj)
+        self.assertEqual(
+            list(table.select(query.parse_filters({"price__gt": 100}))),
+            [obj],
+        )
+
+    def test_near(self):
+        montevideo = DummyPoint(-34.9011, -56.1645)
+        buenos_aires = DummyPoint(-34.6037, -58.3816)
+        nowhere = DummyPoint(None, None)
+        table = Table(
+            location=("latitude", "longitude"),
+            objects=[buenos_aires, montevideo, nowhere],
+        )
+
+        result = table.near(-34.9, -56.2, 300)
+        self.assertEqual(
+            [obj for obj, _ in result], [montevideo, buenos_aires]
+        )
+        self.assertLess(result[0][1], 5)
+        self.assertAlmostEqual(
+            result[1][1], haversine(-34.9, -56.2, -34.6037, -58.3816)
+        )
+        self.assertEqual(len(table.near(-34.9, -56.2, 300, limit=1)), 1)
+        self.assertEqual(len(table.near(-34.9, -56.2, 20_000)), 2)
+
+        montevideo.latitude, montevideo.longitude = 40.4168, -3.7038
+        table.replace(montevideo)
+        self.assertEqual(
+            [obj for obj, _ in table.near(-34.9, -56.2, 300)], [buenos_aires]
+        )
+
+        table.remove(buenos_aires.id)
+        self.assertEqual(table.near(-34.9, -56.2, 300), [])
+
+        with self.assertRaises(ValueError):
+            self.table.near(0, 0, 1)
+
+    def test_near_antimeridian(self):
+        east, west = DummyPoint(0, 179.95), DummyPoint(0, -179.95)
+        table = Table(location=("latitude", "longitude"), objects=[east, west])
+
+        latitudes, longitudes = bounding_box(0, 179.99, 20)
+        self.assertEqual(len(longitudes), 2)
+        self.assertEqual(
+            {obj.id for obj, _ in table.near(0, 179.99, 20)},
+            {east.id, west.id},
+        )
+        self.assertEqual(len(table.near(89.99, 0, 5)), 0)
+
+    def test_linked_to_all(self):
+        links = [
+            ("p1", "wifi"), ("p1", "pool"), ("p2", "wifi"),
+            ("p3", "pool"), ("p3", "wifi"), ("p3", "wifi"),
+        ]
+        rows = [
+            {"id": str(i), "owner": owner, "member": member}
+            for i, (owner, member) in enumerate(links)
+        ]
+        table = Table(bitmap=("owner", "member"), objects=rows[:2])
+        table.add_records(rows[2:], lambda f: [row[f] for row in rows[2:]])
+
+        self.assertEqual(table.linked_to_all(["wifi"]), {"p1", "p2", "p3"})
+        self.assertEqual(table.linked_to_all(["wifi", "pool"]), {"p1", "p3"})
+        self.assertEqual(table.linked_to_all(["wifi", "gym"]), set())
+
+        # p3 is linked to wifi twice, removing one link keeps it
+        table.remove("5")
+        table.remove("0")
+        self.assertEqual(table.linked_to_all(["wifi"]), {"p2", "p3"})
+
+        table.replace({"id": "4", "owner": "p3", "member": "gym"})
+        self.assertEqual(table.linked_to_all(["pool", "gym"]), {"p3"})
+        self.assertEqual(table.linked_to_all(["wifi", "pool"]), set())
+
+        self.assertEqual(
+            [row["id"] for row in table.select([], among={"1", "9"})], ["1"]
+        )
+
+        with self.assertRaises(ValueError):
+            self.table.linked_to_all(["wifi"])
+
+
+if __name__ == "__main__":
+    unittest.main()
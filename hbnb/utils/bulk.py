@@ -0,0 +1,119 @@
+"""
+Bulk creation for the `POST /<collection>/bulk` endpoints
+
+The body is a list of the objects a `POST` to the collection takes, the
+whole list is validated before anything is written. The references of
+every object (hosts, cities, places...) are checked with a query per
+chunk of ids and the valid objects are inserted in chunks, in one
+transaction.
+
+The routes check the body with `validate_items` instead of letting
+Flask-RESTX validate the objects, which builds a schema validator for
+each of them:
+
+    @api.expect([place_input_fields], validate=False)
+    @validate_items(place_input_fields)
+    def post(self): ...
+
+The response holds the result of each object, in the order they were
+sent, with the status and body a `POST` of that object alone would
+have returned:
+
+    {"created": 1, "results": [
+        {"status": 201, "body": {"id": "...", ...}},
+        {"status": 400, "body": "City with ID ... not found"}
+    ]}
+"""
+
+from functools import wraps
+from typing import Any, Callable, Optional
+
+from flask import abort, current_app, request
+from flask_restx import Model, abort as restx_abort
+from jsonschema import Draft4Validator
+
+from src import repo
+
+
+def validate_items(model: Model) -> Callable:
+    """
+    Decorates the `post` of a bulk route to check that the body is a
+    list of at most `BULK_MAX_ITEMS` objects matching `model`, with a
+    single validator for the whole list
+    """
+    validator = None
+
+    def decorator(method: Callable) -> Callable:
+        """Wraps the method of the Resource"""
+
+        @wraps(method)
+        def wrapper(*args, **kwargs):
+            """Answers 400 if the body isn't valid"""
+            nonlocal validator
+            items = request.get_json()
+            maximum = current_app.config.get("BULK_MAX_ITEMS", 1000)
+
+            if not isinstance(items, list):
+                abort(400, "The body must be a list")
+
+            if len(items) > maximum:
+                abort(400, f"A bulk request takes at most {maximum} items")
+
+            if validator is None:
+                validator = Draft4Validator(
+                    {"type": "array", "items": model.__schema__}
+                )
+
+            errors = {
+                ".".join(str(key) for key in error.path): error.message
+                for error in validator.iter_errors(items)
+            }
+
+            if errors:
+                restx_abort(
+                    400, "Input payload validation failed", errors=errors
+                )
+
+            return method(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def bulk_create(
+    create_many: Callable[[list[dict]], list],
+    items: list[dict],
+    authorize: Optional[Callable[[dict], dict]] = None,
+) -> tuple[dict, int]:
+    """
+    Creates the objects of `items` with the `create_many` of a model
+
+    `authorize` returns the item to create for the current user, or
+    raises PermissionError if the user can't create it
+    """
+    results: list[Any] = [None] * len(items)
+    allowed: list[int] = []
+
+    for index, item in enumerate(items):
+        try:
+            items[index] = authorize(item) if authorize else item
+        except PermissionError as e:
+            results[index] = {"status": 403, "body": str(e) or "Forbidden"}
+        else:
+            allowed.append(index)
+
+    # The objects are serialized before the commit, which would expire
+    # them and reload every one of them from the database
+    with repo.transaction():
+        created = create_many([items[index] for index in allowed])
+
+        for index, obj in zip(allowed, created):
+            if isinstance(obj, ValueError):
+                results[index] = {"status": 400, "body": str(obj)}
+            else:
+                results[index] = {"status": 201, "body": obj.to_dict()}
+
+    count = sum(result["status"] == 201 for result in results)
+
+    return {"created": count, "results": results}, 200
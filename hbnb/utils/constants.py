@@ -6,6 +6,8 @@ API_VERSION_PATH = "/v1"
 
 REPOSITORY_ENV_VAR = "REPO"
 DATABASE_URL_ENV_VAR = "DATABASE_URL"
+FILE_STORAGE_JOURNAL_ENV_VAR = "FILE_STORAGE_JOURNAL"
+STORAGE_WRITE_BEHIND_ENV_VAR = "STORAGE_WRITE_BEHIND"
 
 
 class Repos(Enum):
@@ -14,10 +16,14 @@ class Repos(Enum):
     DB = "db"
     FILE = "file"
     PICKLE = "pickle"
+    SNAPSHOT = "snapshot"
     MEMORY = "memory"
 
 
 DEFAULT_REPOSITORY = Repos.DB.value
 
 FILE_STORAGE_FILENAME = "data.json"
+FILE_STORAGE_JOURNAL_SUFFIX = ".journal.jsonl"
 PICKLE_STORAGE_FILENAME = "data.pkl"
+SNAPSHOT_STORAGE_FILENAME = "data.snapshot.bin"
+SEARCH_INDEX_SUFFIX = ".search.pkl"
@@ -0,0 +1,85 @@
+"""
+Conditional GET support for the read endpoints
+
+Responses carry a strong ETag, and a request whose `If-None-Match`
+holds the current one is answered with an empty 304.
+
+- The ETag of an object is derived from its id and `updated_at`.
+- The ETag of a collection is derived from the state of its models
+  (see `RepositoryManager.state`), which follows the writes of every
+  worker when they share the database.
+
+Both include the query string, since `fields`, `limit` and `cursor`
+change the body. The ETag is computed before the response is built, so
+a 304 never serializes the objects, and for collections never reads
+them.
+"""
+
+import hashlib
+from typing import Any, Callable
+
+from flask import Response, request
+from werkzeug.http import quote_etag
+
+from src import repo
+
+
+def _digest(*parts: Any) -> str:
+    """Hashes the parts of an ETag into a short token"""
+    data = "\0".join(str(part) for part in parts)
+    data += "\0" + request.query_string.decode("latin-1")
+
+    return hashlib.sha1(data.encode()).hexdigest()[:32]
+
+
+def entity_etag(obj: Any, *related: type) -> str:
+    """
+    Returns the ETag of an object, `related` are the models of the
+    objects embedded in its representation (like the host of a place)
+
+    Objects without `updated_at` fall back to the state of their model
+    """
+    model_name = type(obj).__name__
+    updated_at = getattr(obj, "updated_at", None)
+    stamp = updated_at.isoformat() if updated_at else repo.state(model_name)
+
+    return _digest(
+        model_name,
+        obj.id,
+        stamp,
+        *(repo.state(model.__name__) for model in related),
+    )
+
+
+def collection_etag(*models: type) -> str:
+    """Returns the ETag of a collection of the objects of some models"""
+    return _digest(
+        *(f"{m.__name__}:{repo.state(m.__name__)}" for m in models)
+    )
+
+
+def conditional(etag: str, build: Callable[[], Any]) -> tuple:
+    """
+    Answers with 304 if the client already has the `etag` version of
+    the response, otherwise calls `build` for it
+
+    `build` returns what a controller would: a Response, a body, or a
+    tuple with the status code and optionally the headers
+    """
+    headers = {"ETag": quote_etag(etag)}
+
+    if request.if_none_match.contains_weak(etag):
+        return "", 304, headers
+
+    result = build()
+
+    if isinstance(result, Response):
+        result.headers.update(headers)
+        return result
+
+    if not isinstance(result, tuple):
+        result = (result, 200)
+
+    body, status, *rest = result
+
+    return body, status, {**(rest[0] if rest else {}), **headers}
@@ -0,0 +1,135 @@
+"""
+Keyset pagination for the list endpoints
+
+A page is requested with `?limit=` and `?cursor=`. The cursor is an
+opaque token holding the ordering values (`created_at` and `id`) of the
+last object of the previous page, so every page is read with a range
+query instead of skipping the previous pages.
+
+The body of the response stays a JSON array, the cursor of the next page
+is sent in the `X-Next-Cursor` header and in a `Link` header with
+`rel="next"`. There's no next page when they are missing.
+"""
+
+import base64
+import binascii
+from datetime import datetime
+import json
+from typing import Any, Iterable, Optional
+from urllib.parse import urlencode
+
+from flask import Response, abort, current_app, request
+from utils.serializers import Serializer, request_load, request_serializer
+from utils.streaming import STREAM_PARAMS, stream, wants_stream
+
+PAGINATION_PARAMS = {
+    "limit": "Maximum amount of objects in the page",
+    "cursor": "Cursor of the page, from the X-Next-Cursor header",
+    **STREAM_PARAMS,
+}
+
+
+def encode_cursor(values: tuple) -> str:
+    """Encodes the ordering values of an object as a cursor"""
+    payload = [
+        {"datetime": v.isoformat()} if isinstance(v, datetime) else v
+        for v in values
+    ]
+    token = base64.urlsafe_b64encode(json.dumps(payload).encode())
+
+    return token.decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple:
+    """
+    Decodes a cursor into the ordering values it holds
+
+    Raises ValueError if the cursor is invalid
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded))
+
+        if not isinstance(payload, list):
+            raise ValueError("Invalid cursor")
+
+        return tuple(
+            (
+                datetime.fromisoformat(v["datetime"])
+                if isinstance(v, dict)
+                else v
+            )
+            for v in payload
+        )
+    except (binascii.Error, ValueError, KeyError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def page_limit(default: Optional[int] = None) -> int:
+    """
+    Reads the `limit` argument, bounded by the configuration, `default`
+    replaces the default limit of the configuration
+    """
+    if default is None:
+        default = current_app.config.get("PAGINATION_DEFAULT_LIMIT", 100)
+
+    maximum = current_app.config.get("PAGINATION_MAX_LIMIT", 1000)
+
+    try:
+        limit = int(request.args.get("limit", default))
+    except ValueError:
+        abort(400, "limit must be an integer")
+
+    if limit < 1:
+        abort(400, "limit must be greater than 0")
+
+    return min(limit, maximum)
+
+
+def paginate(
+    model: Any,
+    filters: Optional[dict] = None,
+    serialize: Optional[Serializer] = None,
+    load: Iterable[str] = (),
+) -> "tuple[list, int, dict] | Response":
+    """
+    Returns the page of objects requested by the arguments of the
+    request as a response with the headers of the next page, or every
+    object as a stream if the request asks for it (see
+    `utils.streaming`)
+
+    Objects are serialized with the fields requested (see
+    `utils.serializers`) unless a serializer is given. `load` names the
+    relationships the serializer uses, they are fetched with the page
+    """
+    if wants_stream():
+        return stream(model, filters, serialize, load)
+
+    serialize = serialize or request_serializer(model)
+    limit = page_limit()
+    after = None
+
+    if request.args.get("cursor"):
+        try:
+            after = decode_cursor(request.args["cursor"])
+        except ValueError as e:
+            abort(400, str(e))
+
+    # One more object than needed tells whether there's a next page
+    objs = model.get_page(
+        filters, after, limit + 1, request_load(model, load)
+    )
+    page = objs[:limit]
+    headers = {}
+
+    if len(objs) > limit:
+        last = page[-1]
+        cursor = encode_cursor(
+            tuple(getattr(last, field) for field in model.__ordering__)
+        )
+        args = request.args.to_dict() | {"cursor": cursor, "limit": limit}
+
+        headers["X-Next-Cursor"] = cursor
+        headers["Link"] = f'<{request.base_url}?{urlencode(args)}>; rel="next"'
+
+    return [serialize(obj) for obj in page], 200, headers
@@ -0,0 +1,139 @@
+"""
+Sparse fieldsets for the read endpoints
+
+A client can ask for some fields only with `?fields=id,name`. The
+response is then built by a serializer generated for the model and
+that set of fields, which only reads the requested attributes: the
+rest of the columns, the relationships and the formatting of the dates
+are skipped.
+
+Serializers are compiled the first time a set of fields is requested
+and cached, so the following requests reuse them. Without `fields` the
+objects are serialized by their `to_dict` method as before.
+
+The fields of a model are its columns and the objects it references
+(like the `host` of a place), which are serialized with their own
+`to_dict`. Endpoints pass the relationships their `to_dict` uses to
+`request_load`, so they are fetched with the objects in DB mode, and
+only the ones requested are fetched when there's a `fields` argument.
+"""
+
+from functools import lru_cache
+from typing import Any, Callable, Iterable, Optional
+
+from flask import abort, request
+import sqlalchemy as sa
+
+FIELDS_PARAMS = {
+    "fields": "Comma separated fields to return, e.g. id,name",
+}
+
+Serializer = Callable[[Any], dict]
+
+
+@lru_cache(maxsize=None)
+def model_fields(model: type) -> dict[str, str]:
+    """
+    Returns the fields a model can be serialized with, by the kind of
+    value they hold: "value", "datetime" or "object"
+    """
+    mapper = sa.inspect(model)
+    fields = {}
+
+    for attr in mapper.column_attrs:
+        column = attr.columns[0]
+        is_date = isinstance(column.type, sa.DateTime)
+        fields[attr.key] = "datetime" if is_date else "value"
+
+    for relationship in mapper.relationships:
+        if not relationship.uselist:
+            fields[relationship.key] = "object"
+
+    return fields
+
+
+_TEMPLATES = {
+    "value": "obj.{0}",
+    "datetime": "(v.isoformat() if (v := obj.{0}) is not None else None)",
+    "object": "(v.to_dict() if (v := obj.{0}) is not None else None)",
+}
+
+
+@lru_cache(maxsize=256)
+def serializer(model: type, fields: tuple[str, ...]) -> Serializer:
+    """
+    Returns a function that serializes objects of a model to a
+    dictionary with only the given fields
+
+    Raises ValueError if a field doesn't exist in the model
+    """
+    kinds = model_fields(model)
+    unknown = [field for field in fields if field not in kinds]
+
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+
+    # The names were checked against the attributes of the model, so
+    # they are safe to use in the generated code
+    items = "".join(
+        f"\n        {field!r}: {_TEMPLATES[kinds[field]].format(field)},"
+        for field in dict.fromkeys(fields)
+    )
+    name = f"serialize_{model.__name__}"
+    source = f"def {name}(obj):\n    return {{{items}\n    }}\n"
+    namespace: dict = {}
+
+    exec(compile(source, f"<serializer {model.__name__}>", "exec"), namespace)
+
+    return namespace[name]
+
+
+def parse_fields(value: Optional[str]) -> Optional[tuple[str, ...]]:
+    """Parses a comma separated list of fields, None if it's empty"""
+    fields = tuple(f.strip() for f in (value or "").split(",") if f.strip())
+
+    return fields or None
+
+
+def request_serializer(model: type) -> Serializer:
+    """
+    Returns the serializer for the `fields` argument of the request,
+    or `to_dict` if there's none. Aborts with 400 on unknown fields
+    """
+    fields = parse_fields(request.args.get("fields"))
+
+    if fields is None:
+        return lambda obj: obj.to_dict()
+
+    try:
+        return serializer(model, fields)
+    except ValueError as e:
+        abort(400, str(e))
+
+
+def request_load(model: type, load: Iterable[str] = ()) -> tuple[str, ...]:
+    """
+    Returns the relationships to fetch with the objects of a model:
+    the ones in the `fields` argument of the request if there's one,
+    otherwise the ones `to_dict` uses, given by the endpoint in `load`
+    """
+    fields = parse_fields(request.args.get("fields"))
+
+    if fields is None:
+        return tuple(load)
+
+    kinds = model_fields(model)
+
+    return tuple(field for field in fields if kinds.get(field) == "object")
+
+
+def serialize(obj: Any) -> dict:
+    """Serializes an object with the fields requested"""
+    return request_serializer(type(obj))(obj)
+
+
+def serialize_all(model: type, objs: Iterable[Any]) -> list[dict]:
+    """Serializes many objects of a model with the fields requested"""
+    serialize_obj = request_serializer(model)
+
+    return [serialize_obj(obj) for obj in objs]
@@ -0,0 +1,94 @@
+"""
+Streaming responses for whole collections
+
+The list endpoints return pages, a whole collection is exported with
+`?stream=true`, or by asking for NDJSON with the
+`Accept: application/x-ndjson` header. The objects are read from the
+repository while the response is sent and written out in chunks, so
+the memory used doesn't grow with the size of the collection and the
+first bytes are sent right away.
+
+The JSON body is the same array a page would hold, NDJSON has one
+object per line.
+"""
+
+import json
+from typing import Any, Iterable, Iterator, Optional
+
+from flask import Response, request, stream_with_context
+from utils.serializers import Serializer, request_load, request_serializer
+
+NDJSON = "application/x-ndjson"
+
+# Amount of objects serialized into each chunk of the response
+CHUNK_SIZE = 500
+
+STREAM_PARAMS = {
+    "stream": "Send the whole collection as a stream instead of a page",
+}
+
+
+def wants_stream() -> bool:
+    """Whether the request asks for the whole collection as a stream"""
+    if request.args.get("stream", "").lower() in ("1", "true"):
+        return True
+
+    return request.accept_mimetypes.best == NDJSON
+
+
+def _chunks(objs: Iterable[Any], serialize: Serializer) -> Iterator[list]:
+    """Serializes the objects in lists of `CHUNK_SIZE` dictionaries"""
+    chunk = []
+
+    for obj in objs:
+        chunk.append(serialize(obj))
+
+        if len(chunk) == CHUNK_SIZE:
+            yield chunk
+            chunk = []
+
+    if chunk:
+        yield chunk
+
+
+def _json_array(objs: Iterable[Any], serialize: Serializer) -> Iterator[str]:
+    """Yields a JSON array of the objects in pieces"""
+    separator = "["
+
+    for chunk in _chunks(objs, serialize):
+        # One call for the whole chunk, without the brackets of the list
+        yield separator + json.dumps(chunk)[1:-1]
+        separator = ","
+
+    yield "]\n" if separator == "," else "[]\n"
+
+
+def _ndjson(objs: Iterable[Any], serialize: Serializer) -> Iterator[str]:
+    """Yields the objects as newline delimited JSON"""
+    for chunk in _chunks(objs, serialize):
+        yield "".join(json.dumps(obj) + "\n" for obj in chunk)
+
+
+def stream(
+    model: Any,
+    filters: Optional[dict] = None,
+    serialize: Optional[Serializer] = None,
+    load: Iterable[str] = (),
+) -> Response:
+    """
+    Returns a response streaming every object of a model matching
+    `filters`, with the fields requested (see `utils.serializers`)
+
+    `load` names the relationships the serializer uses, they are fetched
+    with the objects
+    """
+    serialize = serialize or request_serializer(model)
+    objs = model.iter_all(filters, request_load(model, load))
+
+    if request.accept_mimetypes.best == NDJSON:
+        body, mimetype = _ndjson(objs, serialize), NDJSON
+    else:
+        body, mimetype = _json_array(objs, serialize), "application/json"
+
+    # The context keeps the session of the database open while streaming
+    return Response(stream_with_context(body), mimetype=mimetype)